@@ -6,13 +6,17 @@ import subprocess
 import zipfile
 import ast
 from pathlib import Path
+from typing import cast
 
 import pytest
 
 from backend.deployment.bundler import CodeBundler
+from backend.deployment.deployer import BlitzNetworkDeployer
 from backend.deployment.compilation.util.systems import SystemId
+from backend.deployment.module.base import RunnableModule, StartupPolicy
 from backend.deployment.module.supported import SupportedModules
 from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.transport import TransportError
 from backend.deployment.network_api.utils import FolderPath
 from backend.deployment.network_api.zeroconf import (
     DiscoveredNetworkSystem,
@@ -22,7 +26,6 @@ from backend.deployment.rsyncer import Rsyncer
 from __tests__.deploy_script_tests import INSTALLED_REPO
 from __tests__.docker_test_utils import DockerTestRunner
 
-
 REPO_ROOT = Path(__file__).resolve().parents[1]
 REMOTE_BUNDLE_PATH = "backend-test-bundles"
 
@@ -154,8 +157,12 @@ def test_system_run_command_retries_transient_ssh_auth_failure(
             )
         return subprocess.CompletedProcess(command, 0, stdout="ok\n")
 
-    monkeypatch.setattr("backend.deployment.network_api.system_api.subprocess.run", fake_run)
-    monkeypatch.setattr("backend.deployment.network_api.system_api.time.sleep", lambda _seconds: None)
+    monkeypatch.setattr(
+        "backend.deployment.network_api.transport.subprocess.run", fake_run
+    )
+    monkeypatch.setattr(
+        "backend.deployment.network_api.transport.time.sleep", lambda _seconds: None
+    )
 
     assert system.run_command("mkdir -p /tmp/blitz")
     assert len(calls) == 2
@@ -163,6 +170,110 @@ def test_system_run_command_retries_transient_ssh_auth_failure(
     assert "NumberOfPasswordPrompts=1" in calls[0]
 
 
+def make_test_system(name: str) -> System:
+    return System(
+        general_info=DiscoveredNetworkSystem(
+            hostname=f"{name}.local.",
+            system_name=name,
+            watchdog_port=5000,
+            autobahn_port=8080,
+            blitz_path=FolderPath("/opt/blitz/B.L.I.T.Z"),
+            machine_architecture="aarch64",
+            platform_description="Linux-with-glibc2.36",
+            python_major_version=3,
+            python_minor_version=11,
+        )
+    )
+
+
+class NoBundleRsyncer:
+    def deployed_bundle(self, _system: System) -> None:
+        return None
+
+
+def test_apply_reports_every_failed_system_after_trying_all(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    module = RunnableModule(
+        name="sample",
+        extra_run_args=[],
+        equivalent_run_definition=DeploymentTestProcess.SAMPLE,
+        startup=StartupPolicy(stagger_seconds=5.0, ready_timeout_seconds=60.0),
+    )
+    systems = {make_test_system(name) for name in ["agatha", "tripoli", "zurich"]}
+    applied: dict[str, float] = {}
+
+    def fake_apply(
+        system: System, _config: str, _processes: object, **kwargs: object
+    ) -> bool:
+        name = system.general_info.system_name
+        applied[name] = cast(float, kwargs["timeout_s"])
+        if name == "agatha":
+            raise TransportError("POST apply failed: timed out")
+        return name != "tripoli"
+
+    monkeypatch.setattr(System, "apply", fake_apply)
+
+    with pytest.raises(RuntimeError) as error:
+        BlitzNetworkDeployer._apply_config_and_processes(  # pyright: ignore[reportPrivateUsage]
+            systems,
+            [module],
+            lambda _names: {"agatha": [DeploymentTestProcess.SAMPLE]},
+            BlitzNetworkDeployer.Options(),
+            cast(Rsyncer, cast(object, NoBundleRsyncer())),
+        )
+
+    assert "agatha.local.: POST apply failed: timed out" in str(error.value)
+    assert "tripoli.local.: rejected by the watchdog" in str(error.value)
+    assert "zurich" not in str(error.value)
+    # Only agatha runs the module that waits on its startup policy.
+    assert applied == {"agatha": 95.0, "tripoli": 30.0, "zurich": 30.0}
+
+
+def test_system_commands_share_one_multiplexed_ssh_connection(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    discovered_system = DiscoveredNetworkSystem(
+        hostname="tripoli.local.",
+        system_name="tripoli",
+        watchdog_port=5000,
+        autobahn_port=8080,
+        blitz_path=FolderPath("/opt/blitz/B.L.I.T.Z"),
+        machine_architecture="aarch64",
+        platform_description="Linux-with-glibc2.36",
+        python_major_version=3,
+        python_minor_version=11,
+    )
+    system = System(general_info=discovered_system)
+    calls: list[list[str]] = []
+
+    def fake_run(command: list[str], **_kwargs: object):
+        calls.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout="ok\n")
+
+    monkeypatch.setattr(
+        "backend.deployment.network_api.transport.subprocess.run", fake_run
+    )
+
+    assert system.run_command("true")
+    assert system.deploy_file("bundle.zip", "/opt/blitz/B.L.I.T.Z/bundles/bundle.zip")
+
+    ssh_command = calls[0]
+    control_path = next(arg for arg in ssh_command if arg.startswith("ControlPath="))
+    assert "ControlMaster=auto" in ssh_command
+    rsync_shell = calls[-1][calls[-1].index("-e") + 1]
+    assert control_path in rsync_shell
+    assert [label for label, _ in system.command_timings] == [
+        "ssh true",
+        "ssh mkdir -p /opt/blitz/B.L.I.T.Z/bundles",
+        "rsync bundle",
+    ]
+
+    system.multiplex_ssh = False
+    assert system.run_command("true")
+    assert not any(arg.startswith("ControlPath=") for arg in calls[-1])
+
+
 def test_backend_deploy_py_is_valid_and_bundled(tmp_path: Path):
     deploy_py = REPO_ROOT / "backend" / "deploy.py"
     deploy_source = deploy_py.read_text()
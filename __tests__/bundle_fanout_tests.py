@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend.deployment.fanout import (
+    RELAY_HOP_TIMEOUT_SECONDS,
+    RelayNode,
+    plan_relay_tree,
+    relay_timeout_seconds,
+)
+from backend.deployment.misc.hashing import sha256_file
+from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.transport import SshTransport, TransportError
+from backend.deployment.network_api.utils import FilePath, FolderPath
+from backend.deployment.network_api.zeroconf import DiscoveredNetworkSystem
+from backend.deployment.rsyncer import Rsyncer
+
+
+def make_system(name: str) -> System:
+    return System(
+        general_info=DiscoveredNetworkSystem(
+            hostname=f"{name}.local",
+            system_name=name,
+            watchdog_port=5000,
+            autobahn_port=8080,
+            blitz_path=FolderPath("/opt/blitz/B.L.I.T.Z"),
+            machine_architecture="aarch64",
+            platform_description="Linux-with-glibc2.36",
+            python_major_version=3,
+            python_minor_version=11,
+            os_distribution_id="debian",
+            os_distribution_version_id="12",
+        )
+    )
+
+
+def make_nodes(count: int) -> list[RelayNode]:
+    return [
+        RelayNode(system=make_system(f"pi{i}"), remote_file_path=FilePath("b.zip"))
+        for i in range(count)
+    ]
+
+
+def tree_depth(nodes: list[RelayNode]) -> int:
+    if not nodes:
+        return 0
+    return 1 + max(tree_depth(node.children) for node in nodes)
+
+
+def test_plan_relay_tree_limits_every_hop_to_degree():
+    nodes = make_nodes(14)
+
+    roots = plan_relay_tree(nodes, degree=2)
+
+    assert roots == nodes[:2]
+    assert all(len(node.children) <= 2 for node in nodes)
+    assert tree_depth(roots) == 3
+    reached = []
+    pending = list(roots)
+    while pending:
+        node = pending.pop()
+        reached.append(node)
+        pending.extend(node.children)
+    assert sorted(id(n) for n in reached) == sorted(id(n) for n in nodes)
+
+
+def test_plan_relay_tree_rejects_non_positive_degree():
+    with pytest.raises(ValueError):
+        _ = plan_relay_tree(make_nodes(2), degree=0)
+
+
+def test_relay_timeout_grows_with_tree_depth_and_bundle_size():
+    mib = 1024 * 1024
+    shallow = plan_relay_tree(make_nodes(2), degree=2)
+    deep = plan_relay_tree(make_nodes(14), degree=2)
+
+    assert relay_timeout_seconds(0, shallow) == 2 * RELAY_HOP_TIMEOUT_SECONDS
+    assert relay_timeout_seconds(0, deep) == 4 * RELAY_HOP_TIMEOUT_SECONDS
+    # 50 MiB to two peers at once, at 1 MiB/s, on each of 4 hops.
+    assert relay_timeout_seconds(50 * mib, deep) == 4 * (
+        RELAY_HOP_TIMEOUT_SECONDS + 100
+    )
+
+
+def test_rsyncer_fan_out_uploads_once_and_falls_back_on_bad_hash(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    seed, good_peer, bad_peer = make_system("a"), make_system("b"), make_system("c")
+    rsyncer = Rsyncer(
+        modules=[],
+        local_bundler_output_path=FolderPath(str(tmp_path)),
+        backend_bundle_path=FolderPath("bundles/"),
+        systems={seed, good_peer, bad_peer},
+        fan_out_bundles=True,
+    )
+    name, zip_path = rsyncer.get_bundled_zip(seed.general_info)
+    _ = Path(zip_path).write_bytes(b"bundle")
+    expected_sha256 = sha256_file(zip_path)
+
+    uploads: list[str] = []
+    relays: list[list[dict[str, object]]] = []
+
+    def fake_deploy_file(self: System, _local: FilePath, _remote: FilePath) -> bool:
+        uploads.append(self.general_info.system_name)
+        return True
+
+    def fake_relay_file(
+        self: System,
+        _remote: FilePath,
+        sha256: str,
+        targets: list[dict[str, object]],
+        *,
+        timeout_s: float,
+    ) -> bool:
+        assert sha256 == expected_sha256
+        # One hop to both peers, plus the seed's own.
+        assert (
+            2 * RELAY_HOP_TIMEOUT_SECONDS
+            < timeout_s
+            < 2 * RELAY_HOP_TIMEOUT_SECONDS + 1
+        )
+        relays.append(targets)
+        return True
+
+    def fake_get_file_hash(self: System, _remote: FilePath) -> str | None:
+        return None if self is bad_peer else expected_sha256
+
+    monkeypatch.setattr(System, "deploy_file", fake_deploy_file)
+    monkeypatch.setattr(System, "relay_file", fake_relay_file)
+    monkeypatch.setattr(System, "get_file_hash", fake_get_file_hash)
+
+    deployed = rsyncer.fan_out_bundle_zips([seed, good_peer, bad_peer])
+
+    assert uploads == ["a", "c"]
+    assert [target["url"] for target in relays[0]] == [
+        good_peer.watchdog_url(),
+        bad_peer.watchdog_url(),
+    ]
+    assert [entry[0] for entry in deployed] == [name, name, name]
+
+
+def test_rsyncer_fan_out_uploads_directly_when_the_relay_request_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    seed, peer = make_system("a"), make_system("b")
+    rsyncer = Rsyncer(
+        modules=[],
+        local_bundler_output_path=FolderPath(str(tmp_path)),
+        backend_bundle_path=FolderPath("bundles/"),
+        systems={seed, peer},
+        fan_out_bundles=True,
+    )
+    _, zip_path = rsyncer.get_bundled_zip(seed.general_info)
+    _ = Path(zip_path).write_bytes(b"bundle")
+    uploads: list[str] = []
+
+    def fake_deploy_file(self: System, _local: FilePath, _remote: FilePath) -> bool:
+        uploads.append(self.general_info.system_name)
+        return True
+
+    def timed_out_request(self: SshTransport, method: str, route: str, **_: object):
+        raise TransportError(f"{method} {route} failed: timed out")
+
+    monkeypatch.setattr(System, "deploy_file", fake_deploy_file)
+    monkeypatch.setattr(SshTransport, "request", timed_out_request)
+
+    deployed = rsyncer.fan_out_bundle_zips([seed, peer])
+
+    assert uploads == ["a", "b"]
+    assert len(deployed) == 2
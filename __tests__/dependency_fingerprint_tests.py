@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend.deployment.module.dependency_fingerprint import (
+    FINGERPRINT_FILE_NAME,
+    DependencyFingerprint,
+)
+from backend.deployment.module.supported import SupportedModules
+from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.transport import LocalTransport
+from backend.deployment.network_api.utils import FolderPath
+from backend.deployment.processes import WeightedProcess
+from backend.deployment.rsyncer import Rsyncer
+
+
+class FingerprintTestProcess(WeightedProcess):
+    SAMPLE = "sample", 1.0
+
+
+def make_deps_folder(path: Path, numpy_wheel: str) -> DependencyFingerprint:
+    path.mkdir(parents=True)
+    _ = (path / "requirements.txt").write_text("numpy\n# comment\n")
+    _ = (path / numpy_wheel).write_bytes(numpy_wheel.encode())
+    _ = (path / "wheel-0.45.1-py3-none-any.whl").write_bytes(b"wheel")
+    fingerprint = DependencyFingerprint.from_deps_folder(FolderPath(str(path)))
+    _ = fingerprint.write(FolderPath(str(path)))
+    return fingerprint
+
+
+def make_rsyncer(root: Path) -> tuple[Rsyncer, System]:
+    transport = LocalTransport(FolderPath(str(root)))
+    system = System(
+        general_info=LocalTransport.describe_local_system(transport.root),
+        transport=transport,
+    )
+    module = SupportedModules.PythonModule(
+        name="sample",
+        extra_run_args=[],
+        equivalent_run_definition=FingerprintTestProcess.SAMPLE,
+        module_folder_path=FolderPath(str(root)),
+    )
+    rsyncer = Rsyncer(
+        modules=[module],
+        local_bundler_output_path=FolderPath(str(root / "out")),
+        backend_bundle_path=FolderPath("bundles"),
+        systems={system},
+        are_deps_bundled=True,
+    )
+    return rsyncer, system
+
+
+def test_fingerprint_reports_package_changes(tmp_path: Path):
+    old = make_deps_folder(tmp_path / "old", "numpy-1.26.4-cp312-linux_aarch64.whl")
+    new = make_deps_folder(tmp_path / "new", "numpy-2.0.0-cp312-linux_aarch64.whl")
+
+    assert new.requirements == ["numpy"]
+    written = (tmp_path / "new" / FINGERPRINT_FILE_NAME).read_bytes()
+    assert DependencyFingerprint.parse(written) == new
+    assert new.describe_changes(old) == ["~ numpy 1.26.4 -> 2.0.0"]
+    assert new.describe_changes(new) == []
+
+
+def test_install_dependencies_skips_pip_when_fingerprint_matches(tmp_path: Path):
+    root = tmp_path / "target"
+    bundled = make_deps_folder(
+        root / "backend" / "deps" / "python", "numpy-2.0.0-cp312-linux_aarch64.whl"
+    )
+    rsyncer, system = make_rsyncer(root)
+
+    # No venv exists, so running the pip install would fail.
+    with pytest.raises(RuntimeError):
+        rsyncer.install_dependencies(system)
+
+    (root / ".venv").mkdir()
+    _ = bundled.write(FolderPath(str(root / ".venv")))
+    rsyncer.install_dependencies(system)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+from backend.deployment.module.supported import SupportedModules
+from backend.deployment.network_api.transport import LocalTransport
+from backend.deployment.network_api.utils import FolderPath
+from backend.deployment.processes import WeightedProcess
+
+
+class PrecompileTestProcess(WeightedProcess):
+    SAMPLE = "sample", 1.0
+
+
+def test_post_install_command_writes_checked_hash_bytecode(tmp_path: Path):
+    venv_python = tmp_path / ".venv" / "bin" / "python"
+    venv_python.parent.mkdir(parents=True)
+    venv_python.symlink_to(sys.executable)
+    module_path = tmp_path / "backend" / "python" / "sample"
+    module_path.mkdir(parents=True)
+    _ = (module_path / "__main__.py").write_text("print('hello')\n")
+    module = SupportedModules.PythonModule(
+        name="sample",
+        extra_run_args=[],
+        equivalent_run_definition=PrecompileTestProcess.SAMPLE,
+        module_folder_path=FolderPath(str(module_path)),
+    )
+
+    command = module.get_post_install_command(
+        FolderPath(str(tmp_path)), FolderPath(str(tmp_path / "backend"))
+    )
+    assert command is not None
+    assert LocalTransport(FolderPath(str(tmp_path))).run_command(command)
+
+    pyc_path = importlib.util.cache_from_source(str(module_path / "__main__.py"))
+    with open(pyc_path, "rb") as pyc_file:
+        header = pyc_file.read(8)
+    # PEP 552: bit 0 marks hash-based pycs, bit 1 asks for the hash to be checked.
+    assert int.from_bytes(header[4:8], "little") == 0b11
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.deployment import processes
+from backend.deployment.processes import ProcessPlan, WeightedProcess
+
+
+class PlanTestProcess(WeightedProcess):
+    APRIL_SERVER = "april-server", 1.0
+    POS_EXTRAPOLATOR = "position-extrapolator", 0.5
+    OBJECT_DETECTOR = "object-detector", 2.0
+
+
+def test_weights_are_balanced_after_pins():
+    mapping = (
+        ProcessPlan[PlanTestProcess]()
+        .add(PlanTestProcess.APRIL_SERVER, count=3)
+        .add(PlanTestProcess.POS_EXTRAPOLATOR)
+        .pin(PlanTestProcess.OBJECT_DETECTOR, "PI1.local")
+        # Pins to absent Pis are ignored; the instance is still placed.
+        .pin(PlanTestProcess.OBJECT_DETECTOR, "missing-pi")
+        .assign(["pi1", "pi2"])
+    )
+
+    assert mapping == {
+        "pi1": [
+            PlanTestProcess.OBJECT_DETECTOR,
+            PlanTestProcess.APRIL_SERVER,
+            PlanTestProcess.APRIL_SERVER,
+        ],
+        "pi2": [
+            PlanTestProcess.OBJECT_DETECTOR,
+            PlanTestProcess.APRIL_SERVER,
+            PlanTestProcess.POS_EXTRAPOLATOR,
+        ],
+    }
+    assert (
+        ProcessPlan[PlanTestProcess]().add(PlanTestProcess.APRIL_SERVER).assign([])
+        == {}
+    )
+
+
+def test_capacities_are_respected_across_resources():
+    plan = (
+        ProcessPlan[PlanTestProcess]()
+        .add(PlanTestProcess.APRIL_SERVER, count=4)
+        .add(PlanTestProcess.OBJECT_DETECTOR, count=2)
+        .requires(PlanTestProcess.APRIL_SERVER, camera_ports=1, memory_mb=200)
+        .requires(PlanTestProcess.OBJECT_DETECTOR, coral_tpu=1, memory_mb=500)
+        .capacity("front", camera_ports=2, coral_tpu=0, memory_mb=1000)
+        .capacity("back", camera_ports=2, coral_tpu=1, memory_mb=1000)
+        .capacity("compute", camera_ports=0, coral_tpu=1, memory_mb=2000)
+    )
+
+    placement = plan.place(["front", "back", "compute"])
+
+    assert placement.feasible
+    assert placement.assignments["front"].count(PlanTestProcess.APRIL_SERVER) == 2
+    assert placement.assignments["back"].count(PlanTestProcess.APRIL_SERVER) == 2
+    assert placement.assignments["compute"] == [PlanTestProcess.OBJECT_DETECTOR]
+    assert placement.assignments["back"].count(PlanTestProcess.OBJECT_DETECTOR) == 1
+
+
+def test_infeasible_placement_is_reported():
+    plan = (
+        ProcessPlan[PlanTestProcess]()
+        .add(PlanTestProcess.APRIL_SERVER, count=3)
+        .pin(PlanTestProcess.OBJECT_DETECTOR, "front", count=2)
+        .requires(PlanTestProcess.APRIL_SERVER, camera_ports=1)
+        .requires(PlanTestProcess.OBJECT_DETECTOR, cpu=3)
+        .capacity("front", camera_ports=1, cpu=4)
+        .capacity("back", camera_ports=1)
+    )
+
+    placement = plan.place(["front", "back"])
+
+    assert sorted(
+        (process.get_name(), reason) for process, reason in placement.unplaced
+    ) == [
+        ("april-server", "no Pi has enough capacity left"),
+        ("object-detector", "pinned to front, which is out of capacity"),
+    ]
+    # Looked up at call time: the watchdog's lazy importer reloads the module.
+    with pytest.raises(processes.PlacementError, match="april-server"):
+        _ = plan.assign(["front", "back"])
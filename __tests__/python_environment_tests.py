@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from backend.deployment.module.dependency_fingerprint import DependencyFingerprint
+from backend.deployment.module.supported import (
+    PYTHON_ENVS_PATH,
+    SupportedModules,
+)
+from backend.deployment.network_api.transport import LocalTransport
+from backend.deployment.network_api.utils import FolderPath
+from backend.deployment.processes import WeightedProcess
+
+# Stands in for .venv/bin/python: `-m venv <path>` creates an environment whose
+# interpreter is this script again, and `-m pip install ...` succeeds.
+FAKE_PYTHON = """#!/bin/bash
+if [ "$1 $2" = "-m venv" ]; then
+    mkdir -p "$3/bin" && cp "$0" "$3/bin/python"
+fi
+"""
+
+
+class EnvironmentTestProcess(WeightedProcess):
+    SAMPLE = "sample", 1.0
+
+
+def make_target(root: Path) -> SupportedModules.PythonModule:
+    venv_python = root / ".venv" / "bin" / "python"
+    venv_python.parent.mkdir(parents=True)
+    _ = venv_python.write_text(FAKE_PYTHON)
+    venv_python.chmod(0o755)
+    (root / "backend" / "deps" / "python").mkdir(parents=True)
+    return SupportedModules.PythonModule(
+        name="sample",
+        extra_run_args=[],
+        equivalent_run_definition=EnvironmentTestProcess.SAMPLE,
+        module_folder_path=FolderPath(str(root)),
+        isolated_environments=True,
+    )
+
+
+def deploy_requirements(
+    transport: LocalTransport,
+    module: SupportedModules.PythonModule,
+    requirements: str,
+) -> str:
+    deps_path = Path(transport.root) / "backend" / "deps" / "python"
+    _ = (deps_path / "requirements.txt").write_text(requirements)
+    _ = DependencyFingerprint.from_deps_folder(FolderPath(str(deps_path))).write(
+        FolderPath(str(deps_path))
+    )
+    assert transport.run_command(
+        module.get_dependency_installation_command(
+            transport.root, FolderPath(os.path.join(transport.root, "backend"))
+        )
+    )
+    return os.readlink(os.path.join(transport.root, PYTHON_ENVS_PATH, "active"))
+
+
+def test_isolated_environments_swap_active_and_keep_previous(tmp_path: Path):
+    module = make_target(tmp_path)
+    transport = LocalTransport(FolderPath(str(tmp_path)))
+    envs_path = tmp_path / PYTHON_ENVS_PATH
+
+    first = deploy_requirements(transport, module, "numpy==1.0\n")
+    second = deploy_requirements(transport, module, "numpy==2.0\n")
+    assert first != second
+    assert os.readlink(envs_path / "previous") == first
+    assert (envs_path / second / "blitz-fingerprint.json").is_file()
+
+    # Rolling back to a known set reuses its environment.
+    assert deploy_requirements(transport, module, "numpy==1.0\n") == first
+    assert os.readlink(envs_path / "previous") == second
+
+    for version in range(3, 7):
+        _ = deploy_requirements(transport, module, f"numpy=={version}.0\n")
+    environments = [
+        name for name in os.listdir(envs_path) if name not in ("active", "previous")
+    ]
+    assert len(environments) == 4
+
+
+def test_isolated_environment_run_command_pins_resolved_environment(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    module = make_target(tmp_path)
+    assert module.get_run_command(FolderPath("backend")).startswith(".venv/bin/python")
+
+    active = deploy_requirements(
+        LocalTransport(FolderPath(str(tmp_path))), module, "numpy\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    assert module.get_run_command(FolderPath("backend")).startswith(
+        f"{tmp_path / PYTHON_ENVS_PATH / active}/bin/python -u "
+    )
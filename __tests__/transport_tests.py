@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+from backend.deployment.network_api.system_api import System
+import pytest
+
+from backend.deployment.network_api.transport import (
+    LocalTransport,
+    SshTransport,
+    StreamCompression,
+)
+from backend.deployment.network_api.utils import FilePath, FolderPath
+from backend.deployment.processes import WeightedProcess
+from watchdog import bundle_relay
+
+
+class TransportTestProcess(WeightedProcess):
+    CAMERA = "camera", 1.0
+    LOCALIZATION = "localization", 0.5
+
+
+def make_local_system(root: Path) -> System:
+    transport = LocalTransport(FolderPath(str(root)))
+    return System(
+        general_info=LocalTransport.describe_local_system(transport.root),
+        transport=transport,
+    )
+
+
+@pytest.fixture(name="system")
+def local_system(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[System]:
+    root = tmp_path / "target"
+    # The target's watchdog runs in this process; like on a Pi, it resolves
+    # bundles under BLITZ_PATH.
+    monkeypatch.setattr(bundle_relay, "BLITZ_PATH", str(root))
+    system = make_local_system(root)
+    yield system
+    system.close()
+
+
+def test_system_defaults_to_ssh_transport(tmp_path: Path):
+    system = System(
+        general_info=LocalTransport.describe_local_system(FolderPath(str(tmp_path)))
+    )
+
+    assert isinstance(system.transport, SshTransport)
+
+
+def test_local_transport_deploys_files_and_runs_commands_under_root(
+    tmp_path: Path, system: System
+):
+    local_file = tmp_path / "bundle.zip"
+    _ = local_file.write_bytes(b"bundle")
+    root = tmp_path / "target"
+
+    assert system.deploy_file(FilePath(str(local_file)), FilePath("bundles/b.zip"))
+    assert (root / "bundles" / "b.zip").read_bytes() == b"bundle"
+    assert system.run_command("test -f bundles/b.zip && touch ran")
+    assert (root / "ran").exists()
+    assert not system.run_command("false")
+    assert system.get_file_hash(FilePath("bundles/b.zip"))
+
+
+def test_local_transport_applies_watchdog_calls_in_process(
+    tmp_path: Path, system: System
+):
+    root = tmp_path / "target"
+
+    assert system.set_config("Zm9v")
+    assert system.set_processes(
+        [TransportTestProcess.CAMERA, TransportTestProcess.LOCALIZATION]
+    )
+
+    assert (root / "config" / "config.b64").read_text() == "Zm9v"
+    assert json.loads((root / "config" / "processes.json").read_text()) == {
+        "processes": ["camera", "localization"]
+    }
+    assert [label for label, _ in system.command_timings] == [
+        "GET /get/config/hash",
+        "POST /set/config/binary",
+        "POST /set/processes",
+    ]
+
+
+def test_local_transport_applies_config_and_processes_in_one_call(
+    tmp_path: Path, system: System
+):
+    root = tmp_path / "target"
+    bundle = root / "bundles" / "b.zip"
+    bundle.parent.mkdir(parents=True)
+    _ = bundle.write_bytes(b"bundle")
+    sha256 = hashlib.sha256(b"bundle").hexdigest()
+
+    assert not system.apply(
+        "Zm9v", [TransportTestProcess.CAMERA], bundle=(FilePath("bundles/b.zip"), "0")
+    )
+    assert not (root / "config" / "config.b64").exists()
+
+    assert system.apply(
+        "Zm9v",
+        [TransportTestProcess.CAMERA],
+        bundle=(FilePath("bundles/b.zip"), sha256),
+    )
+    assert (root / "config" / "config.b64").read_text() == "Zm9v"
+    assert json.loads((root / "config" / "processes.json").read_text()) == {
+        "processes": ["camera"]
+    }
+    assert [label for label, _ in system.command_timings] == [
+        "GET /get/config/hash",
+        "POST /set/config/binary",
+        "POST /apply",
+    ] * 2
+
+
+def test_config_upload_is_skipped_when_the_pi_has_it(tmp_path: Path, system: System):
+    root = tmp_path / "target"
+    config_base64 = base64.b64encode(b'{"cameras": []}' * 100).decode()
+
+    assert system.apply(config_base64, [TransportTestProcess.CAMERA])
+    assert (root / "config" / "config.b64").read_text() == config_base64
+    assert list((root / "config").glob("config.b64.staged-*")) == []
+    system.command_timings.clear()
+
+    assert system.set_config(config_base64)
+    assert system.apply(config_base64, [TransportTestProcess.LOCALIZATION])
+    assert [label for label, _ in system.command_timings] == [
+        "GET /get/config/hash",
+        "GET /get/config/hash",
+        "POST /apply",
+    ]
+    assert json.loads((root / "config" / "processes.json").read_text()) == {
+        "processes": ["localization"]
+    }
+
+
+def test_stream_compression_builds_tar_pipelines():
+    assert StreamCompression.none().pack_command("/tmp/b") == "tar -C /tmp/b -cf - ."
+    assert StreamCompression.zstd(5).pack_command("/tmp/b") == (
+        "tar -C /tmp/b -cf - . | zstd -q -T0 -5 -c"
+    )
+    assert "zstd -q -T0 -d -c |" in StreamCompression.zstd().unpack_command(
+        "/srv/backend"
+    )
+    with pytest.raises(ValueError):
+        _ = StreamCompression.zstd(0)
+
+
+def test_local_transport_streams_directory_into_place(tmp_path: Path, system: System):
+    staged = tmp_path / "staged"
+    (staged / "python").mkdir(parents=True)
+    _ = (staged / "python" / "main.py").write_text("print('hi')")
+    root = tmp_path / "target"
+
+    assert system.stream_directory(FolderPath(str(staged)), FolderPath("backend"))
+    assert (root / "backend" / "python" / "main.py").read_text() == "print('hi')"
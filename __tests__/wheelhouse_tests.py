@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from backend.deployment.compilation.util.systems import (
+    Architecture,
+    LinuxDistro,
+    PythonVersion,
+    SystemId,
+)
+from backend.deployment.module.supported import SupportedModules
+from backend.deployment.module.wheelhouse import WHEELHOUSE_ENV_VAR, Wheelhouse
+from backend.deployment.network_api.utils import FilePath, FolderPath
+from backend.deployment.processes import WeightedProcess
+
+
+class WheelhouseTestProcess(WeightedProcess):
+    SAMPLE = "sample", 1.0
+
+
+def make_system_id() -> SystemId:
+    return SystemId(
+        c_lib_version="2.39",
+        linux_distro=LinuxDistro.UBUNTU_24,
+        architecture=Architecture.ARM64,
+        python_version=PythonVersion(major=3, minor=12),
+    )
+
+
+def make_python_module(tmp_path: Path) -> SupportedModules.PythonModule:
+    return SupportedModules.PythonModule(
+        name="sample",
+        extra_run_args=[],
+        equivalent_run_definition=WheelhouseTestProcess.SAMPLE,
+        module_folder_path=FolderPath(str(tmp_path)),
+    )
+
+
+def fake_pip_download(command: Sequence[str], label: str, **_kwargs: object) -> str:
+    destination = command[list(command).index("--dest") + 1]
+    name = "setuptools-1.0-py3-none-any.whl" if "Build" in label else "numpy.whl"
+    _ = Path(destination, name).write_bytes(label.encode())
+    return ""
+
+
+def test_repeat_bundle_restores_dependencies_without_pip(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setenv(WHEELHOUSE_ENV_VAR, str(tmp_path / "wheelhouse"))
+    requirements = tmp_path / "requirements.txt"
+    _ = requirements.write_text("numpy==2.0.0\n")
+    module = make_python_module(tmp_path)
+
+    monkeypatch.setattr(
+        "backend.deployment.module.supported.run_command", fake_pip_download
+    )
+    first_deps = tmp_path / "first"
+    first_deps.mkdir()
+    module.assemble_dependencies(
+        FolderPath(str(first_deps)), make_system_id(), FilePath(str(requirements))
+    )
+
+    def fail_pip(*_args: object, **_kwargs: object) -> str:
+        pytest.fail("pip should not run for an unchanged requirements file")
+
+    monkeypatch.setattr("backend.deployment.module.supported.run_command", fail_pip)
+    second_deps = tmp_path / "second"
+    second_deps.mkdir()
+    module.assemble_dependencies(
+        FolderPath(str(second_deps)), make_system_id(), FilePath(str(requirements))
+    )
+
+    assert sorted(os.listdir(second_deps)) == sorted(os.listdir(first_deps))
+    assert (second_deps / "numpy.whl").stat().st_nlink > 1
+
+
+def test_wheelhouse_misses_when_cached_artifact_is_missing(tmp_path: Path):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    _ = (downloads / "pkg.tar.gz").write_bytes(b"sdist")
+    wheelhouse = Wheelhouse(FolderPath(str(tmp_path / "wheelhouse")), "target")
+
+    wheelhouse.record(
+        "abc",
+        FolderPath(str(downloads)),
+        ["pkg.tar.gz"],
+        wheels=[],
+        sdists=["pkg"],
+    )
+    assert wheelhouse.known_sdists() == {"pkg"}
+    assert wheelhouse.restore("abc", FolderPath(str(tmp_path / "restored")))
+
+    os.unlink(os.path.join(wheelhouse.files_path, "pkg.tar.gz"))
+    assert not wheelhouse.restore("abc", FolderPath(str(tmp_path / "again")))
@@ -34,6 +34,7 @@ class CodeBundler:
         bundle_name: str = "backend-bundle",
         bundle_dependencies: bool = False,
         additional_files: list[FilePath] | None = None,
+        create_archive: bool = True,
     ):
         self.modules: list[Module] = modules
         self.backend_local_path: FolderPath = backend_local_path
@@ -47,10 +48,17 @@ class CodeBundler:
             FilePath(os.path.join(backend_local_path, "deploy.py"))
         } | set(additional_files or [])
         self.installed_deps_lang_names: set[str] = set()
+        self.create_archive: bool = create_archive
 
     # build/backend-bundle/backend-bundle-<system_id>/<language>/<module_name>
     # build/backend-bundle/backend-bundle-<system_id>/link/*.so
     def bundle(self) -> FilePath:
+        """
+        Stages the bundle and zips it into the output folder.
+
+        With `create_archive=False` the zip step is skipped and the staged
+        bundle folder is returned instead, for transfers that stream it.
+        """
         os.makedirs(self.build_folder_path, exist_ok=True)
         os.makedirs(self.output_folder_path, exist_ok=True)
 
@@ -101,6 +109,9 @@ class CodeBundler:
                 build_path,
             )
 
+        if not self.create_archive:
+            return FilePath(build_path)
+
         archive_base_path = FilePath(
             os.path.join(self.output_folder_path, self.full_bundle_name)
         )
@@ -1,24 +1,36 @@
 from __future__ import annotations
 
 from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
+import os
 from pathlib import Path
 import subprocess
 
 from backend.deployment.bundler import CodeBundler
 from backend.deployment.compilation.util.systems import SystemId
-from backend.deployment.module.base import Module
+from backend.deployment.fanout import DEFAULT_FAN_OUT_DEGREE
+from backend.deployment.module.base import Module, RunnableModule
 from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.transport import (
+    StreamCompression,
+    Transport,
+    TransportError,
+)
 from backend.deployment.network_api.utils import FolderPath
 from backend.deployment.network_api.zeroconf import (
+    DiscoveredNetworkSystem,
     discover_all_on_network,
 )
 from backend.deployment.processes import WeightedProcess, normalize_pi_name
-from backend.deployment.rsyncer import Rsyncer
-
+from backend.deployment.rsyncer import Rsyncer, TransferMode
 
 ProcessMapper = Callable[..., Mapping[str, Sequence[WeightedProcess]]]
+TransportFactory = Callable[[DiscoveredNetworkSystem], Transport]
+
+# How long an /apply may take before any process waits on a startup policy.
+BASE_APPLY_TIMEOUT_SECONDS = 30.0
 
 
 class PresetConfigSuppliers(Enum):
@@ -45,9 +57,12 @@ class BlitzNetworkDeployer:
         if config is None:
             config = BlitzNetworkDeployer.Options().build()
 
-        discovered_systems = discover_all_on_network(
-            timeout_seconds=config.discovery_timeout,
-        )
+        if config.discovered_systems is not None:
+            discovered_systems = set(config.discovered_systems)
+        else:
+            discovered_systems = discover_all_on_network(
+                timeout_seconds=config.discovery_timeout,
+            )
 
         print("--------------------------------")
         print("Discovered systems:")
@@ -55,7 +70,17 @@ class BlitzNetworkDeployer:
             print(system)
             print()
 
-        systems = {System(general_info=discovered) for discovered in discovered_systems}
+        systems = {
+            System(
+                general_info=discovered,
+                transport=(
+                    config.transport_factory(discovered)
+                    if config.transport_factory is not None
+                    else None
+                ),
+            )
+            for discovered in discovered_systems
+        }
 
         system_ids = BlitzNetworkDeployer._unique_system_ids(systems)
 
@@ -75,39 +100,116 @@ class BlitzNetworkDeployer:
                 bundle_name=config.bundle_name,
                 bundle_dependencies=config.bundle_dependencies,
                 additional_files=[],
+                create_archive=config.transfer_mode is TransferMode.ZIP,
             ).bundle()
 
-        Rsyncer(
-            modules=modules,
-            local_bundler_output_path=config.output_folder_path,
-            backend_bundle_path=config.remote_bundle_path,
-            systems=systems,
-            system_host_to_pass_user=config.host_to_pass_user_mapper,
-            are_deps_bundled=config.bundle_dependencies,
-        ).deploy()
+        try:
+            rsyncer = Rsyncer(
+                modules=modules,
+                local_bundler_output_path=config.output_folder_path,
+                backend_bundle_path=config.remote_bundle_path,
+                systems=systems,
+                system_host_to_pass_user=config.host_to_pass_user_mapper,
+                are_deps_bundled=config.bundle_dependencies,
+                fan_out_bundles=config.fan_out_bundles,
+                fan_out_degree=config.fan_out_degree,
+                transfer_mode=config.transfer_mode,
+                stream_compression=config.stream_compression,
+                local_bundle_staging_path=FolderPath(
+                    os.path.join(config.build_folder_path, config.bundle_name)
+                ),
+            )
+            rsyncer.deploy()
+
+            BlitzNetworkDeployer._apply_config_and_processes(
+                systems, modules, mapper, config, rsyncer
+            )
+        finally:
+            print("--------------------------------")
+            print("Remote command latency:")
+            for system in sorted(systems, key=BlitzNetworkDeployer._system_label):
+                print(system.command_latency_summary())
+                system.close()
+
+    @staticmethod
+    def _apply_config_and_processes(
+        systems: set[System],
+        modules: list[Module],
+        mapper: ProcessMapper,
+        config: BlitzNetworkDeployer.Options,
+        rsyncer: Rsyncer,
+    ) -> None:
+        """
+        Applies the config and process list to every system at once; each
+        system restarts its processes in one wave. A system that fails
+        doesn't stop the others; all failures are reported together.
+        """
 
         process_mapping = mapper(
             [system.general_info.system_name for system in systems]
         )
-        for system in sorted(systems, key=BlitzNetworkDeployer._system_label):
+        config_base64 = config.base64_supplier()
+
+        def apply(system: System) -> str | None:
             pi_name = normalize_pi_name(system.general_info.system_name)
             processes = process_mapping.get(
                 pi_name,
                 process_mapping.get(system.general_info.system_name, ()),
             )
-
-            successfully_set_config = system.set_config(config.base64_supplier())
-            if not successfully_set_config:
-                raise RuntimeError(
-                    f"Failed to set config on {system.general_info.hostname}"
+            timeout_s = config.apply_timeout
+            if timeout_s is None:
+                timeout_s = BlitzNetworkDeployer._apply_timeout(modules, processes)
+            print(f"Applying processes on {system.general_info.hostname}: {processes}")
+            try:
+                applied = system.apply(
+                    config_base64,
+                    processes,
+                    bundle=rsyncer.deployed_bundle(system),
+                    timeout_s=timeout_s,
                 )
+            except (TransportError, RuntimeError) as e:
+                return str(e)
+            return None if applied else "rejected by the watchdog"
+
+        ordered_systems = sorted(systems, key=BlitzNetworkDeployer._system_label)
+        if not ordered_systems:
+            return
+        with ThreadPoolExecutor(max_workers=len(ordered_systems)) as executor:
+            errors = list(executor.map(apply, ordered_systems))
+
+        failed = [
+            f"{system.general_info.hostname}: {error}"
+            for system, error in zip(ordered_systems, errors)
+            if error is not None
+        ]
+        if failed:
+            raise RuntimeError(
+                "Failed to apply config and processes on " + "; ".join(failed)
+            )
 
-            print(f"Setting processes on {system.general_info.hostname}: {processes}")
-            successfully_set_processes = system.set_processes(processes)
-            if not successfully_set_processes:
-                raise RuntimeError(
-                    f"Failed to set processes on {system.general_info.hostname}"
+    @staticmethod
+    def _apply_timeout(
+        modules: list[Module], processes: Sequence[WeightedProcess]
+    ) -> float:
+        """
+        Time an /apply of `processes` may take: the watchdog answers once its
+        restart wave is done, and in the worst case every process with a
+        startup policy is staggered and then waited on until it times out.
+        """
+
+        names = {process.get_name() for process in processes}
+        timeout_s = BASE_APPLY_TIMEOUT_SECONDS
+        for module in modules:
+            if (
+                isinstance(module, RunnableModule)
+                and module.startup is not None
+                and module.equivalent_run_definition.get_name() in names
+            ):
+                timeout_s += (
+                    module.startup.stagger_seconds
+                    + module.startup.ready_timeout_seconds
                 )
+        return timeout_s
 
     @staticmethod
     def _unique_system_ids(systems: set[System]) -> list[SystemId]:
@@ -135,10 +237,19 @@ class BlitzNetworkDeployer:
         remote_bundle_path: FolderPath = FolderPath("bundles/")
         discovery_timeout: float = 5.0
         bundle_dependencies: bool = False
+        fan_out_bundles: bool = False
+        fan_out_degree: int = DEFAULT_FAN_OUT_DEGREE
+        transfer_mode: TransferMode = TransferMode.ZIP
+        stream_compression: StreamCompression = field(
+            default_factory=StreamCompression.none
+        )
         host_to_pass_user_mapper: dict[str, tuple[str, str]] = field(
             default_factory=dict
         )
         base64_supplier: Callable[[], str] = field(default_factory=lambda: lambda: "")
+        transport_factory: TransportFactory | None = None
+        discovered_systems: list[DiscoveredNetworkSystem] | None = None
+        apply_timeout: float | None = None
 
         def set_host_to_pass_user_mapper(
             self,
@@ -169,6 +280,17 @@ class BlitzNetworkDeployer:
             self.discovery_timeout = timeout
             return self
 
+        def set_apply_timeout(
+            self,
+            timeout: float | None,
+        ) -> "BlitzNetworkDeployer.Options":
+            """
+            How long each system may take to apply the config and restart its
+            processes. None derives it from the modules' startup policies.
+            """
+            self.apply_timeout = timeout
+            return self
+
         def set_config_supplier(
             self,
             base64_supplier: Callable[[], str] | PresetConfigSuppliers,
@@ -186,6 +308,55 @@ class BlitzNetworkDeployer:
             self.bundle_dependencies = dependencies
             return self
 
+        def should_fan_out_bundles(
+            self,
+            fan_out: bool,
+            degree: int = DEFAULT_FAN_OUT_DEGREE,
+        ) -> "BlitzNetworkDeployer.Options":
+            """
+            Uploads each bundle once per SystemId and lets the Pis relay it to
+            their peers over the robot network, `degree` peers per relay hop.
+            """
+            self.fan_out_bundles = fan_out
+            self.fan_out_degree = degree
+            return self
+
+        def set_transfer_mode(
+            self,
+            mode: TransferMode,
+            compression: StreamCompression | None = None,
+        ) -> "BlitzNetworkDeployer.Options":
+            """
+            TransferMode.STREAMED_TAR pipes the staged bundle into `tar -x` on
+            each target. Use StreamCompression.none() on wired links and
+            StreamCompression.zstd(level) on slow Wi-Fi.
+            """
+            self.transfer_mode = mode
+            if compression is not None:
+                self.stream_compression = compression
+            return self
+
+        def set_transport_factory(
+            self,
+            factory: TransportFactory | None,
+        ) -> "BlitzNetworkDeployer.Options":
+            """
+            Chooses how each discovered system is reached. None keeps the
+            default SSH/rsync transport.
+            """
+            self.transport_factory = factory
+            return self
+
+        def set_discovered_systems(
+            self,
+            systems: list[DiscoveredNetworkSystem] | None,
+        ) -> "BlitzNetworkDeployer.Options":
+            """
+            Deploys to these systems instead of running zeroconf discovery.
+            """
+            self.discovered_systems = None if systems is None else list(systems)
+            return self
+
         def set_build_folder_path(
             self,
             path: FolderPath,
@@ -211,6 +382,12 @@ class BlitzNetworkDeployer:
             self,
             path: FolderPath,
         ) -> "BlitzNetworkDeployer.Options":
+            """
+            Where bundle archives are uploaded, relative to the BLITZ path.
+            Watchdogs only relay and check archives under bundles/, so
+            elsewhere fan-out falls back to direct uploads and /apply skips
+            the bundle check.
+            """
             self.remote_bundle_path = path
             return self
 
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.utils import FilePath
+
+DEFAULT_FAN_OUT_DEGREE = 2
+# Matches the watchdog's relay: every hop gets this long plus the time to
+# upload the bundle to all of its children at once over a slow Wi-Fi link.
+RELAY_HOP_TIMEOUT_SECONDS = 30.0
+RELAY_MIN_BYTES_PER_SECOND = 1024 * 1024
+
+
+@dataclass
+class RelayNode:
+    """
+    One peer in a bundle relay tree.
+
+    The seed Pi pushes the bundle to each of its `children`, and every child
+    then forwards it to its own children through its watchdog.
+    """
+
+    system: System
+    remote_file_path: FilePath
+    children: list["RelayNode"] = field(default_factory=list)
+
+    def to_relay_target(self) -> dict[str, object]:
+        return {
+            "url": self.system.watchdog_url(),
+            "path": self.remote_file_path,
+            "children": [child.to_relay_target() for child in self.children],
+        }
+
+
+def relay_timeout_seconds(size_bytes: int, roots: Sequence[RelayNode]) -> float:
+    """
+    How long the seed may take to relay `size_bytes` through the tree under
+    `roots`, one hop per level plus one for the seed to check its copy.
+    """
+
+    def shape(nodes: Sequence[RelayNode]) -> tuple[int, int]:
+        depth, fan_out = 0, len(nodes)
+        for node in nodes:
+            child_depth, child_fan_out = shape(node.children)
+            depth, fan_out = max(depth, child_depth), max(fan_out, child_fan_out)
+        return (depth + 1 if nodes else 0), fan_out
+
+    depth, fan_out = shape(roots)
+    hop_timeout = (
+        RELAY_HOP_TIMEOUT_SECONDS + size_bytes * fan_out / RELAY_MIN_BYTES_PER_SECOND
+    )
+    return (depth + 1) * hop_timeout
+
+
+def plan_relay_tree(
+    peers: Sequence[RelayNode],
+    degree: int = DEFAULT_FAN_OUT_DEGREE,
+) -> list[RelayNode]:
+    """
+    Arranges `peers` into a breadth-first tree rooted at the seed.
+
+    Returns the seed's direct children. Every node, the seed included, relays
+    to at most `degree` peers, so upload depth grows with log(len(peers)).
+    """
+
+    if degree <= 0:
+        raise ValueError(f"Fan-out degree must be positive, got {degree}")
+
+    for peer in peers:
+        peer.children = []
+
+    roots = list(peers[:degree])
+    parents: deque[RelayNode] = deque(roots)
+    for peer in peers[degree:]:
+        parent = parents[0]
+        parent.children.append(peer)
+        parents.append(peer)
+        if len(parent.children) >= degree:
+            _ = parents.popleft()
+
+    return roots
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import re
 import os
@@ -14,6 +14,88 @@ class VerificationResult(Enum):
     SUCCESS = "success"
 
 
+@dataclass
+class ResourceProfile:
+    """
+    Scheduling and limits the watchdog applies to a module's process when it
+    starts it. Unset fields leave the default in place.
+    """
+
+    # CPU indices the process may run on, e.g. [2, 3] to dedicate two cores.
+    cpus: list[int] | None = None
+    # Nice level, -20 (highest priority) to 19.
+    nice: int | None = None
+    # cgroup v2 limits: CPU time in cores (1.5 -> "150000 100000" in cpu.max)
+    # and memory in MiB (memory.max).
+    cpu_max: float | None = None
+    memory_max_mb: int | None = None
+    # SCHED_FIFO priority (1-99), only applied if the watchdog is permitted.
+    realtime_priority: int | None = None
+
+
+class LivenessMode(Enum):
+    # The module calls watchdog.ext.managed_process.heartbeat().
+    HEARTBEAT = "heartbeat"
+    # Any line the module prints counts as progress.
+    STDOUT = "stdout"
+    # The module (with its children) keeps using CPU time.
+    CPU_TIME = "cpu_time"
+
+
+@dataclass
+class LivenessCheck:
+    """
+    How the watchdog tells a running module from a hung one. A module that
+    shows no progress for `timeout_seconds` is restarted.
+    """
+
+    mode: LivenessMode = LivenessMode.HEARTBEAT
+    timeout_seconds: float = 5.0
+    # Time allowed after a start before the first progress is expected.
+    startup_grace_seconds: float = 30.0
+    # CPU_TIME only: CPU seconds that count as progress.
+    min_cpu_seconds: float = 0.05
+
+
+@dataclass
+class MemoryBudget:
+    """
+    RSS limit for a module (with its children). The watchdog fits a growth
+    trend to the module's RSS and warns when the budget will be exceeded
+    within `warn_horizon_seconds`.
+    """
+
+    max_rss_mb: int
+    # Sliding window the growth trend is fitted over.
+    window_seconds: float = 300.0
+    warn_horizon_seconds: float = 120.0
+    # Restart the module at a safe moment: as soon as a hot standby can take
+    # over, otherwise once the budget is actually exceeded.
+    restart: bool = False
+
+
+@dataclass
+class StartupPolicy:
+    """
+    How the watchdog orders a module when it restores the processes it ran
+    before a restart. Modules without a policy start right away.
+    """
+
+    # Modules with a lower priority start first; the next priority starts
+    # once they are all ready.
+    priority: int = 0
+    # Names of the run definitions that have to be ready before this starts.
+    depends_on: list[str] = field(default_factory=list)
+    # Minimum time between the previous launch and this one, to spread out
+    # heavy initialization (e.g. cameras on a shared USB bus).
+    stagger_seconds: float = 0.0
+    # Modules with a HEARTBEAT or STDOUT liveness check are ready on their
+    # first progress; others once they have been alive this long.
+    ready_after_seconds: float = 0.0
+    # Dependents stop waiting after this long, ready or not.
+    ready_timeout_seconds: float = 30.0
+
+
 @dataclass
 class Module:
     name: str
@@ -34,6 +116,15 @@ class Module:
             os.path.join(bundle_path, self.get_language_name(), self.name)
         )
 
+    def get_post_install_command(
+        self, _blitz_path: FolderPath, _bundle_path: FolderPath
+    ) -> str | None:
+        """
+        Command run on the target once the bundle and its dependencies are in
+        place, e.g. to warm caches before the watchdog starts the module.
+        """
+        return None
+
 
 @dataclass
 class CompilableModule(Module):
@@ -55,6 +146,18 @@ class CompilableModule(Module):
 class RunnableModule(Module):
     extra_run_args: list[tuple[str, str]]
     equivalent_run_definition: WeightedProcess
+    # Keep a second instance parked on the Pi that takes over the moment the
+    # active one dies. The module must call
+    # watchdog.ext.managed_process.wait_until_promoted() before doing any work.
+    hot_standby: bool = field(default=False, kw_only=True)
+    resources: ResourceProfile | None = field(default=None, kw_only=True)
+    liveness: LivenessCheck | None = field(default=None, kw_only=True)
+    memory_budget: MemoryBudget | None = field(default=None, kw_only=True)
+    startup: StartupPolicy | None = field(default=None, kw_only=True)
+    # Tell running instances about a new config instead of restarting them.
+    # The module must read it with watchdog.ext.managed_process.ConfigCache and
+    # reload when ConfigCache.wait_for_update() returns True.
+    live_config: bool = field(default=False, kw_only=True)
 
     def get_run_command(self, _bundle_path: FolderPath) -> str:
         raise NotImplementedError(
@@ -95,3 +198,13 @@ class DependencyInstallation:
         raise NotImplementedError(
             f"{type(self).__name__} should implement get_dependency_installation_command()"
         )
+
+    def get_dependency_fingerprint_paths(
+        self, blitz_path: FolderPath, bundle_path: FolderPath
+    ) -> tuple[FilePath, FilePath] | None:
+        """
+        Target paths of the bundled dependency fingerprint and of the one
+        recorded by the last successful install. When both match, the deploy
+        skips the installation command. None means always install.
+        """
+        return None
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import os
+import re
+
+from backend.deployment.misc.hashing import sha256_file
+from backend.deployment.network_api.utils import FilePath, FolderPath
+
+FINGERPRINT_FILE_NAME = "blitz-fingerprint.json"
+FINGERPRINT_VERSION = 1
+# Bundled artifacts are named <name>-<version>-... (wheels) or
+# <name>-<version>.tar.gz/.zip (sdists).
+_ARTIFACT_NAME_PATTERN = re.compile(
+    r"^(?P<name>[A-Za-z0-9_.]+?)-(?P<version>\d[^-]*?)(?:-|\.tar\.gz$|\.zip$)"
+)
+
+
+@dataclass
+class DependencyFingerprint:
+    """
+    Identifies a set of bundled dependencies: the requirement lines plus the
+    sha256 of every artifact in the deps folder.
+    """
+
+    requirements: list[str] = field(default_factory=list)
+    artifacts: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_deps_folder(cls, deps_path: FolderPath) -> "DependencyFingerprint":
+        requirements: list[str] = []
+        requirements_path = os.path.join(deps_path, "requirements.txt")
+        if os.path.isfile(requirements_path):
+            with open(requirements_path) as requirements_file:
+                requirements = [
+                    line.strip()
+                    for line in requirements_file
+                    if line.strip() and not line.strip().startswith("#")
+                ]
+
+        artifacts: dict[str, str] = {}
+        for name in sorted(os.listdir(deps_path)):
+            path = os.path.join(deps_path, name)
+            if name in (FINGERPRINT_FILE_NAME, "requirements.txt"):
+                continue
+            if os.path.isfile(path):
+                artifacts[name] = sha256_file(path)
+        return cls(requirements=requirements, artifacts=artifacts)
+
+    @classmethod
+    def parse(cls, raw: bytes | None) -> "DependencyFingerprint | None":
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or data.get("version") != FINGERPRINT_VERSION:
+            return None
+
+        requirements = data.get("requirements")
+        artifacts = data.get("artifacts")
+        if not isinstance(requirements, list) or not isinstance(artifacts, dict):
+            return None
+        return cls(
+            requirements=[str(r) for r in requirements],
+            artifacts={str(k): str(v) for k, v in artifacts.items()},
+        )
+
+    def write(self, deps_path: FolderPath) -> FilePath:
+        path = FilePath(os.path.join(deps_path, FINGERPRINT_FILE_NAME))
+        with open(path, "w") as fingerprint_file:
+            json.dump(self.to_json(), fingerprint_file, indent=2, sort_keys=True)
+        return path
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "version": FINGERPRINT_VERSION,
+            "requirements": self.requirements,
+            "artifacts": self.artifacts,
+        }
+
+    def describe_changes(self, installed: "DependencyFingerprint | None") -> list[str]:
+        """
+        Human readable package changes going from `installed` to this set.
+        """
+
+        if installed is None:
+            return ["no dependency fingerprint installed yet"]
+
+        old_packages = _packages_by_name(installed.artifacts)
+        new_packages = _packages_by_name(self.artifacts)
+        changes: list[str] = []
+        for name in sorted(old_packages.keys() | new_packages.keys()):
+            old = old_packages.get(name)
+            new = new_packages.get(name)
+            if old == new:
+                continue
+            if new is None:
+                changes.append(f"- {name} {old[0] if old else ''}".rstrip())
+            elif old is None:
+                changes.append(f"+ {name} {new[0]}".rstrip())
+            elif old[0] != new[0]:
+                changes.append(f"~ {name} {old[0]} -> {new[0]}")
+            else:
+                changes.append(f"~ {name} {new[0]} (artifact changed)")
+
+        for requirement in sorted(set(self.requirements) ^ set(installed.requirements)):
+            prefix = "+" if requirement in self.requirements else "-"
+            changes.append(f"{prefix} requirement {requirement}")
+        return changes
+
+
+def _packages_by_name(artifacts: dict[str, str]) -> dict[str, tuple[str, str]]:
+    """
+    Maps normalized package names to (version, artifact hash).
+    """
+
+    packages: dict[str, tuple[str, str]] = {}
+    for file_name, sha256 in artifacts.items():
+        match = _ARTIFACT_NAME_PATTERN.match(file_name)
+        if match is None:
+            packages[file_name] = ("", sha256)
+            continue
+        name = re.sub(r"[-_.]+", "-", match.group("name")).lower()
+        packages[name] = (match.group("version"), sha256)
+    return packages
@@ -1,10 +1,12 @@
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import os
 import posixpath
 
 import shlex
 import shutil
 import subprocess
+import tempfile
 from backend.deployment.compilation.cpp.cpp import CPlusPlus
 from backend.deployment.compilation.util.commands import run_command
 from backend.deployment.compilation.util.cpp_build import CPPBuildConfig
@@ -20,10 +22,24 @@ from backend.deployment.module.base import (
     RunnableModule,
     VerificationResult,
 )
+from backend.deployment.module.dependency_fingerprint import (
+    FINGERPRINT_FILE_NAME,
+    DependencyFingerprint,
+)
+from backend.deployment.module.wheelhouse import Wheelhouse
 from backend.deployment.network_api.utils import FilePath, FolderPath
 
 VENV_PATH = FilePath(".venv/bin/python")
+VENV_FINGERPRINT_PATH = FilePath(f".venv/{FINGERPRINT_FILE_NAME}")
+# Isolated dependency environments live in envs/python/<fingerprint hash>;
+# `active` points at the one new processes start with, `previous` at the one it
+# replaced.
+PYTHON_ENVS_PATH = FolderPath("envs/python")
+ACTIVE_PYTHON_ENV = "active"
+PREVIOUS_PYTHON_ENV = "previous"
+KEPT_INACTIVE_PYTHON_ENVS = 2
 PYTHON_BUILD_REQUIREMENTS = ("setuptools", "wheel")
+MAX_CONCURRENT_WHEEL_PROBES = 8
 
 
 @dataclass
@@ -142,6 +158,19 @@ class RustModule(CompilableModule, RunnableModule):
 @dataclass
 class PythonModule(RunnableModule, DependencyInstallation):
     module_folder_path: FolderPath
+    # Reuse downloads across bundles through the persistent wheelhouse
+    # (~/.cache/blitz/wheelhouse, or $BLITZ_WHEELHOUSE).
+    use_wheelhouse: bool = field(default=True, kw_only=True)
+    # Install dependencies into a fresh environment per requirements
+    # fingerprint and switch to it atomically, instead of upgrading .venv in
+    # place under running processes.
+    isolated_environments: bool = field(default=False, kw_only=True)
+    # Start (and restart) the module by forking a zygote process that has
+    # already imported `preload_modules`, instead of a fresh interpreter.
+    # Preload third-party libraries only; the module's own code is loaded by
+    # each child so it picks up new bundles.
+    use_zygote: bool = field(default=False, kw_only=True)
+    preload_modules: list[str] = field(default_factory=list, kw_only=True)
 
     def get_language_name(self) -> str:
         return "python"
@@ -196,6 +225,33 @@ class PythonModule(RunnableModule, DependencyInstallation):
         for platform in platforms:
             cmd.extend(["--platform", platform])
 
+        wheelhouse = (
+            Wheelhouse.for_target(py_tag, abi_tag, platforms)
+            if self.use_wheelhouse
+            else None
+        )
+        requirements_hash = ""
+        if wheelhouse is not None:
+            requirements_hash = wheelhouse.requirements_hash(
+                requirements_path, PYTHON_BUILD_REQUIREMENTS
+            )
+            if wheelhouse.restore(requirements_hash, result_path):
+                print(
+                    "Reused Python dependencies from wheelhouse "
+                    f"{wheelhouse.target_key}."
+                )
+                shutil.copy(
+                    requirements_path, os.path.join(result_path, "requirements.txt")
+                )
+                _ = DependencyFingerprint.from_deps_folder(result_path).write(
+                    result_path
+                )
+                return
+            cmd.extend(wheelhouse.find_links_args())
+
+        existing_files = set(os.listdir(result_path))
+        _, requirements = self._read_downloadable_requirements(requirements_path)
+        wheel_requirements, source_requirements = requirements, []
         try:
             _ = run_command(
                 cmd,
@@ -211,16 +267,30 @@ class PythonModule(RunnableModule, DependencyInstallation):
                 "Some Python dependencies do not have target wheels; "
                 "checking requirements individually."
             )
-            self._download_mixed_binary_and_source_dependencies(
-                result_path,
-                requirements_path,
-                platforms,
-                py_tag,
-                abi_tag,
+            wheel_requirements, source_requirements = (
+                self._download_mixed_binary_and_source_dependencies(
+                    result_path,
+                    requirements_path,
+                    platforms,
+                    py_tag,
+                    abi_tag,
+                    wheelhouse,
+                )
             )
 
         self._download_build_requirements(result_path)
+
+        if wheelhouse is not None:
+            wheelhouse.record(
+                requirements_hash,
+                result_path,
+                sorted(set(os.listdir(result_path)) - existing_files),
+                wheels=wheel_requirements,
+                sdists=source_requirements,
+            )
         shutil.copy(requirements_path, os.path.join(result_path, "requirements.txt"))
+        # Lets the deploy skip the target-side install when nothing changed.
+        _ = DependencyFingerprint.from_deps_folder(result_path).write(result_path)
 
     def _download_mixed_binary_and_source_dependencies(
         self,
@@ -229,30 +299,49 @@ class PythonModule(RunnableModule, DependencyInstallation):
         platforms: list[str],
         py_tag: str,
         abi_tag: str,
-    ) -> None:
+        wheelhouse: Wheelhouse | None = None,
+    ) -> tuple[list[str], list[str]]:
         # First try each top-level requirement as a target-compatible wheel. Only
         # requirements that fail that probe are sent to the source download pass,
         # preventing wheel-capable packages from being bundled for manual builds.
+        # Requirements the wheelhouse already knows need sdists skip the probe,
+        # and the remaining probes run concurrently.
         index_args, requirements = self._read_downloadable_requirements(
             requirements_path
         )
-        source_requirements: list[str] = []
-        for requirement in requirements:
-            if not self._download_binary_requirement(
-                result_path,
-                requirement,
-                index_args,
-                platforms,
-                py_tag,
-                abi_tag,
-            ):
-                print(
-                    f"No compatible target wheel for {requirement}; "
-                    "will bundle source archive."
+        known_sdists = wheelhouse.known_sdists() if wheelhouse is not None else set()
+        if wheelhouse is not None:
+            index_args = [*index_args, *wheelhouse.find_links_args()]
+
+        source_requirements = [r for r in requirements if r in known_sdists]
+        probed_requirements = [r for r in requirements if r not in known_sdists]
+        wheel_requirements: list[str] = []
+        if probed_requirements:
+            max_workers = min(MAX_CONCURRENT_WHEEL_PROBES, len(probed_requirements))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                probe_results = list(
+                    executor.map(
+                        lambda requirement: self._download_binary_requirement(
+                            result_path,
+                            requirement,
+                            index_args,
+                            platforms,
+                            py_tag,
+                            abi_tag,
+                        ),
+                        probed_requirements,
+                    )
                 )
-                source_requirements.append(requirement)
-            else:
-                print(f"Bundled target wheel for {requirement}.")
+            for requirement, has_wheel in zip(probed_requirements, probe_results):
+                if has_wheel:
+                    print(f"Bundled target wheel for {requirement}.")
+                    wheel_requirements.append(requirement)
+                else:
+                    print(
+                        f"No compatible target wheel for {requirement}; "
+                        "will bundle source archive."
+                    )
+                    source_requirements.append(requirement)
 
         if source_requirements:
             self._download_source_requirements(
@@ -261,6 +350,8 @@ class PythonModule(RunnableModule, DependencyInstallation):
                 source_requirements,
             )
 
+        return wheel_requirements, source_requirements
+
     def _download_binary_requirement(
         self,
         result_path: FolderPath,
@@ -272,7 +363,10 @@ class PythonModule(RunnableModule, DependencyInstallation):
     ) -> bool:
         # This is the same target-wheel constraint as the original bulk command,
         # but scoped to one top-level requirement so a single missing wheel does
-        # not force the whole requirements file down the source path.
+        # not force the whole requirements file down the source path. Probes run
+        # concurrently, so each downloads into its own directory and only
+        # successful downloads are moved into result_path.
+        probe_path = tempfile.mkdtemp(prefix="blitz-wheel-probe-")
         cmd = [
             "python",
             "-m",
@@ -281,7 +375,7 @@ class PythonModule(RunnableModule, DependencyInstallation):
             *index_args,
             requirement,
             "--dest",
-            result_path,
+            probe_path,
             "--only-binary=:all:",
             "--implementation",
             "cp",
@@ -293,15 +387,24 @@ class PythonModule(RunnableModule, DependencyInstallation):
         for platform in platforms:
             cmd.extend(["--platform", platform])
 
-        return (
-            subprocess.run(
-                cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=False,
-            ).returncode
-            == 0
-        )
+        try:
+            succeeded = (
+                subprocess.run(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=False,
+                ).returncode
+                == 0
+            )
+            if succeeded:
+                for name in os.listdir(probe_path):
+                    destination = os.path.join(result_path, name)
+                    if not os.path.exists(destination):
+                        _ = shutil.move(os.path.join(probe_path, name), destination)
+            return succeeded
+        finally:
+            shutil.rmtree(probe_path, ignore_errors=True)
 
     def _download_source_requirements(
         self,
@@ -382,27 +485,134 @@ class PythonModule(RunnableModule, DependencyInstallation):
     def get_dependency_installation_command(
         self, blitz_path: FolderPath, bundle_path: FolderPath
     ) -> str:
-        venv_python = shlex.quote(posixpath.join(blitz_path, VENV_PATH))
         deps_dir = posixpath.join(bundle_path, "deps", self.get_language_name())
+        if self.isolated_environments:
+            return self._get_isolated_environment_installation_command(
+                blitz_path, deps_dir
+            )
+
+        venv_python = shlex.quote(posixpath.join(blitz_path, VENV_PATH))
         quoted_deps_dir = shlex.quote(deps_dir)
         requirements_path = shlex.quote(posixpath.join(deps_dir, "requirements.txt"))
+        bundled_fingerprint, installed_fingerprint = (
+            shlex.quote(path)
+            for path in self.get_dependency_fingerprint_paths(blitz_path, bundle_path)
+        )
         # Install from requirements.txt against the bundled find-links directory.
         # This lets pip choose bundled wheels when present and build bundled
-        # source archives on the target when no wheel exists.
+        # source archives on the target when no wheel exists. The fingerprint
+        # is recorded in the venv only once the install has succeeded.
         return (
             f"cd {shlex.quote(blitz_path)} && "
             f"{venv_python} -m pip install "
             "--no-index "
             "--no-cache-dir "
+            "--no-compile "
             f"--find-links {quoted_deps_dir} "
-            f"--requirement {requirements_path}"
+            f"--requirement {requirements_path} && "
+            f"{_compile_site_packages_command(venv_python)} && "
+            f"{{ [ ! -f {bundled_fingerprint} ] || "
+            f"cp {bundled_fingerprint} {installed_fingerprint}; }}"
         )
 
+    def get_dependency_fingerprint_paths(
+        self, blitz_path: FolderPath, bundle_path: FolderPath
+    ) -> tuple[FilePath, FilePath]:
+        deps_dir = posixpath.join(bundle_path, "deps", self.get_language_name())
+        installed_fingerprint_path = (
+            posixpath.join(PYTHON_ENVS_PATH, ACTIVE_PYTHON_ENV, FINGERPRINT_FILE_NAME)
+            if self.isolated_environments
+            else VENV_FINGERPRINT_PATH
+        )
+        return (
+            FilePath(posixpath.join(deps_dir, FINGERPRINT_FILE_NAME)),
+            FilePath(posixpath.join(blitz_path, installed_fingerprint_path)),
+        )
+
+    def _get_isolated_environment_installation_command(
+        self, blitz_path: FolderPath, deps_dir: str
+    ) -> str:
+        # Environments are keyed by the bundled fingerprint and only count as
+        # built once the fingerprint is copied in, so an interrupted build is
+        # redone on the next deploy. Redeploying a known set (e.g. a rollback)
+        # only swaps the symlinks. Inactive environments beyond the newest
+        # KEPT_INACTIVE_PYTHON_ENVS are removed.
+        venv_python = shlex.quote(posixpath.join(blitz_path, VENV_PATH))
+        envs_path = shlex.quote(posixpath.join(blitz_path, PYTHON_ENVS_PATH))
+        fingerprint_path = shlex.quote(posixpath.join(deps_dir, FINGERPRINT_FILE_NAME))
+        requirements_path = shlex.quote(posixpath.join(deps_dir, "requirements.txt"))
+        return f"""
+        envs={envs_path} &&
+        env_name=$(sha256sum {fingerprint_path} | cut -c1-16) &&
+        env_path="$envs/$env_name" &&
+        mkdir -p "$envs" &&
+        if [ ! -f "$env_path/{FINGERPRINT_FILE_NAME}" ]; then
+            rm -rf "$env_path" &&
+            {venv_python} -m venv "$env_path" &&
+            "$env_path/bin/python" -m pip install \\
+                --no-index \\
+                --no-cache-dir \\
+                --no-compile \\
+                --find-links {shlex.quote(deps_dir)} \\
+                --requirement {requirements_path} &&
+            {_compile_site_packages_command('"$env_path/bin/python"')} &&
+            cp {fingerprint_path} "$env_path/{FINGERPRINT_FILE_NAME}";
+        fi &&
+        current=$(readlink "$envs/{ACTIVE_PYTHON_ENV}" || true) &&
+        if [ -n "$current" ] && [ "$current" != "$env_name" ]; then
+            ln -sfn "$current" "$envs/{PREVIOUS_PYTHON_ENV}.tmp" &&
+            mv -Tf "$envs/{PREVIOUS_PYTHON_ENV}.tmp" "$envs/{PREVIOUS_PYTHON_ENV}";
+        fi &&
+        ln -sfn "$env_name" "$envs/{ACTIVE_PYTHON_ENV}.tmp" &&
+        mv -Tf "$envs/{ACTIVE_PYTHON_ENV}.tmp" "$envs/{ACTIVE_PYTHON_ENV}" &&
+        previous=$(readlink "$envs/{PREVIOUS_PYTHON_ENV}" || true) &&
+        ls -1t "$envs" |
+            grep -Ev '^({ACTIVE_PYTHON_ENV}|{PREVIOUS_PYTHON_ENV})$|\\.tmp$' |
+            grep -vxF -e "$env_name" -e "$previous" |
+            tail -n +{KEPT_INACTIVE_PYTHON_ENVS + 1} |
+            while read -r stale; do rm -rf "${{envs:?}}/$stale"; done
+        """
+
+    def get_post_install_command(
+        self, blitz_path: FolderPath, bundle_path: FolderPath
+    ) -> str | None:
+        # Byte-compile the module in parallel so its first start after a sync
+        # doesn't compile every file. checked-hash pycs are validated against
+        # the source content, so they stay valid when rsync or tar rewrite
+        # timestamps.
+        venv_python = posixpath.join(blitz_path, VENV_PATH)
+        interpreter = (
+            posixpath.join(
+                blitz_path, PYTHON_ENVS_PATH, ACTIVE_PYTHON_ENV, "bin", "python"
+            )
+            if self.isolated_environments
+            else venv_python
+        )
+        project_path = shlex.quote(self.get_project_path(bundle_path))
+        return (
+            f"python={shlex.quote(interpreter)}; "
+            f'[ -x "$python" ] || python={shlex.quote(venv_python)}; '
+            f'"$python" -m compileall -q -j 0 '
+            f"--invalidation-mode checked-hash {project_path}"
+        )
+
+    def get_interpreter_path(self) -> str:
+        if self.isolated_environments:
+            active_env = os.path.join(PYTHON_ENVS_PATH, ACTIVE_PYTHON_ENV)
+            if os.path.isdir(active_env):
+                # Resolved at start so a running process keeps its environment
+                # when a later deploy repoints `active`.
+                return os.path.join(os.path.realpath(active_env), "bin", "python")
+        return VENV_PATH
+
+    def get_entrypoint_path(self, bundle_path: FolderPath) -> FilePath:
+        return FilePath(f"{self.get_project_path(bundle_path)}/__main__.py")
+
     def get_run_command(self, bundle_path: FolderPath) -> str:
         extra_run_args = self.get_extra_run_args()
         return (
-            f"{VENV_PATH} -u "
-            f"{self.get_project_path(bundle_path)}/__main__.py {extra_run_args}"
+            f"{self.get_interpreter_path()} -u "
+            f"{self.get_entrypoint_path(bundle_path)} {extra_run_args}"
         )
 
     def verify(self) -> tuple[VerificationResult, str]:
@@ -421,6 +631,19 @@ class PythonModule(RunnableModule, DependencyInstallation):
         return VerificationResult.SUCCESS, ""
 
 
+def _compile_site_packages_command(python: str) -> str:
+    # pip is told --no-compile and the installed packages are byte-compiled
+    # here in parallel instead. A package with files that don't compile for
+    # this interpreter only costs a warning, as it does with pip.
+    site_packages = (
+        f"$({python} -c 'import sysconfig; print(sysconfig.get_path(\"purelib\"))')"
+    )
+    return (
+        f'{{ {python} -m compileall -q -j 0 "{site_packages}" || '
+        "echo 'Some installed files could not be byte-compiled.'; }"
+    )
+
+
 class SupportedModules:
     CPPLibraryModule = CPPLibraryModule
     CPPRunnableModule = CPPRunnableModule
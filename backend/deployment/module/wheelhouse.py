@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+from backend.deployment.network_api.utils import FilePath, FolderPath
+
+WHEELHOUSE_ENV_VAR = "BLITZ_WHEELHOUSE"
+DEFAULT_WHEELHOUSE_PATH = FolderPath(
+    os.path.join(Path.home(), ".cache", "blitz", "wheelhouse")
+)
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class WheelhouseManifest:
+    """
+    What one requirements file resolved to for one target.
+
+    `wheels` and `sdists` are the top-level requirements that resolved to
+    target wheels and to source archives; `files` are the artifact file names
+    (including transitive dependencies and build tools) that make up the deps
+    folder.
+    """
+
+    requirements_hash: str
+    wheels: list[str] = field(default_factory=list)
+    sdists: list[str] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "version": MANIFEST_VERSION,
+            "requirements_hash": self.requirements_hash,
+            "wheels": self.wheels,
+            "sdists": self.sdists,
+            "files": self.files,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, object]) -> WheelhouseManifest | None:
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+
+        def strings(key: str) -> list[str]:
+            value = data.get(key)
+            if not isinstance(value, list):
+                return []
+            return [item for item in value if isinstance(item, str)]
+
+        requirements_hash = data.get("requirements_hash")
+        if not isinstance(requirements_hash, str):
+            return None
+        return cls(
+            requirements_hash=requirements_hash,
+            wheels=strings("wheels"),
+            sdists=strings("sdists"),
+            files=strings("files"),
+        )
+
+
+class Wheelhouse:
+    """
+    Persistent store of downloaded Python artifacts for one target platform.
+
+    Each target (Python ABI plus its newest manylinux tag) gets its own
+    directory holding the artifacts in `files/` and one manifest per
+    requirements file hash in `manifests/`. A bundle whose requirements were
+    seen before is restored with hardlinks and never invokes pip.
+    """
+
+    def __init__(self, root: FolderPath, target_key: str):
+        self.target_key: str = target_key
+        self.path: FolderPath = FolderPath(os.path.join(root, target_key))
+        self.files_path: FolderPath = FolderPath(os.path.join(self.path, "files"))
+        self.manifests_path: FolderPath = FolderPath(
+            os.path.join(self.path, "manifests")
+        )
+
+    @classmethod
+    def for_target(
+        cls, py_tag: str, abi_tag: str, platforms: list[str]
+    ) -> "Wheelhouse":
+        root = FolderPath(os.environ.get(WHEELHOUSE_ENV_VAR, DEFAULT_WHEELHOUSE_PATH))
+        # The newest manylinux tag already encodes the glibc ceiling and the
+        # architecture, so it determines the whole platform list.
+        newest_platform = platforms[0] if platforms else "any"
+        return cls(root, f"cp{py_tag}-{abi_tag}-{newest_platform}")
+
+    def requirements_hash(
+        self, requirements_path: FilePath, extra_requirements: tuple[str, ...] = ()
+    ) -> str:
+        digest = hashlib.sha256()
+        with open(requirements_path, "rb") as requirements_file:
+            digest.update(requirements_file.read())
+        for requirement in extra_requirements:
+            digest.update(b"\0" + requirement.encode())
+        return digest.hexdigest()
+
+    def find_links_args(self) -> list[str]:
+        if not os.path.isdir(self.files_path):
+            return []
+        return ["--find-links", self.files_path]
+
+    def load_manifest(self, requirements_hash: str) -> WheelhouseManifest | None:
+        try:
+            with open(self._manifest_path(requirements_hash)) as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        manifest = WheelhouseManifest.from_json(data)
+        if manifest is None or manifest.requirements_hash != requirements_hash:
+            return None
+        if not all(
+            os.path.isfile(os.path.join(self.files_path, name))
+            for name in manifest.files
+        ):
+            return None
+        return manifest
+
+    def restore(self, requirements_hash: str, result_path: FolderPath) -> bool:
+        """
+        Hardlinks every artifact recorded for `requirements_hash` into
+        `result_path`. Returns False, leaving `result_path` untouched, on a miss.
+        """
+
+        manifest = self.load_manifest(requirements_hash)
+        if manifest is None:
+            return False
+
+        os.makedirs(result_path, exist_ok=True)
+        for name in manifest.files:
+            _link_or_copy(
+                os.path.join(self.files_path, name), os.path.join(result_path, name)
+            )
+        return True
+
+    def record(
+        self,
+        requirements_hash: str,
+        download_path: FolderPath,
+        file_names: list[str],
+        *,
+        wheels: list[str],
+        sdists: list[str],
+    ) -> None:
+        os.makedirs(self.files_path, exist_ok=True)
+        os.makedirs(self.manifests_path, exist_ok=True)
+
+        for name in file_names:
+            cached_path = os.path.join(self.files_path, name)
+            if not os.path.exists(cached_path):
+                _link_or_copy(os.path.join(download_path, name), cached_path)
+
+        manifest = WheelhouseManifest(
+            requirements_hash=requirements_hash,
+            wheels=wheels,
+            sdists=sdists,
+            files=sorted(file_names),
+        )
+        _write_json_atomically(self._manifest_path(requirements_hash), manifest)
+
+    def known_sdists(self) -> set[str]:
+        """
+        Requirements that previously had no target wheel, from any manifest.
+        """
+
+        sdists: set[str] = set()
+        if not os.path.isdir(self.manifests_path):
+            return sdists
+
+        for name in os.listdir(self.manifests_path):
+            if not name.endswith(".json"):
+                continue
+            manifest = self.load_manifest(name[: -len(".json")])
+            if manifest is not None:
+                sdists.update(manifest.sdists)
+        return sdists
+
+    def _manifest_path(self, requirements_hash: str) -> FilePath:
+        return FilePath(os.path.join(self.manifests_path, f"{requirements_hash}.json"))
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    if os.path.exists(destination):
+        os.unlink(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Cross-device or link-less filesystems fall back to a plain copy.
+        _ = shutil.copy2(source, destination)
+
+
+def _write_json_atomically(path: FilePath, manifest: WheelhouseManifest) -> None:
+    directory = os.path.dirname(path)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            json.dump(manifest.to_json(), temp_file, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
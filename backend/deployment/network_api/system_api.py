@@ -1,29 +1,28 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import dataclasses
 from dataclasses import dataclass
 from collections.abc import Iterable
+import hashlib
 import posixpath
-import shlex
-import subprocess
-import time
+import zlib
 
+from backend.deployment.network_api.transport import (
+    SshTransport,
+    StreamCompression,
+    Transport,
+    TransportError,
+)
 from backend.deployment.network_api.utils import FilePath, FolderPath
 from backend.deployment.network_api.zeroconf import (
     DiscoveredNetworkSystem,
 )
 from backend.deployment.processes import Process
 
-
-SSH_OPTIONS = (
-    "-o StrictHostKeyChecking=no "
-    "-o UserKnownHostsFile=/dev/null "
-    "-o GlobalKnownHostsFile=/dev/null "
-    "-o NumberOfPasswordPrompts=1"
-)
-
-SSH_RETRY_ATTEMPTS = 3
-SSH_RETRY_DELAY_SECONDS = 0.5
+# Config JSON shrinks well; higher levels cost CPU for little gain.
+CONFIG_COMPRESSION_LEVEL = 6
 
 
 @dataclass(slots=True)
@@ -35,6 +34,9 @@ class System:
     - HTTP watchdog API (set_config, start/stop processes)
     - Zeroconf discovery (discover_all)
     - SSH deployment fields (address, password, port)
+
+    Remote work goes through `transport`, which defaults to SSH/rsync plus
+    HTTP; pass a `LocalTransport` to deploy into a local directory instead.
     """
 
     general_info: DiscoveredNetworkSystem
@@ -42,29 +44,57 @@ class System:
     password: str = dataclasses.field(default="ubuntu")
     user: str = dataclasses.field(default="ubuntu")
     ssh_port: int = dataclasses.field(default=22)
+    multiplex_ssh: bool = dataclasses.field(default=True)
+    transport: Transport | None = dataclasses.field(default=None)
     remote_host: str = dataclasses.field(init=False)
 
     def __post_init__(self) -> None:
         self.remote_host = f"{self.user}@{self.general_info.hostname}"
+        if self.transport is None:
+            self.transport = SshTransport(self)
+
+    @property
+    def command_timings(self) -> list[tuple[str, float]]:
+        return self._transport().command_timings
 
     def watchdog_url(self) -> str:
         return f"http://{self.general_info.hostname}:{self.general_info.watchdog_port}/"
 
     def set_config(self, raw_config_base64: str, *, timeout_s: float = 5.0) -> bool:
         """
-        Sends configuration to the Pi.
+        Sends configuration to the Pi, unless it already has the same config.
 
-        Note: existing Python tooling uses {"config": "..."} while the Java code
-        uses {"config_base64": "..."}. We send BOTH keys for compatibility.
+        The config goes as compressed bytes (POST /set/config/binary); older
+        watchdogs get it as base64 JSON (POST /set/config) instead.
         """
-        import requests  # pyright: ignore[reportMissingModuleSource]
-
-        payload = {"config": raw_config_base64, "config_base64": raw_config_base64}
-        r = requests.post(
-            f"{self.watchdog_url()}/set/config", json=payload, timeout=timeout_s
+        config = _decode_config(raw_config_base64)
+        if config is not None:
+            sha256 = hashlib.sha256(config).hexdigest()
+            if self.get_config_hash(timeout_s=timeout_s) == sha256:
+                return True
+            if self._upload_config(config, sha256, timeout_s=timeout_s):
+                return True
+
+        payload = {"config_base64": raw_config_base64}
+        r = self._transport().request(
+            "POST", "set/config", json_body=payload, timeout_s=timeout_s
         )
         return r.status_code == 200
 
+    def get_config_hash(self, *, timeout_s: float = 5.0) -> str | None:
+        """
+        sha256 of the config the Pi has, or None if it has none (or can't say).
+        """
+        try:
+            r = self._transport().request("GET", "get/config/hash", timeout_s=timeout_s)
+        except TransportError:
+            return None
+        if r.status_code != 200:
+            return None
+
+        sha256 = r.json().get("sha256")
+        return sha256 if isinstance(sha256, str) else None
+
     def set_processes(
         self,
         process_types: Iterable[Process] | None = None,
@@ -75,19 +105,96 @@ class System:
         Set the process list on the Pi via POST /set/processes.
         If process_types is provided, also updates self.processes_to_run.
         """
-        import requests  # pyright: ignore[reportMissingModuleSource]
-
         names = [p.get_name() for p in process_types or []]
         payload = {"process_types": names}
-        r = requests.post(
-            f"{self.watchdog_url()}/set/processes", json=payload, timeout=timeout_s
+        r = self._transport().request(
+            "POST", "set/processes", json_body=payload, timeout_s=timeout_s
+        )
+        if r.status_code != 200:
+            print(r.text)
+            return False
+
+        return True
+
+    def apply(
+        self,
+        raw_config_base64: str,
+        process_types: Iterable[Process] | None = None,
+        *,
+        bundle: tuple[FilePath, str] | None = None,
+        timeout_s: float = 30.0,
+    ) -> bool:
+        """
+        Sets the config and the process list in one call (POST /apply), so
+        the Pi restarts each process at most once. With `bundle` (remote path
+        and sha256) the watchdog first checks the deployed bundle and refuses
+        to apply if it doesn't match.
+
+        The config is only uploaded if the Pi's config hash differs, and is
+        then staged and applied by hash. Watchdogs without /apply get
+        set_config and set_processes instead.
+        """
+        payload: dict[str, object] = {
+            "process_types": [p.get_name() for p in process_types or []],
+        }
+        config_sha256 = self._stage_config(raw_config_base64, timeout_s=timeout_s)
+        if config_sha256 is not None:
+            payload["config_sha256"] = config_sha256
+        else:
+            payload["config_base64"] = raw_config_base64
+        if bundle is not None:
+            remote_file, _ = self._clean_path(bundle[0])
+            payload["bundle"] = {"path": remote_file, "sha256": bundle[1]}
+
+        r = self._transport().request(
+            "POST", "apply", json_body=payload, timeout_s=timeout_s
         )
+        if r.status_code == 404:
+            return self.stop_all_set_config_and_start(
+                raw_config_base64,
+                new_processes_to_run=process_types,
+                timeout_s=timeout_s,
+            )
         if r.status_code != 200:
             print(r.text)
             return False
 
         return True
 
+    def _stage_config(self, raw_config_base64: str, *, timeout_s: float) -> str | None:
+        """
+        Makes sure the Pi holds the config for an apply by hash, uploading it
+        only if needed. None means it has to be sent inline.
+        """
+        config = _decode_config(raw_config_base64)
+        if config is None:
+            return None
+
+        sha256 = hashlib.sha256(config).hexdigest()
+        if self.get_config_hash(timeout_s=timeout_s) == sha256:
+            return sha256
+        if self._upload_config(config, sha256, stage=True, timeout_s=timeout_s):
+            return sha256
+        return None
+
+    def _upload_config(
+        self, config: bytes, sha256: str, *, stage: bool = False, timeout_s: float
+    ) -> bool:
+        params = {"sha256": sha256}
+        if stage:
+            params["stage"] = "1"
+        try:
+            r = self._transport().request(
+                "POST",
+                "set/config/binary",
+                data=zlib.compress(config, CONFIG_COMPRESSION_LEVEL),
+                params=params,
+                timeout_s=timeout_s,
+            )
+        except TransportError:
+            return False
+        return r.status_code == 200
+
     def stop_all_set_config_and_start(
         self,
         raw_config_base64: str,
@@ -100,6 +207,57 @@ class System:
 
         return self.set_processes(new_processes_to_run, timeout_s=timeout_s)
 
+    def relay_file(
+        self,
+        remote_file_path: FilePath,
+        sha256: str,
+        targets: list[dict[str, object]],
+        *,
+        timeout_s: float = 120.0,
+    ) -> bool:
+        """
+        Asks this Pi's watchdog to push an already deployed file to its peers.
+
+        `targets` is a relay tree as produced by `RelayNode.to_relay_target()`;
+        each peer forwards the file to its own children before responding.
+        Returns False, so the caller can fall back to direct uploads, if the
+        relay failed or the seed could not be reached. Size `timeout_s` to the
+        tree with fanout.relay_timeout_seconds().
+        """
+        remote_file, _ = self._clean_path(remote_file_path)
+        payload = {"path": remote_file, "sha256": sha256, "targets": targets}
+        try:
+            r = self._transport().request(
+                "POST", "bundle/relay", json_body=payload, timeout_s=timeout_s
+            )
+        except TransportError as e:
+            print(e)
+            return False
+        if r.status_code != 200:
+            print(r.text)
+            return False
+
+        return True
+
+    def get_file_hash(
+        self, remote_file_path: FilePath, *, timeout_s: float = 10.0
+    ) -> str | None:
+        remote_file, _ = self._clean_path(remote_file_path)
+        try:
+            r = self._transport().request(
+                "GET",
+                "get/bundle/hash",
+                params={"path": remote_file},
+                timeout_s=timeout_s,
+            )
+        except TransportError:
+            return None
+        if r.status_code != 200:
+            return None
+
+        sha256 = r.json().get("sha256")
+        return sha256 if isinstance(sha256, str) else None
+
     def to_blitz_relative_path(self, path: FilePath) -> FilePath:
         return FilePath(posixpath.join(self.general_info.blitz_path, path))
 
@@ -112,79 +270,52 @@ class System:
     def deploy_file(
         self, local_file_path: FilePath, remote_file_path: FilePath
     ) -> bool:
-        remote_file, remote_dir = self._clean_path(remote_file_path)
+        remote_file, _ = self._clean_path(remote_file_path)
+        return self._transport().deploy_file(local_file_path, remote_file)
 
-        if not self.run_command(f"mkdir -p {shlex.quote(remote_dir)}"):
-            return False
+    def read_file(self, remote_file_path: FilePath) -> bytes | None:
+        remote_file, _ = self._clean_path(remote_file_path)
+        return self._transport().read_file(remote_file)
 
-        rsync_proc = self._run_with_retries(
-            [
-                *self._sshpass_command_prefix(),
-                "rsync",
-                "-av",
-                "--progress",
-                "-e",
-                f"ssh -p {self.ssh_port} {SSH_OPTIONS}",
-                str(local_file_path),
-                f"{self.remote_host}:{shlex.quote(remote_file)}",
-            ],
-            "rsync bundle",
+    def stream_directory(
+        self,
+        local_dir: FolderPath,
+        remote_dir: FolderPath,
+        compression: StreamCompression = StreamCompression(),
+    ) -> bool:
+        remote_path, _ = self._clean_path(FilePath(remote_dir))
+        return self._transport().stream_directory(
+            local_dir, FolderPath(remote_path), compression
         )
-        return rsync_proc.returncode == 0
 
     def run_command(self, command: str) -> bool:
-        ssh_proc = self._run_with_retries(
-            [
-                *self._sshpass_command_prefix(),
-                "ssh",
-                "-o",
-                "StrictHostKeyChecking=no",
-                "-o",
-                "UserKnownHostsFile=/dev/null",
-                "-o",
-                "GlobalKnownHostsFile=/dev/null",
-                "-o",
-                "NumberOfPasswordPrompts=1",
-                "-p",
-                str(self.ssh_port),
-                self.remote_host,
-                command,
-            ],
-            f"ssh {command}",
-        )
-        return ssh_proc.returncode == 0
+        return self._transport().run_command(command)
 
-    def _sshpass_command_prefix(self) -> list[str]:
-        return ["sshpass", "-p", self.password]
+    def close(self) -> None:
+        self._transport().close()
 
-    def _run_with_retries(
-        self,
-        command: list[str],
-        label: str,
-        *,
-        attempts: int = SSH_RETRY_ATTEMPTS,
-    ) -> subprocess.CompletedProcess[str]:
-        last_proc: subprocess.CompletedProcess[str] | None = None
-        for attempt in range(1, attempts + 1):
-            proc = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-            )
-            last_proc = proc
-            print(proc.stdout)
-            if proc.returncode == 0:
-                return proc
+    def command_latency_summary(self) -> str:
+        if not self.command_timings:
+            return f"{self.general_info.hostname}: no remote commands"
 
-            if attempt < attempts:
-                print(
-                    f"{label} failed on attempt {attempt}/{attempts}; retrying..."
-                )
-                time.sleep(SSH_RETRY_DELAY_SECONDS)
+        durations = [duration for _, duration in self.command_timings]
+        return (
+            f"{self.general_info.hostname}: {len(durations)} remote command(s), "
+            f"mean {sum(durations) / len(durations) * 1000:.0f} ms, "
+            f"max {max(durations) * 1000:.0f} ms, "
+            f"total {sum(durations):.2f} s"
+        )
 
-        assert last_proc is not None
-        return last_proc
+    def _transport(self) -> Transport:
+        assert self.transport is not None
+        return self.transport
 
     def __hash__(self) -> int:
         return hash(self.general_info.hostname)
+
+
+def _decode_config(raw_config_base64: str) -> bytes | None:
+    try:
+        return base64.b64decode(raw_config_base64)
+    except binascii.Error:
+        return None
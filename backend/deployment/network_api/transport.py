@@ -0,0 +1,624 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine, Mapping
+from dataclasses import dataclass
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, cast
+
+from backend.deployment.network_api.utils import FilePath, FolderPath
+from backend.deployment.network_api.zeroconf import DiscoveredNetworkSystem
+
+if TYPE_CHECKING:
+    import requests  # pyright: ignore[reportMissingModuleSource]
+
+    from backend.deployment.network_api.system_api import System
+
+
+SSH_RETRY_ATTEMPTS = 3
+SSH_RETRY_DELAY_SECONDS = 0.5
+
+# Every ssh/rsync call of a deploy reuses one authenticated master connection
+# per Pi instead of paying a full handshake each time. %C is ssh's hash of the
+# connection tuple, which keeps socket paths short and unique per host/user.
+SSH_CONTROL_DIR = os.path.join(tempfile.gettempdir(), "blitz-ssh")
+SSH_CONTROL_PERSIST_SECONDS = 60
+
+# How long starting or stopping a LocalWatchdog may take.
+LOCAL_WATCHDOG_TIMEOUT_SECONDS = 30.0
+
+
+class TransportError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class StreamCompression:
+    """
+    Compressor used when streaming a directory as tar to a target.
+
+    `none()` suits fast wired links where CPU is the bottleneck; `zstd(level)`
+    runs multithreaded (-T0) on both ends and trades CPU for Wi-Fi bandwidth.
+    """
+
+    algorithm: str = "none"
+    level: int = 0
+
+    @classmethod
+    def none(cls) -> "StreamCompression":
+        return cls()
+
+    @classmethod
+    def zstd(cls, level: int = 3) -> "StreamCompression":
+        if not 1 <= level <= 19:
+            raise ValueError(f"zstd level must be between 1 and 19, got {level}")
+        return cls(algorithm="zstd", level=level)
+
+    def compress_command(self) -> str | None:
+        if self.algorithm == "zstd":
+            return f"zstd -q -T0 -{self.level} -c"
+        return None
+
+    def decompress_command(self) -> str | None:
+        if self.algorithm == "zstd":
+            return "zstd -q -T0 -d -c"
+        return None
+
+    def pack_command(self, local_dir: str) -> str:
+        command = f"tar -C {shlex.quote(local_dir)} -cf - ."
+        compress = self.compress_command()
+        return f"{command} | {compress}" if compress else command
+
+    def unpack_command(self, remote_dir: str) -> str:
+        quoted_dir = shlex.quote(remote_dir)
+        command = f"mkdir -p {quoted_dir} && "
+        decompress = self.decompress_command()
+        if decompress:
+            command += f"{decompress} | "
+        # Grouped so the whole of stdin reaches tar when piped into locally.
+        return f"{{ {command}tar -x -C {quoted_dir}; }}"
+
+
+@dataclass
+class TransportResponse:
+    status_code: int
+    content: bytes = b""
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> dict[str, object]:
+        data = json.loads(self.content or b"{}")
+        return data if isinstance(data, dict) else {}
+
+
+class Transport:
+    """
+    Moves files, runs commands and talks to the watchdog API of one system.
+
+    `System` delegates every remote operation to a transport, so the deploy
+    pipeline can run against real Pis over SSH or against a local directory.
+    """
+
+    def __init__(self) -> None:
+        self.command_timings: list[tuple[str, float]] = []
+
+    def run_command(self, command: str) -> bool:
+        raise NotImplementedError(
+            f"{type(self).__name__} should implement run_command()"
+        )
+
+    def deploy_file(
+        self, local_file_path: FilePath, remote_file_path: FilePath
+    ) -> bool:
+        raise NotImplementedError(
+            f"{type(self).__name__} should implement deploy_file()"
+        )
+
+    def read_file(self, remote_file_path: FilePath) -> bytes | None:
+        """
+        Returns the contents of a small remote file, or None if it can't be read.
+        """
+        raise NotImplementedError(f"{type(self).__name__} should implement read_file()")
+
+    def stream_directory(
+        self,
+        local_dir: FolderPath,
+        remote_dir: FolderPath,
+        compression: StreamCompression = StreamCompression(),
+    ) -> bool:
+        """
+        Extracts the contents of `local_dir` into `remote_dir` through a tar
+        stream, without writing an archive on either end.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} should implement stream_directory()"
+        )
+
+    def request(
+        self,
+        method: str,
+        route: str,
+        *,
+        json_body: object | None = None,
+        data: bytes | None = None,
+        params: Mapping[str, str] | None = None,
+        timeout_s: float = 5.0,
+    ) -> TransportResponse:
+        """
+        Calls a watchdog route with either a JSON body or raw bytes in `data`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} should implement request()")
+
+    def close(self) -> None:
+        return
+
+    def _timed(self, label: str, started_at: float) -> None:
+        self.command_timings.append((label, time.perf_counter() - started_at))
+
+
+def _http_request(
+    session: "requests.Session",
+    method: str,
+    url: str,
+    *,
+    json_body: object | None,
+    data: bytes | None,
+    params: Mapping[str, str] | None,
+    timeout_s: float,
+) -> TransportResponse:
+    import requests  # pyright: ignore[reportMissingModuleSource]
+
+    headers = {"Content-Type": "application/octet-stream"} if data is not None else None
+    try:
+        r = session.request(
+            method,
+            url,
+            json=json_body,
+            data=data,
+            headers=headers,
+            params=params,
+            timeout=timeout_s,
+        )
+    except requests.RequestException as e:
+        raise TransportError(f"{method} {url} failed: {e}") from e
+    return TransportResponse(status_code=r.status_code, content=r.content)
+
+
+class SshTransport(Transport):
+    """
+    Talks to a Pi with sshpass/ssh/rsync and to its watchdog over HTTP.
+    """
+
+    def __init__(self, system: "System"):
+        super().__init__()
+        self.system: "System" = system
+        self._session: "requests.Session | None" = None
+
+    def run_command(self, command: str) -> bool:
+        ssh_proc = self._run_with_retries(
+            [
+                *self._sshpass_command_prefix(),
+                "ssh",
+                *self._ssh_options(),
+                "-p",
+                str(self.system.ssh_port),
+                self.system.remote_host,
+                command,
+            ],
+            f"ssh {command}",
+        )
+        return ssh_proc.returncode == 0
+
+    def deploy_file(
+        self, local_file_path: FilePath, remote_file_path: FilePath
+    ) -> bool:
+        remote_dir = os.path.dirname(remote_file_path)
+        if not self.run_command(f"mkdir -p {shlex.quote(remote_dir)}"):
+            return False
+
+        rsync_proc = self._run_with_retries(
+            [
+                *self._sshpass_command_prefix(),
+                "rsync",
+                "-av",
+                "--progress",
+                "-e",
+                shlex.join(
+                    ["ssh", "-p", str(self.system.ssh_port), *self._ssh_options()]
+                ),
+                str(local_file_path),
+                f"{self.system.remote_host}:{shlex.quote(remote_file_path)}",
+            ],
+            "rsync bundle",
+        )
+        return rsync_proc.returncode == 0
+
+    def read_file(self, remote_file_path: FilePath) -> bytes | None:
+        started_at = time.perf_counter()
+        # Not retried: callers treat an unreadable file like a missing one.
+        proc = subprocess.run(
+            [
+                *self._sshpass_command_prefix(),
+                "ssh",
+                *self._ssh_options(),
+                "-p",
+                str(self.system.ssh_port),
+                self.system.remote_host,
+                f"cat {shlex.quote(remote_file_path)}",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._timed(f"read {remote_file_path}", started_at)
+        return proc.stdout if proc.returncode == 0 else None
+
+    def stream_directory(
+        self,
+        local_dir: FolderPath,
+        remote_dir: FolderPath,
+        compression: StreamCompression = StreamCompression(),
+    ) -> bool:
+        ssh_command = shlex.join(
+            [
+                *self._sshpass_command_prefix(),
+                "ssh",
+                *self._ssh_options(),
+                "-p",
+                str(self.system.ssh_port),
+                self.system.remote_host,
+                compression.unpack_command(remote_dir),
+            ]
+        )
+        stream_proc = self._run_with_retries(
+            [
+                "bash",
+                "-c",
+                "set -o pipefail; "
+                f"{compression.pack_command(local_dir)} | {ssh_command}",
+            ],
+            f"stream bundle ({compression.algorithm})",
+        )
+        return stream_proc.returncode == 0
+
+    def request(
+        self,
+        method: str,
+        route: str,
+        *,
+        json_body: object | None = None,
+        data: bytes | None = None,
+        params: Mapping[str, str] | None = None,
+        timeout_s: float = 5.0,
+    ) -> TransportResponse:
+        import requests  # pyright: ignore[reportMissingModuleSource]
+
+        if self._session is None:
+            self._session = requests.Session()
+
+        url = f"{self.system.watchdog_url().rstrip('/')}/{route.lstrip('/')}"
+        started_at = time.perf_counter()
+        try:
+            return _http_request(
+                self._session,
+                method,
+                url,
+                json_body=json_body,
+                data=data,
+                params=params,
+                timeout_s=timeout_s,
+            )
+        finally:
+            self._timed(f"{method} /{route.lstrip('/')}", started_at)
+
+    def close(self) -> None:
+        """
+        Shuts down the multiplexed master connection, if one is running.
+        """
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+        if not self.system.multiplex_ssh:
+            return
+
+        _ = subprocess.run(
+            [
+                "ssh",
+                *self._ssh_options(),
+                "-p",
+                str(self.system.ssh_port),
+                "-O",
+                "exit",
+                self.system.remote_host,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _ssh_options(self) -> list[str]:
+        options = [
+            "-o",
+            "StrictHostKeyChecking=no",
+            "-o",
+            "UserKnownHostsFile=/dev/null",
+            "-o",
+            "GlobalKnownHostsFile=/dev/null",
+            "-o",
+            "NumberOfPasswordPrompts=1",
+        ]
+        if self.system.multiplex_ssh:
+            os.makedirs(SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
+            options.extend(
+                [
+                    "-o",
+                    "ControlMaster=auto",
+                    "-o",
+                    f"ControlPath={os.path.join(SSH_CONTROL_DIR, '%C')}",
+                    "-o",
+                    f"ControlPersist={SSH_CONTROL_PERSIST_SECONDS}",
+                ]
+            )
+        return options
+
+    def _sshpass_command_prefix(self) -> list[str]:
+        return ["sshpass", "-p", self.system.password]
+
+    def _run_with_retries(
+        self,
+        command: list[str],
+        label: str,
+        *,
+        attempts: int = SSH_RETRY_ATTEMPTS,
+    ) -> subprocess.CompletedProcess[str]:
+        last_proc: subprocess.CompletedProcess[str] | None = None
+        for attempt in range(1, attempts + 1):
+            started_at = time.perf_counter()
+            proc = subprocess.run(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+            self._timed(label, started_at)
+            last_proc = proc
+            print(proc.stdout)
+            if proc.returncode == 0:
+                return proc
+
+            if attempt < attempts:
+                print(f"{label} failed on attempt {attempt}/{attempts}; retrying...")
+                time.sleep(SSH_RETRY_DELAY_SECONDS)
+
+        assert last_proc is not None
+        return last_proc
+
+
+class LocalWatchdog:
+    """
+    The watchdog of a LocalTransport's target: the real watchdog app and
+    process monitor, served on a loopback port from a thread of this process.
+
+    Like on a Pi, the watchdog resolves bundles and module files against
+    BLITZ_PATH (read from the environment when the watchdog is first
+    imported), which has to be `root`. It is started on the first request and
+    keeps running, with the processes it started, until `stop()`.
+    """
+
+    def __init__(self, root: FolderPath, system_name: str = "local"):
+        self.root: FolderPath = root
+        self.system_name: str = system_name
+        self.config_path: str = os.path.join(root, "config", "config.b64")
+        self.memory_path: str = os.path.join(root, "config", "processes.json")
+        self.url: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._shutdown: Callable[[], Coroutine[object, object, None]] | None = None
+
+    def start(self) -> str:
+        """
+        Serves the watchdog API if it isn't yet; returns its URL.
+        """
+
+        if self.url is not None:
+            return self.url
+
+        from watchdog import bundle_relay
+
+        if os.path.realpath(bundle_relay.BLITZ_PATH) != os.path.realpath(self.root):
+            raise TransportError(
+                f"The watchdog resolves bundles under {bundle_relay.BLITZ_PATH}, "
+                f"not {self.root}; set BLITZ_PATH before it is imported"
+            )
+        os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            port = asyncio.run_coroutine_threadsafe(self._serve(loop), loop).result(
+                LOCAL_WATCHDOG_TIMEOUT_SECONDS
+            )
+        except BaseException:
+            _ = loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            raise
+        self._loop, self._thread = loop, thread
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def _serve(self, loop: asyncio.AbstractEventLoop) -> int:
+        from watchdog.api import create_app, start_api
+        from watchdog.commands import CommandKind, MonitorCommand
+        from watchdog.monitor import ProcessMonitor
+
+        # No debounce: a deploy writes the process list once, and the target
+        # should show it as soon as the apply returns.
+        process_monitor = ProcessMonitor(
+            self.memory_path, self.config_path, loop, memory_debounce_seconds=0
+        )
+        runner = await start_api(
+            create_app(process_monitor, self.system_name, self.config_path),
+            "127.0.0.1",
+            0,
+        )
+
+        async def shutdown() -> None:
+            await process_monitor.run_command(MonitorCommand(CommandKind.STOP_ALL))
+            await runner.cleanup()
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    _ = task.cancel()
+
+        self._shutdown = shutdown
+        address = cast(tuple[str, int], runner.addresses[0])
+        return address[1]
+
+    def stop(self) -> None:
+        """
+        Stops the processes the watchdog started and shuts it down.
+        """
+
+        if self._loop is None or self._thread is None or self._shutdown is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(
+                LOCAL_WATCHDOG_TIMEOUT_SECONDS
+            )
+        finally:
+            _ = self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = self._shutdown = self.url = None
+
+
+class LocalTransport(Transport):
+    """
+    Treats a local directory as the target's BLITZ_PATH.
+
+    Commands run in a local shell, files are copied instead of rsynced and
+    watchdog calls go over HTTP to `watchdog`, the target's LocalWatchdog.
+    One created here is stopped on close(); a watchdog passed in outlives the
+    transport, like a Pi's does. Pair it with `describe_local_system(root)` to
+    deploy to this machine.
+    """
+
+    def __init__(self, root: FolderPath, watchdog: LocalWatchdog | None = None):
+        super().__init__()
+        self.root: FolderPath = FolderPath(os.path.abspath(root))
+        self.watchdog: LocalWatchdog = watchdog or LocalWatchdog(self.root)
+        self._owns_watchdog: bool = watchdog is None
+        self._session: "requests.Session | None" = None
+
+    def run_command(self, command: str) -> bool:
+        started_at = time.perf_counter()
+        proc = subprocess.run(["bash", "-c", command], cwd=self.root)
+        self._timed(f"local {command}", started_at)
+        return proc.returncode == 0
+
+    def deploy_file(
+        self, local_file_path: FilePath, remote_file_path: FilePath
+    ) -> bool:
+        started_at = time.perf_counter()
+        os.makedirs(os.path.dirname(remote_file_path), exist_ok=True)
+        _ = shutil.copyfile(local_file_path, remote_file_path)
+        self._timed("copy bundle", started_at)
+        return True
+
+    def read_file(self, remote_file_path: FilePath) -> bytes | None:
+        try:
+            with open(remote_file_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def stream_directory(
+        self,
+        local_dir: FolderPath,
+        remote_dir: FolderPath,
+        compression: StreamCompression = StreamCompression(),
+    ) -> bool:
+        started_at = time.perf_counter()
+        proc = subprocess.run(
+            [
+                "bash",
+                "-c",
+                "set -o pipefail; "
+                f"{compression.pack_command(local_dir)} | "
+                f"{compression.unpack_command(remote_dir)}",
+            ]
+        )
+        self._timed(f"stream bundle ({compression.algorithm})", started_at)
+        return proc.returncode == 0
+
+    def request(
+        self,
+        method: str,
+        route: str,
+        *,
+        json_body: object | None = None,
+        data: bytes | None = None,
+        params: Mapping[str, str] | None = None,
+        timeout_s: float = 5.0,
+    ) -> TransportResponse:
+        import requests  # pyright: ignore[reportMissingModuleSource]
+
+        if self._session is None:
+            self._session = requests.Session()
+
+        started_at = time.perf_counter()
+        try:
+            url = f"{self.watchdog.start()}/{route.lstrip('/')}"
+            return _http_request(
+                self._session,
+                method,
+                url,
+                json_body=json_body,
+                data=data,
+                params=params,
+                timeout_s=timeout_s,
+            )
+        finally:
+            self._timed(f"{method} /{route.lstrip('/')}", started_at)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self._owns_watchdog:
+            self.watchdog.stop()
+
+    @staticmethod
+    def describe_local_system(
+        root: FolderPath, system_name: str = "local"
+    ) -> DiscoveredNetworkSystem:
+        try:
+            os_release = platform.freedesktop_os_release()
+        except OSError:
+            os_release = {}
+        return DiscoveredNetworkSystem(
+            hostname="localhost",
+            system_name=system_name,
+            watchdog_port=0,
+            autobahn_port=0,
+            blitz_path=FolderPath(os.path.abspath(root)),
+            machine_architecture=platform.machine(),
+            platform_description=platform.platform(),
+            python_major_version=sys.version_info.major,
+            python_minor_version=sys.version_info.minor,
+            os_distribution_id=os_release.get("ID"),
+            os_distribution_family=os_release.get("ID_LIKE"),
+            os_distribution_version_id=os_release.get("VERSION_ID"),
+        )
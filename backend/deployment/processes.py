@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from collections import Counter
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from enum import Enum
+import heapq
 from typing import Generic, Iterable, TypeVar
 
 
@@ -38,6 +41,13 @@ class WeightedProcess(Process, Enum):
 
 TProcess = TypeVar("TProcess", bound=WeightedProcess)
 
+# Slack when comparing resource use to capacities.
+CAPACITY_EPSILON = 1e-9
+
+
+class PlacementError(RuntimeError):
+    pass
+
 
 @dataclass(frozen=True, slots=True)
 class ConstrainedProcess(Generic[TProcess]):
@@ -53,6 +63,21 @@ class ConstrainedProcess(Generic[TProcess]):
     count: int = 1
 
 
+@dataclass(slots=True)
+class Placement(Generic[TProcess]):
+    """
+    Where each process instance runs, and the instances that fit on no Pi
+    with the reason.
+    """
+
+    assignments: dict[str, list[TProcess]]
+    unplaced: list[tuple[TProcess, str]] = field(default_factory=list)
+
+    @property
+    def feasible(self) -> bool:
+        return not self.unplaced
+
+
 @dataclass(slots=True)
 class ProcessPlan(Generic[TProcess]):
     """
@@ -64,12 +89,16 @@ class ProcessPlan(Generic[TProcess]):
           .add(ProcessType.POS_EXTRAPOLATOR)
           .add(ProcessType.APRIL_SERVER, count=3)
           .pin(ProcessType.APRIL_SERVER, "nathan-hale")
+          .requires(ProcessType.APRIL_SERVER, cpu=1.5, camera_ports=1)
+          .capacity("nathan-hale", cpu=4, camera_ports=2)
       )
       mapping = plan.assign(pi_names)
     """
 
     desired: list[TProcess] = field(default_factory=list)
     constraints: list[ConstrainedProcess[TProcess]] = field(default_factory=list)
+    demands: dict[TProcess, dict[str, float]] = field(default_factory=dict)
+    capacities: dict[str, dict[str, float]] = field(default_factory=dict)
 
     def add(self, process: TProcess, *, count: int = 1) -> "ProcessPlan[TProcess]":
         if count <= 0:
@@ -95,11 +124,53 @@ class ProcessPlan(Generic[TProcess]):
         )
         return self
 
-    def assign(self, pi_names: Iterable[str]) -> dict[str, list[TProcess]]:
-        return assign_weighted_processes_to_pis(
-            pi_names=pi_names, processes=self.desired, constrained=self.constraints
+    def requires(
+        self, process: TProcess, **resources: float
+    ) -> "ProcessPlan[TProcess]":
+        """
+        Declares what each instance of `process` uses besides its weight, e.g.
+        cpu cores, memory_mb, camera_ports or an accelerator such as coral_tpu.
+        """
+
+        self.demands[process] = {**self.demands.get(process, {}), **resources}
+        return self
+
+    def capacity(self, pi_name: str, **resources: float) -> "ProcessPlan[TProcess]":
+        """
+        Declares what a Pi offers. Resources it doesn't list are unlimited on
+        it, so give e.g. `camera_ports=0` to the Pis without cameras.
+        """
+
+        key = normalize_pi_name(pi_name)
+        self.capacities[key] = {**self.capacities.get(key, {}), **resources}
+        return self
+
+    def place(self, pi_names: Iterable[str]) -> Placement[TProcess]:
+        return place_processes(
+            pi_names=pi_names,
+            processes=self.desired,
+            constrained=self.constraints,
+            demands=self.demands,
+            capacities=self.capacities,
         )
 
+    def assign(self, pi_names: Iterable[str]) -> dict[str, list[TProcess]]:
+        """
+        Like place(), but raises PlacementError if any instance fits nowhere.
+        """
+
+        placement = self.place(pi_names)
+        if not placement.feasible:
+            reasons = Counter(
+                f"{process.get_name()}: {reason}"
+                for process, reason in placement.unplaced
+            )
+            raise PlacementError(
+                "Cannot place "
+                + "; ".join(f"{n} x {reason}" for reason, n in reasons.items())
+            )
+        return placement.assignments
+
 
 def normalize_pi_name(name: str) -> str:
     """
@@ -132,40 +203,145 @@ def assign_weighted_processes_to_pis(
       the lowest current total weight.
     """
 
-    normalized_pi_names = [normalize_pi_name(p) for p in pi_names]
-    if not normalized_pi_names:
-        return {}
-    out: dict[str, list[TProcess]] = {p: [] for p in normalized_pi_names}
-    weights: dict[str, float] = {p: 0.0 for p in normalized_pi_names}
+    return place_processes(
+        pi_names=pi_names, processes=processes, constrained=constrained
+    ).assignments
+
+
+class _PiLoad:
+    __slots__ = ("name", "capacity", "used", "weight", "share")
+
+    def __init__(self, name: str, capacity: Mapping[str, float]):
+        self.name: str = name
+        self.capacity: Mapping[str, float] = capacity
+        self.used: dict[str, float] = {}
+        self.weight: float = 0.0
+        # Largest fraction of any capacity in use.
+        self.share: float = 0.0
+
+    def key(self) -> tuple[float, float, str]:
+        return self.share, self.weight, self.name
+
+    def fits(self, demand: Mapping[str, float]) -> bool:
+        return all(
+            self.used.get(resource, 0.0) + amount
+            <= self.capacity[resource] + CAPACITY_EPSILON
+            for resource, amount in demand.items()
+            if resource in self.capacity
+        )
+
+    def add(self, demand: Mapping[str, float], weight: float) -> None:
+        self.weight += weight
+        for resource, amount in demand.items():
+            used = self.used.get(resource, 0.0) + amount
+            self.used[resource] = used
+            capacity = self.capacity.get(resource)
+            if capacity:
+                self.share = max(self.share, used / capacity)
+
+
+def place_processes(
+    *,
+    pi_names: Iterable[str],
+    processes: Iterable[TProcess],
+    constrained: Iterable[ConstrainedProcess[TProcess]] = (),
+    demands: Mapping[TProcess, Mapping[str, float]] | None = None,
+    capacities: Mapping[str, Mapping[str, float]] | None = None,
+) -> Placement[TProcess]:
+    """
+    Places process instances on Pis within their capacities.
+
+    Strategy:
+    - Apply constrained assignments first; pinned instances that don't fit
+      their Pi are reported, not moved.
+    - Then place the rest largest-first, each on the least loaded Pi it fits
+      on. Pis sit in a heap ordered by the largest share of any capacity in
+      use, then total weight, so without capacities this balances weight.
 
-    remaining: list[TProcess] = [p for p in processes]
+    Without any Pis nothing is placed, and nothing is reported either.
+    """
 
-    # Apply constraints first.
+    demands = demands or {}
+    capacities = {normalize_pi_name(k): v for k, v in (capacities or {}).items()}
+    loads = {
+        name: _PiLoad(name, capacities.get(name, {}))
+        for name in (normalize_pi_name(p) for p in pi_names)
+    }
+    if not loads:
+        return Placement({})
+    placement: Placement[TProcess] = Placement({name: [] for name in loads})
+    processes = list(processes)
+
+    # Apply constraints first, for at most as many instances as were desired.
+    available = Counter(processes)
+    pinned: Counter[TProcess] = Counter()
     for c in constrained:
         pi = normalize_pi_name(c.pi_name)
-        if pi not in out:
+        if pi not in loads:
             # Pi not present; ignore the constraint rather than failing deploy.
             continue
 
-        removed = 0
-        for _ in range(max(0, int(c.count))):
-            try:
-                remaining.remove(c.process)
-                removed += 1
-            except ValueError:
-                break
-
-        if removed <= 0:
-            continue
-
-        out[pi].extend([c.process] * removed)
-        weights[pi] += float(c.process.get_weight()) * removed
-
-    # Greedy pack remaining by descending weight.
-    remaining.sort(key=lambda p: float(p.get_weight()), reverse=True)
+        count = min(max(0, int(c.count)), available[c.process] - pinned[c.process])
+        pinned[c.process] += count
+        demand = demands.get(c.process, {})
+        for _ in range(count):
+            if loads[pi].fits(demand):
+                loads[pi].add(demand, float(c.process.get_weight()))
+                placement.assignments[pi].append(c.process)
+            else:
+                placement.unplaced.append(
+                    (c.process, f"pinned to {pi}, which is out of capacity")
+                )
+
+    remaining: list[TProcess] = []
+    for p in processes:
+        if pinned[p] > 0:
+            pinned[p] -= 1
+        else:
+            remaining.append(p)
+
+    # Largest first: by share of the biggest capacity offered, then weight.
+    largest_capacity: dict[str, float] = {}
+    for capacity in capacities.values():
+        for resource, amount in capacity.items():
+            largest_capacity[resource] = max(
+                largest_capacity.get(resource, 0.0), amount
+            )
+
+    def size(p: TProcess) -> tuple[float, float]:
+        shares = [
+            amount / largest_capacity[resource]
+            for resource, amount in demands.get(p, {}).items()
+            if largest_capacity.get(resource)
+        ]
+        return max(shares, default=0.0), float(p.get_weight())
+
+    remaining.sort(key=size, reverse=True)
+
+    heap = [load.key() for load in loads.values()]
+    heapq.heapify(heap)
+    # Loads only grow, so a process that fit nowhere won't fit later either.
+    exhausted: set[TProcess] = set()
     for p in remaining:
-        target_pi = min(weights.keys(), key=lambda k: (weights[k], k))
-        out[target_pi].append(p)
-        weights[target_pi] += float(p.get_weight())
-
-    return out
+        demand = demands.get(p, {})
+        target: _PiLoad | None = None
+        skipped: list[_PiLoad] = []
+        if p not in exhausted:
+            while heap:
+                load = loads[heapq.heappop(heap)[2]]
+                if load.fits(demand):
+                    target = load
+                    break
+                skipped.append(load)
+
+        if target is None:
+            exhausted.add(p)
+            placement.unplaced.append((p, "no Pi has enough capacity left"))
+        else:
+            target.add(demand, float(p.get_weight()))
+            placement.assignments[target.name].append(p)
+            heapq.heappush(heap, target.key())
+        for load in skipped:
+            heapq.heappush(heap, load.key())
+
+    return placement
@@ -1,14 +1,35 @@
+from enum import Enum
 import os
 import posixpath
 import shlex
 
+from backend.deployment.fanout import (
+    DEFAULT_FAN_OUT_DEGREE,
+    RelayNode,
+    plan_relay_tree,
+    relay_timeout_seconds,
+)
+from backend.deployment.misc.hashing import sha256_file
 from backend.deployment.module.base import DependencyInstallation, Module
+from backend.deployment.module.dependency_fingerprint import DependencyFingerprint
 from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.transport import StreamCompression
 from backend.deployment.network_api.utils import FilePath, FolderPath
 from backend.deployment.network_api.zeroconf import (
     DiscoveredNetworkSystem,
 )
 
+# The only directory watchdogs accept relayed bundles in and check them from.
+WATCHDOG_BUNDLE_DIR = "bundles"
+
+
+class TransferMode(Enum):
+    # Zip locally, rsync the archive, unzip on the target.
+    ZIP = "zip"
+    # Pipe a tar of the staged bundle (optionally zstd-compressed) straight
+    # into `tar -x` on the target, with no archive written on either end.
+    STREAMED_TAR = "streamed-tar"
+
 
 class Rsyncer:
     def __init__(
@@ -19,6 +40,11 @@ class Rsyncer:
         systems: set[System],
         are_deps_bundled: bool = False,
         system_host_to_pass_user: dict[str, tuple[str, str]] | None = None,
+        fan_out_bundles: bool = False,
+        fan_out_degree: int = DEFAULT_FAN_OUT_DEGREE,
+        transfer_mode: TransferMode = TransferMode.ZIP,
+        stream_compression: StreamCompression = StreamCompression(),
+        local_bundle_staging_path: FolderPath | None = None,
     ):
         self.modules: list[Module] = modules
         self.local_bundler_output_path: FolderPath = local_bundler_output_path
@@ -28,15 +54,53 @@ class Rsyncer:
             system_host_to_pass_user
         )
         self.are_deps_bundled: bool = are_deps_bundled
+        self.fan_out_bundles: bool = fan_out_bundles
+        self.fan_out_degree: int = fan_out_degree
+        self.transfer_mode: TransferMode = transfer_mode
+        self.stream_compression: StreamCompression = stream_compression
+        self.local_bundle_staging_path: FolderPath | None = local_bundle_staging_path
+        self._bundle_hashes: dict[str, str] = {}
 
     def deploy(self) -> None:
-        for system in sorted(self.systems, key=self._system_label):
+        ordered_systems = sorted(self.systems, key=self._system_label)
+        for system in ordered_systems:
             self._apply_system_credentials(system)
-            name, remote_zip_path = self.rsync_bundle_zip(system)
+
+        if self.transfer_mode is TransferMode.STREAMED_TAR:
+            if self.fan_out_bundles:
+                print("Bundle fan-out relays zip archives; streaming directly.")
+            for system in ordered_systems:
+                self.stream_bundle(system)
+                if self.are_deps_bundled:
+                    self.install_dependencies(system)
+                self.run_post_install_commands(system)
+            return
+
+        if self.fan_out_bundles:
+            deployed = self.fan_out_bundle_zips(ordered_systems)
+        else:
+            deployed = [self.rsync_bundle_zip(system) for system in ordered_systems]
+
+        for system, (name, remote_zip_path) in zip(ordered_systems, deployed):
             self.install_bundle(system, name, FilePath(remote_zip_path))
 
             if self.are_deps_bundled:
                 self.install_dependencies(system)
+            self.run_post_install_commands(system)
+
+    def run_post_install_commands(self, system: System) -> None:
+        remote_backend_path = FolderPath(
+            posixpath.join(system.general_info.blitz_path, "backend")
+        )
+        for module in self.modules:
+            command = module.get_post_install_command(
+                system.general_info.blitz_path, remote_backend_path
+            )
+            if command is not None and not system.run_command(command):
+                print(
+                    f"Post-install step for {module.name} failed on "
+                    f"{system.general_info.hostname}; continuing."
+                )
 
     def install_dependencies(self, system: System) -> None:
         installed_deps_lang_names: set[str] = set()
@@ -53,6 +117,10 @@ class Rsyncer:
             remote_backend_path = FolderPath(
                 posixpath.join(system.general_info.blitz_path, "backend")
             )
+            if self._dependencies_unchanged(system, module, remote_backend_path):
+                installed_deps_lang_names.add(module.get_language_name())
+                continue
+
             installed = system.run_command(
                 module.get_dependency_installation_command(
                     system.general_info.blitz_path,
@@ -65,14 +133,38 @@ class Rsyncer:
                 )
             installed_deps_lang_names.add(module.get_language_name())
 
+    def _dependencies_unchanged(
+        self,
+        system: System,
+        module: DependencyInstallation,
+        remote_backend_path: FolderPath,
+    ) -> bool:
+        fingerprint_paths = module.get_dependency_fingerprint_paths(
+            system.general_info.blitz_path, remote_backend_path
+        )
+        if fingerprint_paths is None:
+            return False
+
+        bundled_path, installed_path = fingerprint_paths
+        bundled = DependencyFingerprint.parse(system.read_file(bundled_path))
+        if bundled is None:
+            return False
+
+        installed = DependencyFingerprint.parse(system.read_file(installed_path))
+        hostname = system.general_info.hostname
+        language = module.get_language_name()
+        if bundled == installed:
+            print(f"{language} dependencies on {hostname} are up to date.")
+            return True
+
+        print(f"{language} dependencies changed on {hostname}:")
+        for change in bundled.describe_changes(installed):
+            print(f"  {change}")
+        return False
+
     def rsync_bundle_zip(self, system: System) -> tuple[str, FilePath]:
         name, zip_path = self.get_bundled_zip(system.general_info)
-        remote_bundle_dir = FolderPath(
-            posixpath.join(
-                system.general_info.blitz_path, self.backend_bundle_path.strip("/")
-            )
-        )
-        remote_zip_path = FilePath(posixpath.join(remote_bundle_dir, name))
+        remote_zip_path = self._remote_zip_path(system, name)
         deployed = system.deploy_file(
             zip_path,
             remote_zip_path,
@@ -85,6 +177,65 @@ class Rsyncer:
 
         return name, remote_zip_path
 
+    def fan_out_bundle_zips(self, systems: list[System]) -> list[tuple[str, FilePath]]:
+        """
+        Uploads each bundle once per SystemId and lets the Pis relay it.
+
+        The first system of every SystemId group is the seed: it receives the
+        bundle over SSH and forwards it to its peers in a tree through their
+        watchdogs. Every peer's copy is then hash-checked from here, and peers
+        that failed to receive a matching copy fall back to a direct upload.
+        """
+
+        groups: dict[str, list[System]] = {}
+        for system in systems:
+            build_key = system.general_info.to_system_id().to_build_key()
+            groups.setdefault(build_key, []).append(system)
+
+        deployed: dict[System, tuple[str, FilePath]] = {}
+        for group in groups.values():
+            seed, peers = group[0], group[1:]
+            name, remote_zip_path = self.rsync_bundle_zip(seed)
+            deployed[seed] = (name, remote_zip_path)
+            if not peers:
+                continue
+
+            _, zip_path = self.get_bundled_zip(seed.general_info)
+            expected_sha256 = sha256_file(zip_path)
+            nodes = [
+                RelayNode(
+                    system=peer, remote_file_path=self._remote_zip_path(peer, name)
+                )
+                for peer in peers
+            ]
+            roots = plan_relay_tree(nodes, self.fan_out_degree)
+            print(
+                f"Relaying {name} from {seed.general_info.hostname} "
+                f"to {len(peers)} peer(s)"
+            )
+            relayed = seed.relay_file(
+                remote_zip_path,
+                expected_sha256,
+                [root.to_relay_target() for root in roots],
+                timeout_s=relay_timeout_seconds(os.path.getsize(zip_path), roots),
+            )
+            if not relayed:
+                print(f"Relay from {seed.general_info.hostname} reported failures")
+
+            for node in nodes:
+                peer = node.system
+                if peer.get_file_hash(node.remote_file_path) == expected_sha256:
+                    deployed[peer] = (name, node.remote_file_path)
+                    continue
+
+                print(
+                    f"Relayed bundle on {peer.general_info.hostname} is missing "
+                    "or corrupt; uploading directly."
+                )
+                deployed[peer] = self.rsync_bundle_zip(peer)
+
+        return [deployed[system] for system in systems]
+
     def install_bundle(
         self,
         system: System,
@@ -115,11 +266,59 @@ class Rsyncer:
                 f"Failed to extract bundle on {system.general_info.hostname}"
             )
 
+    def stream_bundle(self, system: System) -> None:
+        """
+        Streams the staged bundle straight into the target's backend folder.
+        """
+
+        if self.local_bundle_staging_path is None:
+            raise ValueError("Streamed bundle transfer needs the local staging path")
+
+        build_key = system.general_info.to_system_id().to_build_key()
+        staged_bundle_path = FolderPath(
+            os.path.join(self.local_bundle_staging_path, f"backend-bundle-{build_key}")
+        )
+        remote_backend_path = FolderPath(
+            posixpath.join(system.general_info.blitz_path, "backend")
+        )
+        if not system.stream_directory(
+            staged_bundle_path, remote_backend_path, self.stream_compression
+        ):
+            raise RuntimeError(
+                f"Failed to stream bundle to {system.general_info.hostname}"
+            )
+
+    def deployed_bundle(self, system: System) -> tuple[FilePath, str] | None:
+        """
+        Remote path and sha256 of the archive deployed to `system`, for the
+        watchdog to check before applying. None for streamed transfers, which
+        leave no archive behind, and for archives outside the directory the
+        watchdog checks bundles in.
+        """
+
+        if self.transfer_mode is TransferMode.STREAMED_TAR:
+            return None
+        if self.backend_bundle_path.strip("/") != WATCHDOG_BUNDLE_DIR:
+            return None
+
+        name, zip_path = self.get_bundled_zip(system.general_info)
+        if name not in self._bundle_hashes:
+            self._bundle_hashes[name] = sha256_file(zip_path)
+        return self._remote_zip_path(system, name), self._bundle_hashes[name]
+
     def get_bundled_zip(self, system: DiscoveredNetworkSystem) -> tuple[str, FilePath]:
         name = f"backend-bundle-{system.to_system_id().to_build_key()}.zip"
         zip_path = FilePath(os.path.join(self.local_bundler_output_path, name))
         return name, zip_path
 
+    def _remote_zip_path(self, system: System, name: str) -> FilePath:
+        remote_bundle_dir = FolderPath(
+            posixpath.join(
+                system.general_info.blitz_path, self.backend_bundle_path.strip("/")
+            )
+        )
+        return FilePath(posixpath.join(remote_bundle_dir, name))
+
     @staticmethod
     def _system_label(system: System) -> str:
         return f"{system.general_info.system_name} " f"({system.general_info.hostname})"
@@ -0,0 +1,165 @@
+"""
+Load-tests the watchdog API: the aiohttp server on the event loop against the
+previous Flask development server in a thread.
+
+Both serve /get/system/status from a ProcessMonitor without processes, plus a
+/bench/slow route that stands in for a slow handler (e.g. a command waiting
+on a process to stop). Every `--slow-every`th request goes to the slow route.
+
+Usage:
+    python -m benchmarks.api_load --concurrency 32 --requests 2000
+    python -m benchmarks.api_load --slow-every 10 --slow-ms 200
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import aiohttp
+from aiohttp import web
+
+from watchdog.api import create_app
+from watchdog.monitor import ProcessMonitor
+
+
+async def measure(
+    url: str, concurrency: int, requests: int, slow_every: int
+) -> tuple[list[float], int]:
+    durations: list[float] = []
+    errors = 0
+    next_request = 0
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        nonlocal next_request, errors
+        while next_request < requests:
+            index = next_request
+            next_request += 1
+            slow = slow_every > 0 and index % slow_every == slow_every - 1
+            started_at = time.perf_counter()
+            async with session.get(
+                f"{url}/bench/slow" if slow else f"{url}/get/system/status"
+            ) as response:
+                _ = await response.read()
+                if response.status != 200:
+                    errors += 1
+            if not slow:
+                durations.append(time.perf_counter() - started_at)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        _ = await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    return durations, errors
+
+
+def start_flask(process_monitor: ProcessMonitor, port: int, slow_ms: int) -> None:
+    from flask import Flask, jsonify
+    from werkzeug.serving import make_server
+
+    app = Flask(__name__)
+
+    @app.route("/get/system/status")
+    def get_system_info():  # pyright: ignore[reportUnusedFunction]
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "active_processes": process_monitor.ping_processes_and_get_alive(),
+                    "possible_processes": process_monitor.get_possible_processes(),
+                    "config_set": process_monitor.is_config_exists,
+                    "resources": process_monitor.get_resource_report(),
+                    "memory": process_monitor.get_memory_report(),
+                }
+            ),
+            200,
+        )
+
+    @app.route("/bench/slow")
+    def slow():  # pyright: ignore[reportUnusedFunction]
+        time.sleep(slow_ms / 1000)
+        return jsonify({"status": "success"}), 200
+
+    # What app.run(debug=False) used to start.
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+async def start_aiohttp(
+    process_monitor: ProcessMonitor, port: int, slow_ms: int
+) -> web.AppRunner:
+    app = create_app(process_monitor, "benchmark", process_monitor.config_path)
+
+    async def slow(_request: web.Request) -> web.Response:
+        await asyncio.sleep(slow_ms / 1000)
+        return web.json_response({"status": "success"})
+
+    _ = app.router.add_get("/bench/slow", slow)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def report(label: str, durations: list[float], errors: int, elapsed: float) -> None:
+    durations_ms = sorted(d * 1000 for d in durations)
+    print(
+        f"{label:>7}: {len(durations) / elapsed:7.0f} req/s, "
+        f"p50 {statistics.median(durations_ms):6.1f} ms, "
+        f"p95 {durations_ms[int(len(durations_ms) * 0.95)]:6.1f} ms, "
+        f"max {durations_ms[-1]:6.1f} ms, {errors} errors"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--concurrency", type=int, default=32)
+    _ = parser.add_argument("--requests", type=int, default=2000)
+    _ = parser.add_argument("--slow-every", type=int, default=0)
+    _ = parser.add_argument("--slow-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="blitz-api-bench-") as workdir:
+        process_monitor = ProcessMonitor(
+            os.path.join(workdir, "memory.json"),
+            os.path.join(workdir, "config.txt"),
+            asyncio.get_running_loop(),
+        )
+
+        servers: list[str] = []
+        try:
+            flask_port = free_port()
+            start_flask(process_monitor, flask_port, args.slow_ms)
+            servers.append("flask")
+        except ImportError:
+            print("flask not installed, only measuring aiohttp")
+        aiohttp_port = free_port()
+        runner = await start_aiohttp(process_monitor, aiohttp_port, args.slow_ms)
+        servers.append("aiohttp")
+
+        try:
+            for label in servers:
+                port = flask_port if label == "flask" else aiohttp_port
+                url = f"http://127.0.0.1:{port}"
+                # Warm up: module imports, first connections.
+                _ = await measure(url, args.concurrency, args.concurrency, 0)
+                started_at = time.perf_counter()
+                durations, errors = await measure(
+                    url, args.concurrency, args.requests, args.slow_every
+                )
+                report(label, durations, errors, time.perf_counter() - started_at)
+        finally:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+"""
+Profiles BlitzNetworkDeployer.deploy end to end on this machine.
+
+A LocalTransport stands in for the Pi: the bundle is "uploaded" into a local
+directory, install commands run in a local shell and watchdog calls go to the
+real watchdog, served from a thread of this process and set up like on a Pi
+(BLITZ_PATH, working directory and import path are the target directory). It
+starts the first module as a real process. The target's .venv interpreter is
+this interpreter. The host needs unzip and rsync, like a real target.
+
+Usage:
+    python -m benchmarks.local_deploy_profile --modules 8 --top 25
+    python -m benchmarks.local_deploy_profile --transfer-mode streamed-tar
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+from backend.deployment.deployer import BlitzNetworkDeployer
+from backend.deployment.module.supported import SupportedModules
+from backend.deployment.network_api.transport import LocalTransport, LocalWatchdog
+from backend.deployment.network_api.utils import FolderPath
+from backend.deployment.processes import ProcessPlan, WeightedProcess
+from backend.deployment.rsyncer import TransferMode
+
+
+class ProfiledProcess(WeightedProcess):
+    # The watchdog finds a process's module by name: this runs module_0.
+    SAMPLE = "module_0", 1.0
+
+
+# Kept running by the watchdog until the profile ends.
+MODULE_SOURCE = """\
+import time
+
+print("hello from a profiled module")
+while True:
+    time.sleep(1)
+"""
+
+# Shipped as the bundle's deploy.py, through which the watchdog lists the
+# modules it can start.
+DEPLOY_SCRIPT = """\
+from benchmarks.local_deploy_profile import make_modules
+
+
+def get_modules():
+    return make_modules({workdir!r}, {count})
+"""
+
+
+def write_sources(workdir: str, count: int) -> FolderPath:
+    """
+    Writes the modules' sources and the backend folder with deploy.py;
+    returns the latter.
+    """
+
+    for index in range(count):
+        module_path = os.path.join(workdir, "modules", f"module_{index}")
+        os.makedirs(module_path, exist_ok=True)
+        with open(os.path.join(module_path, "__main__.py"), "w") as f:
+            _ = f.write(MODULE_SOURCE)
+
+    backend_path = os.path.join(workdir, "backend")
+    os.makedirs(backend_path, exist_ok=True)
+    with open(os.path.join(backend_path, "deploy.py"), "w") as f:
+        _ = f.write(DEPLOY_SCRIPT.format(workdir=workdir, count=count))
+    return FolderPath(backend_path)
+
+
+def make_modules(workdir: str, count: int) -> list[SupportedModules._Generic]:
+    modules: list[SupportedModules._Generic] = []
+    for index in range(count):
+        module_path = os.path.join(workdir, "modules", f"module_{index}")
+        modules.append(
+            SupportedModules.PythonModule(
+                name=f"module_{index}",
+                extra_run_args=[],
+                equivalent_run_definition=ProfiledProcess.SAMPLE,
+                module_folder_path=FolderPath(module_path),
+            )
+        )
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--modules", type=int, default=8)
+    _ = parser.add_argument("--top", type=int, default=25)
+    _ = parser.add_argument(
+        "--transfer-mode",
+        choices=[mode.value for mode in TransferMode],
+        default=TransferMode.ZIP.value,
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="blitz-local-deploy-") as workdir:
+        target_root = FolderPath(os.path.join(workdir, "target"))
+        local_system = LocalTransport.describe_local_system(target_root)
+        os.makedirs(os.path.join(target_root, ".venv", "bin"))
+        os.symlink(sys.executable, os.path.join(target_root, ".venv", "bin", "python"))
+        os.makedirs(os.path.join(target_root, "system_data"))
+        with open(os.path.join(target_root, "system_data", "name.txt"), "w") as f:
+            _ = f.write(local_system.system_name)
+        backend_path = write_sources(workdir, args.modules)
+
+        # Before the watchdog is first imported, which reads BLITZ_PATH and
+        # the system name.
+        os.environ["BLITZ_PATH"] = target_root
+        sys.path.insert(0, target_root)
+        previous_cwd = os.getcwd()
+        os.chdir(target_root)
+
+        watchdog = LocalWatchdog(target_root, local_system.system_name)
+        options = (
+            BlitzNetworkDeployer.Options()
+            .set_local_backend_path(backend_path)
+            .set_build_folder_path(FolderPath(os.path.join(workdir, "build")))
+            .set_output_folder_path(FolderPath(os.path.join(workdir, "out")))
+            .set_discovered_systems([local_system])
+            .set_transport_factory(
+                lambda _system: LocalTransport(target_root, watchdog)
+            )
+            .set_config_supplier(lambda: "e30=")
+            .set_transfer_mode(TransferMode(args.transfer_mode))
+            .build()
+        )
+
+        try:
+            profiler = cProfile.Profile()
+            started_at = time.perf_counter()
+            profiler.enable()
+            BlitzNetworkDeployer.deploy(
+                make_modules(workdir, args.modules),
+                lambda pi_names: ProcessPlan[ProfiledProcess]()
+                .add(ProfiledProcess.SAMPLE)
+                .assign(pi_names),
+                config=options,
+            )
+            profiler.disable()
+            print(f"deploy took {time.perf_counter() - started_at:.3f} s")
+
+            status = LocalTransport(target_root, watchdog).request(
+                "GET", "get/system/status"
+            )
+            print(f"running on the target: {status.json().get('active_processes')}")
+        finally:
+            watchdog.stop()
+            os.chdir(previous_cwd)
+
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
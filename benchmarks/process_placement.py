@@ -0,0 +1,85 @@
+"""
+Times ProcessPlan placement on a large synthetic fleet: `--instances` process
+instances of a few module types, each needing CPU, memory and some of them a
+camera port or a TPU, over `--hosts` Pis with mixed capacities.
+
+The plan is placed once without capacities (weights only) and once with
+them, and the unplaced instances of the capacity run are counted.
+
+Usage:
+    python -m benchmarks.process_placement --hosts 48 --instances 5000
+    python -m benchmarks.process_placement --hosts 8 --instances 200 --count 50
+"""
+
+import argparse
+import statistics
+import time
+
+from backend.deployment.processes import ProcessPlan, WeightedProcess
+
+
+class BenchmarkProcess(WeightedProcess):
+    APRIL_SERVER = "april-server", 1.0
+    POS_EXTRAPOLATOR = "position-extrapolator", 0.5
+    OBJECT_DETECTOR = "object-detector", 2.0
+    LIDAR_READER = "lidar-reader", 0.75
+
+
+# Process type -> its share of --instances and what one instance requires.
+INSTANCE_MIX: dict[BenchmarkProcess, tuple[float, dict[str, float]]] = {
+    BenchmarkProcess.APRIL_SERVER: (0.4, {"cpu": 0.5, "memory_mb": 150, "cameras": 1}),
+    BenchmarkProcess.POS_EXTRAPOLATOR: (0.3, {"cpu": 0.25, "memory_mb": 80}),
+    BenchmarkProcess.OBJECT_DETECTOR: (0.2, {"cpu": 1, "memory_mb": 400, "tpus": 1}),
+    BenchmarkProcess.LIDAR_READER: (0.1, {"cpu": 0.25, "memory_mb": 60}),
+}
+
+
+def build_plan(
+    hosts: int, instances: int, with_capacities: bool
+) -> ProcessPlan[BenchmarkProcess]:
+    plan = ProcessPlan[BenchmarkProcess]()
+    for process, (share, demand) in INSTANCE_MIX.items():
+        _ = plan.add(process, count=max(1, int(instances * share)))
+        if with_capacities:
+            _ = plan.requires(process, **demand)
+
+    if with_capacities:
+        # Sized so the fleet is close to full: every third Pi has a TPU.
+        per_host = instances / hosts
+        for index in range(hosts):
+            _ = plan.capacity(
+                f"pi{index}",
+                cpu=per_host * 0.55,
+                memory_mb=per_host * 190,
+                cameras=per_host * 0.5,
+                tpus=per_host * 0.6 if index % 3 == 0 else 0,
+            )
+    return plan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--hosts", type=int, default=48)
+    _ = parser.add_argument("--instances", type=int, default=5000)
+    _ = parser.add_argument("--count", type=int, default=5)
+    args = parser.parse_args()
+
+    pi_names = [f"pi{index}" for index in range(args.hosts)]
+    for label, with_capacities in (("weights", False), ("capacities", True)):
+        plan = build_plan(args.hosts, args.instances, with_capacities)
+        durations: list[float] = []
+        for _ in range(args.count):
+            started_at = time.perf_counter()
+            placement = plan.place(pi_names)
+            durations.append(time.perf_counter() - started_at)
+
+        placed = sum(len(assigned) for assigned in placement.assignments.values())
+        print(
+            f"{label:>10}: median {statistics.median(durations) * 1000:.1f} ms, "
+            f"max {max(durations) * 1000:.1f} ms over {args.count} runs; "
+            f"{placed} placed, {len(placement.unplaced)} unplaced"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures per-command latency of System.run_command with and without SSH
+connection multiplexing.
+
+Usage:
+    python -m benchmarks.ssh_command_latency --host nathan-hale.local \
+        --user ubuntu --password ubuntu --count 20
+"""
+
+import argparse
+import statistics
+
+from backend.deployment.network_api.system_api import System
+from backend.deployment.network_api.utils import FolderPath
+from backend.deployment.network_api.zeroconf import DiscoveredNetworkSystem
+
+
+def make_system(args: argparse.Namespace, multiplex_ssh: bool) -> System:
+    system = System(
+        general_info=DiscoveredNetworkSystem(
+            hostname=args.host,
+            system_name=args.host,
+            watchdog_port=5000,
+            autobahn_port=8080,
+            blitz_path=FolderPath("/opt/blitz/B.L.I.T.Z"),
+            machine_architecture="",
+            platform_description="",
+            python_major_version=3,
+            python_minor_version=0,
+        ),
+        password=args.password,
+        user=args.user,
+        ssh_port=args.port,
+        multiplex_ssh=multiplex_ssh,
+    )
+    return system
+
+
+def measure(args: argparse.Namespace, multiplex_ssh: bool) -> list[float]:
+    system = make_system(args, multiplex_ssh)
+    try:
+        for _ in range(args.count):
+            if not system.run_command("true"):
+                raise RuntimeError(f"Command failed on {args.host}")
+    finally:
+        system.close()
+    return [duration for _, duration in system.command_timings]
+
+
+def report(label: str, durations: list[float]) -> None:
+    print(
+        f"{label:>14}: n={len(durations)} "
+        f"first={durations[0] * 1000:.1f} ms "
+        f"median={statistics.median(durations) * 1000:.1f} ms "
+        f"mean={statistics.mean(durations) * 1000:.1f} ms "
+        f"max={max(durations) * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--host", required=True)
+    _ = parser.add_argument("--user", default="ubuntu")
+    _ = parser.add_argument("--password", default="ubuntu")
+    _ = parser.add_argument("--port", type=int, default=22)
+    _ = parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args()
+
+    report("per-command", measure(args, multiplex_ssh=False))
+    report("multiplexed", measure(args, multiplex_ssh=True))
+
+
+if __name__ == "__main__":
+    main()
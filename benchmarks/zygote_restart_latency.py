@@ -0,0 +1,82 @@
+"""
+Compares module (re)start latency of a fresh interpreter against a zygote fork.
+
+Each start runs a module that imports the preloaded libraries and exits, so
+the measured time covers interpreter startup, imports and process exit.
+
+Usage:
+    python -m benchmarks.zygote_restart_latency --preload numpy cv2 --count 10
+"""
+
+import argparse
+import os
+import shlex
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+from watchdog.process_starter import OpenedProcess
+from watchdog.zygote import ForkedProcess, get_zygote, stop_all_zygotes
+
+
+@dataclass
+class BenchmarkModule:
+    name: str
+    main_path: str
+    preload_modules: list[str]
+    extra_run_args: list[tuple[str, str]]
+
+    def get_interpreter_path(self) -> str:
+        return sys.executable
+
+    def get_entrypoint_path(self, _bundle_path: str) -> str:
+        return self.main_path
+
+    def get_extra_run_args(self) -> str:
+        return ""
+
+    def get_run_command(self, _bundle_path: str) -> str:
+        return f"{shlex.quote(sys.executable)} -u {shlex.quote(self.main_path)}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--preload", nargs="*", default=["json", "asyncio"])
+    _ = parser.add_argument("--count", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="blitz-zygote-bench-") as workdir:
+        main_path = os.path.join(workdir, "__main__.py")
+        with open(main_path, "w") as f:
+            _ = f.write("".join(f"import {name}\n" for name in args.preload))
+        module = BenchmarkModule("zygote-benchmark", main_path, args.preload, [])
+
+        def start_fresh() -> float:
+            started_at = time.perf_counter()
+            process = OpenedProcess.start_module(
+                module, "", {}  # pyright: ignore[reportArgumentType]
+            )
+            _ = process.wait()
+            return time.perf_counter() - started_at
+
+        def start_forked() -> float:
+            started_at = time.perf_counter()
+            _ = ForkedProcess.start_module(module, "", {}).wait()
+            return time.perf_counter() - started_at
+
+        get_zygote(module, "").ensure_started()
+        try:
+            for label, start in (("fresh", start_fresh), ("zygote", start_forked)):
+                durations = [start() for _ in range(args.count)]
+                print(
+                    f"{label:>6}: median {statistics.median(durations) * 1000:.1f} ms, "
+                    f"max {max(durations) * 1000:.1f} ms over {args.count} starts"
+                )
+        finally:
+            stop_all_zygotes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/bin/bash
+
+set -euo pipefail
+
+: "${BLITZ_PATH:=$(pwd)}"
+
+ENVS_PATH="${BLITZ_PATH}/envs/python"
+
+active="$(readlink "${ENVS_PATH}/active" || true)"
+previous="$(readlink "${ENVS_PATH}/previous" || true)"
+
+if [ -z "${previous}" ] || [ ! -d "${ENVS_PATH}/${previous}" ]; then
+    echo "Error: no previous Python environment to roll back to in ${ENVS_PATH}."
+    exit 1
+fi
+
+ln -sfn "${previous}" "${ENVS_PATH}/active.tmp"
+mv -Tf "${ENVS_PATH}/active.tmp" "${ENVS_PATH}/active"
+if [ -n "${active}" ]; then
+    ln -sfn "${active}" "${ENVS_PATH}/previous.tmp"
+    mv -Tf "${ENVS_PATH}/previous.tmp" "${ENVS_PATH}/previous"
+fi
+
+echo "Active Python environment is now ${previous} (was ${active:-none})."
+echo "Processes pick it up the next time they start."
@@ -2,10 +2,8 @@ import asyncio
 import os
 import threading
 
-from flask import Flask
-
-from watchdog.routes.getters import GETTERS_BP
-from watchdog.routes.setters import SETTERS_BP
+from watchdog.api import create_app, start_api
+from watchdog.config_store import sync_decoded_config
 from watchdog.util.logger import LogLevel, error, init_logging, success
 from autobahn_client.client import Autobahn
 from autobahn_client.util import Address
@@ -18,9 +16,6 @@ from watchdog.discovery import enable_discovery
 from watchdog.helper import process_watcher, setup_ping_pong
 from watchdog.monitor import ProcessMonitor
 
-app = Flask(__name__)
-app.register_blueprint(GETTERS_BP)
-app.register_blueprint(SETTERS_BP)
 process_monitor: ProcessMonitor | None = None
 
 try:
@@ -32,8 +27,6 @@ except FileNotFoundError:
 
 MANAGED_PROCESS_STATE_FILE = SYSTEM_CONFIG.watchdog_api.managed_process_state_file
 DESIRED_CONFIG_BASE64_FILE = SYSTEM_CONFIG.desired_config_base64_path
-app.config["SYSTEM_NAME"] = SYSTEM_NAME
-app.config["DESIRED_CONFIG_BASE64_FILE"] = DESIRED_CONFIG_BASE64_FILE
 
 
 async def main():
@@ -44,6 +37,7 @@ async def main():
         os.makedirs(os.path.dirname(DESIRED_CONFIG_BASE64_FILE), exist_ok=True)
         with open(DESIRED_CONFIG_BASE64_FILE, "w") as f:
             _ = f.write("")
+    _ = sync_decoded_config(DESIRED_CONFIG_BASE64_FILE)
 
     autobahn_server = Autobahn(
         Address(
@@ -58,7 +52,6 @@ async def main():
         DESIRED_CONFIG_BASE64_FILE,
         asyncio.get_running_loop(),
     )
-    app.extensions["process_monitor"] = process_monitor
 
     init_logging(
         "WATCHDOG",
@@ -72,28 +65,22 @@ async def main():
 
     await setup_ping_pong(autobahn_server, SYSTEM_NAME)
 
-    _ = asyncio.create_task(process_watcher(SYSTEM_CONFIG))
+    _ = asyncio.create_task(process_watcher(SYSTEM_CONFIG, process_monitor))
     success("Process watcher started!")
 
     discovery_thread = threading.Thread(target=enable_discovery, daemon=True)
     discovery_thread.start()
     success("Discovery enabled!")
 
-    flask_thread = threading.Thread(
-        target=app.run,
-        kwargs={
-            "host": SYSTEM_CONFIG.watchdog_api.api_host,
-            "port": SYSTEM_CONFIG.watchdog_api.api_port,
-            "debug": False,
-        },
-        daemon=True,
+    app = create_app(process_monitor, SYSTEM_NAME, DESIRED_CONFIG_BASE64_FILE)
+    _ = await start_api(
+        app,
+        SYSTEM_CONFIG.watchdog_api.api_host,
+        SYSTEM_CONFIG.watchdog_api.api_port,
     )
-    flask_thread.start()
-    success("Flask app started!")
-
-    await asyncio.sleep(1)
+    success("API server started!")
 
-    process_monitor._restore_processes_from_memory()
+    _ = await process_monitor.restore_processes_from_memory()
 
     _ = await asyncio.Event().wait()
 
@@ -0,0 +1,67 @@
+import subprocess
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from watchdog.accounting import AccountingTarget, ProcessAccountant
+
+
+def write_cgroup(path: Path, usage_usec: int) -> None:
+    path.mkdir(exist_ok=True)
+    _ = (path / "cpu.stat").write_text(
+        f"usage_usec {usage_usec}\nuser_usec 0\nsystem_usec 0\n"
+    )
+    _ = (path / "memory.current").write_text("52428800\n")
+    _ = (path / "memory.stat").write_text("anon 31457280\nfile 20971520\nkernel 0\n")
+    _ = (path / "cgroup.threads").write_text("10\n11\n12\n")
+    _ = (path / "io.stat").write_text(
+        "259:0 rbytes=4096 wbytes=8192 rios=1 wios=2 dbytes=0 dios=0\n"
+        "8:0 rbytes=1024 wbytes=0 rios=1 wios=0 dbytes=0 dios=0\n"
+    )
+
+
+def test_cgroup_usage_and_cpu_percent_between_samples(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    cgroup = tmp_path / "camera"
+    target = AccountingTarget(name="camera", pid=10, cgroup=str(cgroup))
+    accountant = ProcessAccountant()
+    now = 100.0
+    monkeypatch.setattr("watchdog.accounting.time.monotonic", lambda: now)
+
+    write_cgroup(cgroup, usage_usec=1_000_000)
+    [first] = accountant.sample([target])
+    now += 2.0
+    write_cgroup(cgroup, usage_usec=2_500_000)
+    [second] = accountant.sample([target])
+
+    assert first.from_cgroup
+    assert first.cpu_usage == 0.0
+    assert second.cpu_time_us == 2_500_000
+    assert second.cpu_usage == 75.0
+    assert second.memory_bytes == 50 * 1024 * 1024
+    assert second.resident_bytes == 30 * 1024 * 1024
+    assert second.threads == 3
+    assert (second.io_read_bytes, second.io_write_bytes) == (5120, 8192)
+
+
+def test_falls_back_to_process_tree_without_cgroup(tmp_path: Path):
+    process = subprocess.Popen(["sleep", "30"])
+    try:
+        targets = [
+            AccountingTarget(
+                name="sleeper", pid=process.pid, cgroup=str(tmp_path / "gone")
+            ),
+            AccountingTarget(name="dead", pid=2**22 + 1, cgroup=None),
+        ]
+
+        [usage] = ProcessAccountant().sample(targets)
+    finally:
+        process.kill()
+        _ = process.wait()
+
+    assert usage.name == "sleeper"
+    assert not usage.from_cgroup
+    assert usage.memory_bytes > 0
+    assert usage.resident_bytes == usage.memory_bytes
+    assert usage.threads >= 1
@@ -0,0 +1,260 @@
+import asyncio
+import base64
+import hashlib
+import zlib
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from aiohttp.test_utils import TestClient, TestServer
+from pytest import MonkeyPatch
+
+from watchdog import bundle_relay
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    make_monitor,
+)
+from watchdog.api import create_app
+from watchdog.monitor import ProcessMonitor
+
+
+def run_with_client(
+    process_monitor: ProcessMonitor,
+    config_file: Path,
+    test: Callable[[TestClient], Awaitable[None]],
+) -> None:
+    async def run() -> None:
+        app = create_app(process_monitor, "test-pi", str(config_file))
+        async with TestClient(TestServer(app)) as client:
+            await test(client)
+
+    asyncio.run(run())
+
+
+def test_status_and_set_processes_are_served_from_the_monitor_loop(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    deployment_modules = FakeDeploymentModules({"camera": [FakeProcess()]})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+
+    async def test(client: TestClient) -> None:
+        response = await client.post(
+            "/set/processes", json={"process_types": ["camera"]}
+        )
+        assert response.status == 200
+
+        response = await client.post("/set/processes", data="not json")
+        assert response.status == 400
+
+        response = await client.get("/get/system/status")
+        assert response.status == 200
+        assert "Server-Timing" in response.headers
+        status = await response.json()
+        assert status["system_info"] == "test-pi"
+        assert status["active_processes"] == ["camera"]
+
+        timings = await (await client.get("/get/api/timings")).json()
+        assert timings["routes"]["POST /set/processes"]["count"] == 2
+        assert timings["routes"]["GET /get/system/status"]["count"] == 1
+
+    run_with_client(process_monitor, tmp_path / "config.txt", test)
+    assert process_monitor.process_mem == ["camera"]
+
+
+def test_concurrent_requests_are_not_blocked_by_a_slow_handler(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    process_monitor, _ = make_monitor(tmp_path, FakeDeploymentModules(), monkeypatch)
+    release = asyncio.Event()
+
+    async def slow_command(_command: object) -> None:
+        _ = await release.wait()
+
+    monkeypatch.setattr(process_monitor, "run_command", slow_command)
+
+    async def test(client: TestClient) -> None:
+        stop_all = asyncio.create_task(client.post("/stop/all/processes"))
+        await asyncio.sleep(0.05)
+
+        response = await asyncio.wait_for(client.get("/get/system/status"), 5)
+        assert response.status == 200
+        assert not stop_all.done()
+
+        release.set()
+        assert (await stop_all).status == 200
+
+    run_with_client(process_monitor, tmp_path / "config.txt", test)
+
+
+def test_bundle_receive_streams_body_to_disk(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(bundle_relay, "BLITZ_PATH", str(tmp_path))
+    process_monitor, _ = make_monitor(tmp_path, FakeDeploymentModules(), monkeypatch)
+    content = b"bundle" * 100_000
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    async def test(client: TestClient) -> None:
+        response = await client.post(
+            "/bundle/receive",
+            params={"path": "bundles/a.zip", "sha256": sha256},
+            data=content,
+        )
+        assert response.status == 200
+
+        response = await client.get(
+            "/get/bundle/hash", params={"path": "bundles/a.zip"}
+        )
+        assert (await response.json())["sha256"] == sha256
+
+        response = await client.post(
+            "/bundle/receive",
+            params={"path": "watchdog/api.py", "sha256": sha256},
+            data=content,
+        )
+        assert response.status == 400
+
+        port = client.port
+        for url in (f"http://127.0.0.1:{port}", "http://10.0.0.5:6379"):
+            response = await client.post(
+                "/bundle/relay",
+                json={
+                    "path": "bundles/a.zip",
+                    "sha256": sha256,
+                    "targets": [{"url": url, "path": "bundles/a.zip"}],
+                },
+            )
+            assert response.status == 400
+
+    run_with_client(process_monitor, tmp_path / "config.txt", test)
+    assert (tmp_path / "bundles" / "a.zip").read_bytes() == content
+    assert not (tmp_path / "watchdog").exists()
+
+
+def test_apply_restarts_each_process_at_most_once(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(bundle_relay, "BLITZ_PATH", str(tmp_path))
+    bundle = tmp_path / "bundles" / "a.zip"
+    bundle.parent.mkdir()
+    _ = bundle.write_bytes(b"bundle")
+    sha256 = hashlib.sha256(b"bundle").hexdigest()
+    first_camera, second_camera = FakeProcess(pid=-2), FakeProcess(pid=-3)
+    deployment_modules = FakeDeploymentModules(
+        {
+            "camera": [first_camera, second_camera],
+            "localization": [FakeProcess(pid=-4)],
+        }
+    )
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    asyncio.run(process_monitor.start_and_monitor_process("camera"))
+
+    async def apply(config_base64: str, bundle_sha256: str) -> tuple[int, dict]:
+        response = await client.post(
+            "/apply",
+            json={
+                "config_base64": config_base64,
+                "process_types": ["camera", "localization"],
+                "bundle": {"path": "bundles/a.zip", "sha256": bundle_sha256},
+            },
+        )
+        return response.status, await response.json()
+
+    async def test(test_client: TestClient) -> None:
+        nonlocal client
+        client = test_client
+
+        status, body = await apply("bmV3", "0" * 64)
+        assert status == 409
+        assert body["sha256"] == sha256
+
+        status, body = await apply("bmV3", sha256)
+        assert status == 200
+        assert body["config_changed"]
+        assert sorted(body["active_processes"]) == ["camera", "localization"]
+
+        status, body = await apply("bmV3", sha256)
+        assert status == 200
+        assert not body["config_changed"]
+
+    client: TestClient
+    run_with_client(process_monitor, Path(process_monitor.config_path), test)
+
+    assert Path(process_monitor.config_path).read_text() == "bmV3"
+    assert first_camera.stop_calls == 1
+    assert second_camera.stop_calls == 0
+    assert sorted(name for name, _, _ in deployment_modules.started) == [
+        "camera",
+        "camera",
+        "localization",
+    ]
+
+
+def test_set_config_only_refreshes_processes_when_it_changed(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    process_monitor, _ = make_monitor(tmp_path, FakeDeploymentModules(), monkeypatch)
+    refreshes = 0
+
+    async def count_refresh() -> None:
+        nonlocal refreshes
+        refreshes += 1
+
+    monkeypatch.setattr(process_monitor, "refresh_config", count_refresh)
+
+    async def test(client: TestClient) -> None:
+        for expected_change in (True, False):
+            response = await client.post("/set/config", json={"config_base64": "bmV3"})
+            assert response.status == 200
+            assert (await response.json())["config_changed"] is expected_change
+
+    run_with_client(process_monitor, tmp_path / "config.txt", test)
+
+    assert refreshes == 1
+
+
+def test_binary_config_upload_is_negotiated_by_hash(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    deployment_modules = FakeDeploymentModules({"camera": [FakeProcess()]})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    config = b'{"april_tags": []}' * 1000
+    sha256 = hashlib.sha256(config).hexdigest()
+
+    async def test(client: TestClient) -> None:
+        response = await client.get("/get/config/hash")
+        assert (await response.json())["sha256"] != sha256
+
+        response = await client.post(
+            "/set/config/binary",
+            params={"sha256": "0" * 64},
+            data=zlib.compress(config),
+        )
+        assert response.status == 400
+
+        response = await client.post(
+            "/set/config/binary",
+            params={"sha256": sha256, "stage": "1"},
+            data=zlib.compress(config),
+        )
+        assert response.status == 200
+        response = await client.get("/get/config/hash")
+        assert (await response.json())["sha256"] != sha256
+
+        response = await client.post(
+            "/apply", json={"config_sha256": sha256, "process_types": ["camera"]}
+        )
+        assert response.status == 200
+        assert (await response.json())["config_changed"]
+        response = await client.get("/get/config/hash")
+        assert (await response.json())["sha256"] == sha256
+
+        response = await client.post(
+            "/apply", json={"config_sha256": "0" * 64, "process_types": ["camera"]}
+        )
+        assert response.status == 409
+
+    run_with_client(process_monitor, Path(process_monitor.config_path), test)
+
+    assert Path(process_monitor.config_path).read_text() == (
+        base64.b64encode(config).decode()
+    )
+    assert process_monitor.get_active_processes() == ["camera"]
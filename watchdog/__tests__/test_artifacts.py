@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from collections.abc import Collection
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    make_monitor,
+)
+from watchdog.artifacts import ArtifactHasher
+
+
+def write_module(bundle_path: Path, name: str, source: str) -> Path:
+    module_path = bundle_path / "fake" / name
+    module_path.mkdir(parents=True, exist_ok=True)
+    _ = (module_path / "main.py").write_text(source)
+    return module_path
+
+
+def test_tree_hash_follows_contents_but_not_bytecode(tmp_path: Path):
+    module_path = write_module(tmp_path, "camera", "print(1)")
+    hasher = ArtifactHasher()
+
+    first = hasher.tree_hash(str(module_path))
+    assert first is not None
+    (module_path / "__pycache__").mkdir()
+    _ = (module_path / "__pycache__" / "main.pyc").write_bytes(b"bytecode")
+    assert hasher.tree_hash(str(module_path)) == first
+    assert hasher.tree_hash(str(tmp_path / "missing")) is None
+
+    _ = (module_path / "main.py").write_text("print(2)")
+    assert hasher.tree_hash(str(module_path), max_age_seconds=60) == first
+    assert hasher.tree_hash(str(module_path)) != first
+
+
+def test_only_processes_with_changed_artifacts_are_restarted(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    bundle_path = tmp_path / "bundle"
+    monkeypatch.setattr("watchdog.monitor.BUNDLE_FOLDER_PATH", str(bundle_path))
+    camera_path = write_module(bundle_path, "camera", "print('camera')")
+    _ = write_module(bundle_path, "localization", "print('localization')")
+    first_camera, localization = FakeProcess(pid=-2), FakeProcess(pid=-3)
+    deployment_modules = FakeDeploymentModules(
+        {
+            "camera": [first_camera, FakeProcess(pid=-4)],
+            "localization": [localization],
+        }
+    )
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    asyncio.run(process_monitor.set_processes(["camera", "localization"]))
+    assert asyncio.run(process_monitor.get_pending_restarts(max_age_seconds=0)) == {}
+
+    _ = (camera_path / "main.py").write_text("print('new camera')")
+    assert asyncio.run(process_monitor.get_pending_restarts(max_age_seconds=0)) == {
+        "camera": ["artifacts"]
+    }
+
+    assert asyncio.run(process_monitor.restart_changed_processes()) == ["camera"]
+    assert first_camera.stop_calls == 1
+    assert localization.stop_calls == 0
+    assert asyncio.run(process_monitor.get_pending_restarts(max_age_seconds=0)) == {}
+    assert [name for name, _, _ in deployment_modules.started].count("camera") == 2
+
+
+def test_shared_bundle_changes_restart_every_process(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    bundle_path = tmp_path / "bundle"
+    monkeypatch.setattr("watchdog.monitor.BUNDLE_FOLDER_PATH", str(bundle_path))
+    camera_path = write_module(bundle_path, "camera", "print('camera')")
+    _ = write_module(bundle_path, "localization", "print('localization')")
+    library = bundle_path / "link" / "shared.py"
+    library.parent.mkdir()
+    _ = library.write_text("VERSION = 1")
+    deployment_modules = FakeDeploymentModules(
+        {"camera": [FakeProcess(pid=-2)], "localization": [FakeProcess(pid=-3)]}
+    )
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    asyncio.run(process_monitor.set_processes(["camera", "localization"]))
+
+    # Rewriting the bundle with the same contents, as every deploy does, is
+    # not a change.
+    _ = library.write_text("VERSION = 1")
+    _ = (camera_path / "main.py").write_text("print('camera')")
+    assert asyncio.run(process_monitor.get_pending_restarts(max_age_seconds=0)) == {}
+
+    _ = library.write_text("VERSION = 2")
+    assert asyncio.run(process_monitor.get_pending_restarts(max_age_seconds=0)) == {
+        "camera": ["bundle"],
+        "localization": ["bundle"],
+    }
+
+
+def test_pending_restarts_are_hashed_off_the_loop(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    bundle_path = tmp_path / "bundle"
+    monkeypatch.setattr("watchdog.monitor.BUNDLE_FOLDER_PATH", str(bundle_path))
+    _ = write_module(bundle_path, "camera", "print('camera')")
+    deployment_modules = FakeDeploymentModules({"camera": [FakeProcess(pid=-2)]})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    asyncio.run(process_monitor.set_processes(["camera"]))
+    hashed_on: list[threading.Thread] = []
+    tree_hash = ArtifactHasher.tree_hash
+
+    def record_thread(
+        hasher: ArtifactHasher,
+        root: str,
+        max_age_seconds: float = 0.0,
+        exclude: Collection[str] = (),
+    ) -> str | None:
+        hashed_on.append(threading.current_thread())
+        return tree_hash(hasher, root, max_age_seconds, exclude)
+
+    monkeypatch.setattr(ArtifactHasher, "tree_hash", record_thread)
+
+    async def pending() -> threading.Thread:
+        assert await process_monitor.get_pending_restarts(max_age_seconds=0) == {}
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(pending())
+
+    # The module's own files and the rest of the bundle.
+    assert len(hashed_on) == 2
+    assert all(thread is not loop_thread for thread in hashed_on)
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from watchdog import bundle_relay
+from watchdog.bundle_relay import RelayError, resolve_relay_path, store_bundle_async
+
+
+def test_resolve_relay_path_only_accepts_zips_in_the_staging_dir(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr(bundle_relay, "BLITZ_PATH", str(tmp_path))
+    staging = tmp_path / "bundles"
+    staging.mkdir()
+    (staging / "escape.zip").symlink_to(tmp_path / "watchdog" / "api.zip")
+
+    assert resolve_relay_path("bundles/a.zip") == str(staging / "a.zip")
+    assert resolve_relay_path(str(staging / "b.zip")) == str(staging / "b.zip")
+    for path in (
+        "../outside.zip",
+        "b.zip",
+        "watchdog/api.py",
+        "bundles/a.py",
+        "bundles",
+        "bundles/escape.zip",
+        ".venv/bin/python",
+    ):
+        with pytest.raises(RelayError):
+            _ = resolve_relay_path(path)
+
+
+def test_store_bundle_only_replaces_file_when_hash_matches(tmp_path: Path):
+    destination = tmp_path / "bundles" / "a.zip"
+    content = b"bundle contents"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    async def store(data: bytes) -> None:
+        async def chunks() -> AsyncIterator[bytes]:
+            for start in range(0, len(data), 4):
+                yield data[start : start + 4]
+
+        await store_bundle_async(str(destination), chunks(), sha256)
+
+    with pytest.raises(RelayError):
+        asyncio.run(store(b"corrupt"))
+    assert list((tmp_path / "bundles").iterdir()) == []
+
+    asyncio.run(store(content))
+    assert destination.read_bytes() == content
+    assert list((tmp_path / "bundles").iterdir()) == [destination]
+
+
+def test_relay_timeout_covers_every_hop_below_the_target():
+    mib = 1024 * 1024
+    leaf: dict[str, object] = {"url": "http://c:5000", "children": []}
+    tree: list[dict[str, object]] = [
+        {"url": "http://a:5000", "children": [leaf, dict(leaf)]},
+        {"url": "http://b:5000", "children": []},
+    ]
+
+    assert bundle_relay.relay_timeout(0, []) == 0
+    assert bundle_relay.relay_timeout(0, tree) == (
+        2 * bundle_relay.RELAY_HOP_TIMEOUT_SECONDS
+    )
+    assert bundle_relay.relay_timeout(10 * mib, tree) == 2 * (
+        bundle_relay.RELAY_HOP_TIMEOUT_SECONDS + 20
+    )
+
+
+def test_relay_targets_must_be_watchdogs_on_other_hosts():
+    def target(url: str, *children: dict[str, object]) -> dict[str, object]:
+        return {"url": url, "path": "bundles/a.zip", "children": list(children)}
+
+    bundle_relay.check_relay_targets(
+        [target("http://10.0.0.5:5000/", target("http://pi-2.local:5000"))], 5000
+    )
+    for url in (
+        "http://10.0.0.5:6379",
+        "http://10.0.0.5",
+        "https://10.0.0.5:5000",
+        "http://10.0.0.5:5000/admin",
+        "http://10.0.0.5:5000/?next=1",
+        "http://user@10.0.0.5:5000",
+        "http://127.0.0.1:5000",
+        "http://localhost:5000",
+        "http://[::1]:5000",
+        "http://0.0.0.0:5000",
+    ):
+        with pytest.raises(RelayError):
+            bundle_relay.check_relay_targets(
+                [target("http://10.0.0.5:5000", target(url))], 5000
+            )
+    with pytest.raises(RelayError):
+        bundle_relay.check_relay_targets([{"url": "http://10.0.0.5:5000"}], 5000)
+
+
+def test_relay_bundle_without_targets_does_nothing(tmp_path: Path):
+    assert bundle_relay.relay_bundle(str(tmp_path / "a.zip"), "", []) == []
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    as_opened_process,
+    make_monitor,
+)
+from watchdog.commands import CommandKind, MonitorCommand, MonitorCommandQueue
+
+
+def test_desired_state_commands_merge_into_one_set():
+    set_ab = MonitorCommand(CommandKind.SET_PROCESSES, ["a", "b"])
+    start_c = MonitorCommand(CommandKind.START_PROCESSES, ["c"])
+    stop_a = MonitorCommand(CommandKind.STOP_PROCESSES, ["a"])
+
+    merged = set_ab.merge(start_c)
+    assert merged is not None
+    merged = merged.merge(stop_a)
+    assert merged == MonitorCommand(CommandKind.SET_PROCESSES, ["b", "c"])
+    assert start_c.merge(set_ab) is set_ab
+    assert set_ab.merge(MonitorCommand(CommandKind.REFRESH_CONFIG)) is None
+    assert MonitorCommand(CommandKind.STOP_ALL).merge(set_ab) is None
+
+
+def test_apply_keeps_restart_across_merges():
+    apply_ab = MonitorCommand(CommandKind.APPLY, ["a", "b"], restart_running=True)
+    set_b = MonitorCommand(CommandKind.SET_PROCESSES, ["b"])
+
+    merged = apply_ab.merge(set_b)
+    assert merged == MonitorCommand(CommandKind.APPLY, ["b"], restart_running=True)
+    assert merged is not None
+    merged = merged.merge(MonitorCommand(CommandKind.START_PROCESSES, ["c"]))
+    assert merged == MonitorCommand(CommandKind.APPLY, ["b", "c"], restart_running=True)
+
+
+def test_burst_of_commands_runs_as_one_reconciliation():
+    executed: list[MonitorCommand] = []
+
+    async def execute(command: MonitorCommand) -> None:
+        executed.append(command)
+
+    queue = MonitorCommandQueue(execute)
+
+    async def burst() -> None:
+        await asyncio.gather(
+            queue.submit(MonitorCommand(CommandKind.SET_PROCESSES, ["a"])),
+            queue.submit(MonitorCommand(CommandKind.SET_PROCESSES, ["a", "b"])),
+            queue.submit(MonitorCommand(CommandKind.START_PROCESSES, ["c"])),
+            queue.submit(MonitorCommand(CommandKind.REFRESH_CONFIG)),
+        )
+
+    asyncio.run(burst())
+
+    assert executed == [
+        MonitorCommand(CommandKind.SET_PROCESSES, ["a", "b", "c"]),
+        MonitorCommand(CommandKind.REFRESH_CONFIG),
+    ]
+
+
+def test_failed_command_raises_for_every_merged_submitter():
+    async def fail(_command: MonitorCommand) -> None:
+        raise RuntimeError("boom")
+
+    queue = MonitorCommandQueue(fail)
+
+    async def burst() -> list[BaseException | None]:
+        return await asyncio.gather(
+            queue.submit(MonitorCommand(CommandKind.STOP_PROCESSES, ["a"])),
+            queue.submit(MonitorCommand(CommandKind.STOP_PROCESSES, ["b"])),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(burst())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def cancel_other_tasks() -> None:
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            _ = task.cancel()
+
+
+def test_run_command_executes_on_the_handlers_loop(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    process_monitor, _ = make_monitor(
+        tmp_path, FakeDeploymentModules({"camera": [FakeProcess()]}), monkeypatch
+    )
+    executed_on: list[asyncio.AbstractEventLoop] = []
+    execute = process_monitor.execute_command
+
+    async def record_loop(command: MonitorCommand) -> None:
+        executed_on.append(asyncio.get_running_loop())
+        await execute(command)
+
+    monkeypatch.setattr(process_monitor.commands, "_execute", record_loop)
+
+    async def handle_requests() -> asyncio.AbstractEventLoop:
+        await process_monitor.run_command(
+            MonitorCommand(CommandKind.SET_PROCESSES, ["camera"])
+        )
+        assert "camera" in process_monitor.processes
+        await process_monitor.run_command(
+            MonitorCommand(CommandKind.STOP_PROCESSES, ["camera"])
+        )
+        await cancel_other_tasks()
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(handle_requests())
+
+    assert executed_on == [loop, loop]
+    assert "camera" not in process_monitor.processes
+
+
+class SlowStoppingProcess(FakeProcess):
+    def stop(self) -> None:
+        time.sleep(0.5)
+        super().stop()
+
+
+def test_loop_stays_responsive_while_a_process_stops(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    process_monitor, _ = make_monitor(tmp_path, FakeDeploymentModules(), monkeypatch)
+    process = SlowStoppingProcess()
+    process_monitor.processes["camera"] = as_opened_process(process)
+    process_monitor.process_mem.append("camera")
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    async def stop() -> None:
+        ticker = asyncio.create_task(tick())
+        await process_monitor.run_command(
+            MonitorCommand(CommandKind.STOP_PROCESSES, ["camera"])
+        )
+        _ = ticker.cancel()
+
+    asyncio.run(stop())
+
+    assert process.stop_calls == 1
+    assert "camera" not in process_monitor.processes
+    assert ticks >= 10
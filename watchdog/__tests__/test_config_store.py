@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from watchdog.config_store import (
+    STAGED_CONFIG_MAX_AGE_SECONDS,
+    ConfigUploadError,
+    install_config,
+    promote_staged_config,
+    stage_config,
+    staged_config_path,
+    sync_decoded_config,
+)
+from watchdog.ext.managed_process import ConfigCache, decoded_config_path
+
+
+def test_config_cache_maps_decoded_config_and_notices_new_generations(
+    tmp_path: Path,
+):
+    config_path = str(tmp_path / "config.txt")
+    assert install_config(config_path, b"first")
+    assert Path(config_path).read_text() == base64.b64encode(b"first").decode()
+
+    cache = ConfigCache(config_path)
+    assert cache.generation == 1
+    assert bytes(cache.data) == b"first"
+
+    assert not install_config(config_path, b"first")
+    assert not cache.refresh()
+
+    assert install_config(config_path, b"second config")
+    assert cache.refresh()
+    assert cache.generation == 2
+    assert bytes(cache.data) == b"second config"
+    assert not cache.refresh()
+
+
+def test_config_cache_falls_back_to_base64_file(tmp_path: Path):
+    config_path = tmp_path / "config.txt"
+    _ = config_path.write_text(base64.b64encode(b"legacy").decode())
+
+    cache = ConfigCache(str(config_path))
+    assert cache.generation == 0
+    assert bytes(cache.data) == b"legacy"
+
+    assert sync_decoded_config(str(config_path)) == 1
+    assert Path(decoded_config_path(str(config_path))).exists()
+    assert cache.refresh()
+    assert bytes(cache.data) == b"legacy"
+
+
+def test_each_staged_upload_keeps_its_own_file_until_applied(tmp_path: Path):
+    config_path = str(tmp_path / "config.txt")
+    first, second = b"first", b"second"
+    first_sha256 = hashlib.sha256(first).hexdigest()
+    second_sha256 = hashlib.sha256(second).hexdigest()
+
+    stage_config(config_path, first_sha256, first)
+    stage_config(config_path, second_sha256, second)
+    assert promote_staged_config(config_path, first_sha256)
+    assert Path(config_path).read_text() == base64.b64encode(first).decode()
+    assert not Path(staged_config_path(config_path, first_sha256)).exists()
+
+    assert promote_staged_config(config_path, second_sha256)
+    assert Path(config_path).read_text() == base64.b64encode(second).decode()
+    assert not promote_staged_config(config_path, second_sha256)
+    with pytest.raises(ConfigUploadError):
+        _ = promote_staged_config(config_path, first_sha256)
+    with pytest.raises(ConfigUploadError):
+        _ = promote_staged_config(config_path, "../../etc/passwd")
+
+
+def test_staging_removes_uploads_that_were_never_applied(tmp_path: Path):
+    config_path = str(tmp_path / "config.txt")
+    old_sha256 = hashlib.sha256(b"old").hexdigest()
+    stage_config(config_path, old_sha256, b"old")
+    old_path = staged_config_path(config_path, old_sha256)
+    expired = os.path.getmtime(old_path) - STAGED_CONFIG_MAX_AGE_SECONDS - 1
+    os.utime(old_path, (expired, expired))
+
+    stage_config(config_path, hashlib.sha256(b"new").hexdigest(), b"new")
+
+    assert not Path(old_path).exists()
+    assert len(list(tmp_path.glob("config.txt.staged-*"))) == 1
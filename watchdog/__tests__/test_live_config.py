@@ -0,0 +1,95 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from typing import cast
+
+from pytest import MonkeyPatch
+
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    as_opened_process,
+    make_monitor,
+)
+from watchdog.config_store import install_config
+from watchdog.live_config import ConfigNotifyChannel
+
+LIVE_CONFIG_SCRIPT = """
+import sys
+
+from watchdog.ext.managed_process import ConfigCache
+
+config = ConfigCache(sys.argv[1])
+print(bytes(config.data).decode(), flush=True)
+assert config.wait_for_update(5)
+print(config.generation, bytes(config.data).decode(), flush=True)
+"""
+
+
+def test_module_reloads_config_when_notified(tmp_path: Path):
+    config_path = str(tmp_path / "config.txt")
+    _ = install_config(config_path, b"exposure=10")
+    channel = ConfigNotifyChannel.create("camera")
+    try:
+        # Nothing is listening yet.
+        assert not channel.notify(1)
+
+        module = subprocess.Popen(
+            [sys.executable, "-c", LIVE_CONFIG_SCRIPT, config_path],
+            env={**channel.env(), "PYTHONPATH": str(Path.cwd())},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        assert module.stdout is not None
+        assert module.stdout.readline().strip() == "exposure=10"
+
+        _ = install_config(config_path, b"exposure=20")
+        assert channel.notify(2)
+        stdout, _ = module.communicate(timeout=5)
+        assert stdout.strip() == "2 exposure=20"
+        assert module.returncode == 0
+    finally:
+        channel.close()
+
+
+class FakeNotifyChannel:
+    def __init__(self, listening: bool):
+        self.listening: bool = listening
+        self.generations: list[int] = []
+        self.closed: bool = False
+
+    def notify(self, generation: int) -> bool:
+        self.generations.append(generation)
+        return self.listening
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_refresh_config_restarts_only_processes_without_live_config(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    replacement = FakeProcess()
+    deployment_modules = FakeDeploymentModules(
+        {"camera": [], "localization": [replacement]}
+    )
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    camera, localization = FakeProcess(pid=-2), FakeProcess(pid=-3)
+    channel = FakeNotifyChannel(listening=True)
+    process_monitor.processes["camera"] = as_opened_process(camera)
+    process_monitor.processes["localization"] = as_opened_process(localization)
+    process_monitor.process_mem.replace(["camera", "localization"])
+    process_monitor.config_channels[camera.pid] = cast(
+        ConfigNotifyChannel, cast(object, channel)
+    )
+
+    _ = install_config(process_monitor.config_path, b"exposure=20")
+    asyncio.run(process_monitor.refresh_config())
+
+    assert channel.generations == [1]
+    assert camera.stop_calls == 0
+    assert process_monitor.processes["camera"] is camera
+    assert localization.stop_calls == 1
+    assert process_monitor.processes["localization"] is replacement
+    assert [name for name, _, _ in deployment_modules.started] == ["localization"]
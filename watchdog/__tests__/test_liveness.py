@@ -0,0 +1,128 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from backend.deployment.module.base import LivenessCheck, LivenessMode
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    as_opened_process,
+    make_monitor,
+)
+from watchdog.accounting import AccountingTarget, ProcessUsage
+from watchdog.liveness import HeartbeatServer, LivenessTracker
+
+HEARTBEAT_SCRIPT = """
+import time
+from watchdog.ext.managed_process import heartbeat
+
+for _ in range(5):
+    heartbeat()
+    time.sleep(0.11)
+"""
+
+
+@pytest.fixture
+def heartbeats(tmp_path: Path) -> Iterator[HeartbeatServer]:
+    server = HeartbeatServer(str(tmp_path / "heartbeat.sock"))
+    yield server
+    server.close()
+
+
+def test_heartbeats_keep_process_alive_until_they_stop(heartbeats: HeartbeatServer):
+    check = LivenessCheck(timeout_seconds=0.3, startup_grace_seconds=0.0)
+    tracker = LivenessTracker(check, heartbeats)
+
+    module = subprocess.run(
+        [sys.executable, "-c", HEARTBEAT_SCRIPT],
+        env={**tracker.env(), "PYTHONPATH": str(Path.cwd())},
+        check=True,
+    )
+    assert module.returncode == 0
+    assert tracker.stalled_for() is None
+
+    time.sleep(0.4)
+    stalled_seconds = tracker.stalled_for()
+    assert stalled_seconds is not None and stalled_seconds > 0.3
+
+
+def test_monitor_restarts_stalled_process_and_records_event(
+    tmp_path: Path, monkeypatch: MonkeyPatch, heartbeats: HeartbeatServer
+):
+    class StopMonitor(Exception):
+        pass
+
+    sleep_calls = 0
+
+    async def fake_sleep(_seconds: float) -> None:
+        nonlocal sleep_calls
+        sleep_calls += 1
+        if sleep_calls > 1:
+            raise StopMonitor
+
+    hung = FakeProcess(alive=True)
+    replacement = FakeProcess(alive=True)
+    process_monitor, _ = make_monitor(
+        tmp_path, FakeDeploymentModules({"camera": [replacement]}), monkeypatch
+    )
+    process_monitor.processes["camera"] = as_opened_process(hung)
+    process_monitor.process_mem.append("camera")
+    check = LivenessCheck(
+        mode=LivenessMode.HEARTBEAT, timeout_seconds=0.0, startup_grace_seconds=0.0
+    )
+    process_monitor.liveness[hung.pid] = LivenessTracker(check, heartbeats)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    try:
+        asyncio.run(process_monitor.monitor_process("camera"))
+    except StopMonitor:
+        pass
+
+    assert hung.stop_calls >= 1
+    assert process_monitor.processes["camera"] is replacement
+    [event] = process_monitor.get_stall_events()["camera"]
+    assert event["mode"] == "heartbeat"
+
+
+def test_cpu_time_is_sampled_off_the_loop_once_per_interval(
+    tmp_path: Path, monkeypatch: MonkeyPatch, heartbeats: HeartbeatServer
+):
+    process = FakeProcess(alive=True)
+    process_monitor, _ = make_monitor(tmp_path, FakeDeploymentModules(), monkeypatch)
+    check = LivenessCheck(mode=LivenessMode.CPU_TIME, startup_grace_seconds=60.0)
+    process_monitor.liveness[process.pid] = LivenessTracker(check, heartbeats)
+    sampled_on: list[threading.Thread] = []
+
+    def read_usage(target: AccountingTarget) -> ProcessUsage:
+        sampled_on.append(threading.current_thread())
+        return ProcessUsage(
+            name=target.name,
+            pid=target.pid,
+            cpu_time_us=0,
+            memory_bytes=0,
+            resident_bytes=0,
+            io_read_bytes=0,
+            io_write_bytes=0,
+            threads=1,
+            from_cgroup=False,
+        )
+
+    monkeypatch.setattr("watchdog.liveness.read_usage", read_usage)
+    is_stalled = process_monitor._is_stalled  # pyright: ignore[reportPrivateUsage]
+
+    async def poll() -> threading.Thread:
+        # A standby's 50 ms polls, for well under a sampling interval.
+        for _ in range(10):
+            assert not await is_stalled("camera", as_opened_process(process))
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(poll())
+
+    assert len(sampled_on) == 1 and sampled_on[0] is not loop_thread
@@ -0,0 +1,82 @@
+import asyncio
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from backend.deployment.module.base import MemoryBudget
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    as_opened_process,
+    make_monitor,
+)
+from watchdog.accounting import AccountingTarget, ProcessUsage
+from watchdog.memory_budget import MemoryTrend
+
+MIB = 1024 * 1024
+
+
+def test_trend_projects_when_budget_is_exceeded():
+    trend = MemoryTrend(MemoryBudget(max_rss_mb=300, window_seconds=300))
+
+    for second in range(0, 60, 5):
+        trend.add(100 * MIB + second * MIB, now=float(second))
+    # Too short a span to tell a leak from start-up allocations.
+    assert trend.seconds_until_budget() is None
+
+    for second in range(60, 120, 5):
+        trend.add(100 * MIB + second * MIB, now=float(second))
+    assert abs(trend.growth_bytes_per_second() - MIB) < 1
+    # 215 MiB now, growing 1 MiB/s toward 300 MiB.
+    seconds = trend.seconds_until_budget()
+    assert seconds is not None and abs(seconds - 85) < 0.01
+    assert trend.should_warn(now=115.0)
+    assert not trend.should_warn(now=120.0)
+
+
+def test_monitor_restarts_process_over_its_budget(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    class StopMonitor(Exception):
+        pass
+
+    sleep_calls = 0
+
+    async def fake_sleep(_seconds: float) -> None:
+        nonlocal sleep_calls
+        sleep_calls += 1
+        if sleep_calls > 1:
+            raise StopMonitor
+
+    def fake_read_usage(target: AccountingTarget) -> ProcessUsage:
+        return ProcessUsage(
+            name=target.name,
+            pid=target.pid,
+            cpu_time_us=0,
+            memory_bytes=300 * MIB,
+            resident_bytes=300 * MIB,
+            io_read_bytes=0,
+            io_write_bytes=0,
+            threads=1,
+            from_cgroup=False,
+        )
+
+    leaking = FakeProcess(alive=True)
+    replacement = FakeProcess(alive=True)
+    process_monitor, _ = make_monitor(
+        tmp_path, FakeDeploymentModules({"camera": [replacement]}), monkeypatch
+    )
+    process_monitor.processes["camera"] = as_opened_process(leaking)
+    process_monitor.process_mem.append("camera")
+    budget = MemoryBudget(max_rss_mb=200, restart=True)
+    process_monitor.memory_trends[leaking.pid] = MemoryTrend(budget)
+    monkeypatch.setattr("watchdog.monitor.read_usage", fake_read_usage)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    try:
+        asyncio.run(process_monitor.monitor_process("camera"))
+    except StopMonitor:
+        pass
+
+    assert leaking.stop_calls >= 1
+    assert process_monitor.processes["camera"] is replacement
@@ -8,15 +8,17 @@ from pytest import MonkeyPatch
 
 from backend.deployment.module.base import Module as BackendModule
 from backend.deployment.module.base import RunnableModule as BackendRunnableModule
+from watchdog import monitor as monitor_module
 from watchdog.constants import BLITZ_PATH, BUNDLE_FOLDER_PATH
 from watchdog.monitor import ProcessMonitor, ProcessesMemory
 from watchdog.process_starter import OpenedProcess
 
 
 class FakeProcess:
-    def __init__(self, *, alive: bool = True):
+    def __init__(self, *, alive: bool = True, pid: int = -1):
         self.alive: bool = alive
         self.stop_calls: int = 0
+        self.pid: int = pid
 
     def poll(self) -> int | None:
         return None if self.alive else 1
@@ -57,7 +59,9 @@ def make_module(name: str) -> FakeRunnableModule:
     return FakeRunnableModule(
         name=name,
         extra_run_args=[],
-        equivalent_run_definition=FakeRunDefinition(name),  # pyright: ignore[reportArgumentType]
+        equivalent_run_definition=FakeRunDefinition(  # pyright: ignore[reportArgumentType]
+            name
+        ),
     )
 
 
@@ -129,6 +133,7 @@ def make_monitor(
         str(tmp_path / "memory.json"),
         write_config(tmp_path),
         as_loop(fake_loop),
+        memory_debounce_seconds=0,
     )
     return process_monitor, fake_loop
 
@@ -166,6 +171,55 @@ def test_processes_memory_replace_persists_unique_requested_order(tmp_path: Path
     assert read_memory(memory_file) == ["camera", "localization"]
 
 
+def test_processes_memory_skips_unchanged_writes(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    memory_file = tmp_path / "memory.json"
+    memory = ProcessesMemory.from_file(str(memory_file))
+    writes: list[str] = []
+    write_atomically = monitor_module.write_atomically
+
+    def record_write(file_path: str, contents: str) -> None:
+        writes.append(contents)
+        write_atomically(file_path, contents)
+
+    monkeypatch.setattr(monitor_module, "write_atomically", record_write)
+
+    memory.replace(["camera"])
+    memory.replace(["camera"])
+    memory.remove("missing")
+    assert len(writes) == 1
+
+    reloaded = ProcessesMemory.from_file(str(memory_file))
+    reloaded.append("camera")
+    assert len(writes) == 1
+    assert read_memory(memory_file) == ["camera"]
+    assert [path.name for path in tmp_path.iterdir()] == ["memory.json"]
+
+
+def test_processes_memory_debounces_bursts_into_one_write(tmp_path: Path):
+    memory_file = tmp_path / "memory.json"
+    memory = ProcessesMemory.from_file(str(memory_file), debounce_seconds=60)
+
+    memory.append("camera")
+    memory.append("localization")
+    memory.remove("camera")
+
+    assert read_memory(memory_file) == []
+    memory.flush()
+    assert read_memory(memory_file) == ["localization"]
+
+
+def test_processes_memory_recovers_from_corrupted_file(tmp_path: Path):
+    memory_file = tmp_path / "memory.json"
+    _ = memory_file.write_text('{"processes": ["cam')
+
+    memory = ProcessesMemory.from_file(str(memory_file))
+
+    assert memory == []
+    assert read_memory(memory_file) == []
+
+
 def test_start_and_monitor_process_tracks_process_and_schedules_monitor(
     tmp_path: Path, monkeypatch: MonkeyPatch
 ):
@@ -173,7 +227,7 @@ def test_start_and_monitor_process_tracks_process_and_schedules_monitor(
     deployment_modules = FakeDeploymentModules({"camera": [process]})
     process_monitor, fake_loop = make_monitor(tmp_path, deployment_modules, monkeypatch)
 
-    process_monitor.start_and_monitor_process("camera")
+    asyncio.run(process_monitor.start_and_monitor_process("camera"))
 
     assert process_monitor.processes == {"camera": as_opened_process(process)}
     assert process_monitor.process_mem == ["camera"]
@@ -201,7 +255,7 @@ def test_start_and_monitor_process_ignores_missing_config(
         OpenedProcess, "start_module", staticmethod(deployment_modules.start_module)
     )
 
-    process_monitor.start_and_monitor_process("camera")
+    asyncio.run(process_monitor.start_and_monitor_process("camera"))
 
     assert process_monitor.processes == {}
     assert process_monitor.process_mem == []
@@ -218,7 +272,7 @@ def test_start_and_monitor_process_does_not_restart_active_process(
     )
     process_monitor.processes["camera"] = as_opened_process(original_process)
 
-    process_monitor.start_and_monitor_process("camera")
+    asyncio.run(process_monitor.start_and_monitor_process("camera"))
 
     assert process_monitor.processes["camera"] is original_process
     assert deployment_modules.started == []
@@ -235,7 +289,7 @@ def test_set_processes_starts_missing_and_stops_removed(
     process_monitor.processes["old"] = as_opened_process(removed_process)
     process_monitor.process_mem.append("old")
 
-    process_monitor.set_processes(["new"])
+    asyncio.run(process_monitor.set_processes(["new"]))
 
     assert removed_process.stop_calls == 1
     assert process_monitor.processes == {"new": as_opened_process(added_process)}
@@ -253,7 +307,7 @@ def test_set_processes_clears_stale_remembered_processes_that_are_not_active(
     )
     process_monitor.process_mem = ProcessesMemory.from_file(str(memory_file))
 
-    process_monitor.set_processes([])
+    asyncio.run(process_monitor.set_processes([]))
 
     assert process_monitor.processes == {}
     assert process_monitor.process_mem == []
@@ -268,7 +322,7 @@ def test_stop_process_clears_stale_remembered_process_even_when_not_active(
     )
     process_monitor.process_mem.append("test")
 
-    process_monitor.stop_process("test")
+    asyncio.run(process_monitor.stop_process("test"))
 
     assert process_monitor.processes == {}
     assert process_monitor.process_mem == []
@@ -300,7 +354,7 @@ def test_abort_all_processes_stops_everything_and_clears_memory(
     process_monitor.process_mem.append("first")
     process_monitor.process_mem.append("second")
 
-    process_monitor.abort_all_processes()
+    asyncio.run(process_monitor.abort_all_processes())
 
     assert first_process.stop_calls == 1
     assert second_process.stop_calls == 1
@@ -320,7 +374,7 @@ def test_reboot_processes_restarts_remembered_processes(
     process_monitor.processes["camera"] = as_opened_process(old_process)
     process_monitor.process_mem.append("camera")
 
-    process_monitor.reboot_processes()
+    asyncio.run(process_monitor.reboot_processes())
 
     assert old_process.stop_calls == 1
     assert process_monitor.processes == {"camera": as_opened_process(new_process)}
@@ -362,10 +416,13 @@ def test_restore_processes_from_memory_starts_saved_processes(
         as_loop(fake_loop),
     )
 
-    process_monitor._restore_processes_from_memory()  # pyright: ignore[reportPrivateUsage]
+    report = asyncio.run(process_monitor.restore_processes_from_memory())
 
     assert process_monitor.processes == {"camera": as_opened_process(camera_process)}
     assert process_monitor.process_mem == ["camera"]
+    assert report is not None
+    assert report.processes["camera"].ready_at is not None
+    assert report.all_ready_at is not None
 
 
 def test_monitor_process_retries_failed_restart_without_forgetting_process(
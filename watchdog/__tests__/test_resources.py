@@ -0,0 +1,64 @@
+import os
+import subprocess
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from backend.deployment.module.base import ResourceProfile
+from watchdog.resources import (
+    CgroupTree,
+    apply_resource_profile,
+    read_effective_resources,
+)
+
+
+@pytest.fixture
+def sleeper() -> Iterator[subprocess.Popen[bytes]]:
+    process = subprocess.Popen(["sleep", "30"])
+    yield process
+    process.kill()
+    _ = process.wait()
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="needs Linux scheduling calls"
+)
+def test_profile_pins_cpus_and_lowers_priority(sleeper: subprocess.Popen[bytes]):
+    cpu = min(os.sched_getaffinity(0))
+    profile = ResourceProfile(cpus=[cpu], nice=5)
+
+    placement = apply_resource_profile(sleeper.pid, profile, "sample")
+
+    assert placement.errors == []
+    effective = read_effective_resources(sleeper.pid)
+    assert effective is not None
+    assert effective["cpus"] == [cpu]
+    assert effective["nice"] == 5
+    assert effective["scheduler"] == "other"
+
+
+def test_profile_reports_settings_it_cannot_apply(sleeper: subprocess.Popen[bytes]):
+    profile = ResourceProfile(cpus=[4096])
+
+    placement = apply_resource_profile(sleeper.pid, profile, "sample")
+
+    assert len(placement.errors) == 1
+    assert placement.errors[0].startswith("cpus: ")
+
+
+def test_cgroup_tree_moves_watchdog_into_leaf_and_sets_limits(tmp_path: Path):
+    _ = (tmp_path / "cgroup.procs").write_text("100\n101\n")
+    _ = (tmp_path / "cgroup.controllers").write_text("cpuset cpu io\n")
+    tree = CgroupTree(str(tmp_path))
+
+    leaf = tree.place(1234, "camera", cpu_max=1.5, memory_max_mb=None)
+
+    # Real cgroup files take one pid or controller per write; a plain file
+    # just keeps the last one.
+    assert (tmp_path / "watchdog" / "cgroup.procs").read_text() == "101"
+    assert (tmp_path / "cgroup.subtree_control").read_text() == "+io"
+    assert Path(leaf, "cgroup.procs").read_text() == "1234"
+    assert Path(leaf, "cpu.max").read_text() == "150000 100000"
+    # The memory controller isn't enabled here, and no limit was requested.
+    assert not Path(leaf, "memory.max").exists()
@@ -0,0 +1,235 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from backend.deployment.module.base import ResourceProfile
+from backend.deployment.module.base import RunnableModule as BackendRunnableModule
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    as_opened_process,
+    make_monitor,
+)
+from watchdog.artifacts import LaunchInputs
+from watchdog.monitor import ProcessMonitor
+from watchdog.process_starter import OpenedProcess
+from watchdog.resources import ProcessPlacement, ResourceProfileLike
+from watchdog.standby import StandbyChannel
+
+STANDBY_SCRIPT = """
+from watchdog.ext.managed_process import is_standby, wait_until_promoted
+
+assert is_standby()
+wait_until_promoted()
+assert not is_standby()
+print("promoted", flush=True)
+"""
+
+
+def test_promote_wakes_waiting_standby(tmp_path: Path):
+    channel = StandbyChannel.create("camera")
+    try:
+        # Nothing is waiting on the FIFO yet.
+        assert not channel.promote()
+
+        standby = subprocess.Popen(
+            [sys.executable, "-c", STANDBY_SCRIPT],
+            env={**channel.env(), "PYTHONPATH": str(Path.cwd())},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(200):
+            if channel.promote():
+                break
+            assert standby.poll() is None
+            time.sleep(0.02)
+        else:
+            raise AssertionError("standby never started waiting")
+
+        stdout, _ = standby.communicate(timeout=5)
+        assert stdout.strip() == "promoted"
+        assert standby.returncode == 0
+    finally:
+        channel.close()
+
+
+class FakeChannel:
+    def __init__(self, ready: bool):
+        self.ready: bool = ready
+        self.promote_calls: int = 0
+        self.closed: bool = False
+
+    def env(self) -> dict[str, str]:
+        return {}
+
+    def promote(self) -> bool:
+        self.promote_calls += 1
+        return self.ready
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class StopMonitor(Exception):
+    pass
+
+
+def run_monitor_once(process_monitor: ProcessMonitor, monkeypatch: MonkeyPatch) -> None:
+    sleep_calls = 0
+
+    async def fake_sleep(_seconds: float) -> None:
+        nonlocal sleep_calls
+        sleep_calls += 1
+        if sleep_calls > 1:
+            raise StopMonitor
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    try:
+        asyncio.run(process_monitor.monitor_process("camera"))
+    except StopMonitor:
+        pass
+
+
+def test_monitor_promotes_standby_when_active_process_dies(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    deployment_modules = FakeDeploymentModules({"camera": []})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    active = FakeProcess(alive=False)
+    standby = FakeProcess(alive=True)
+    channel = FakeChannel(ready=True)
+    process_monitor.processes["camera"] = as_opened_process(active)
+    process_monitor.process_mem.append("camera")
+    process_monitor.standbys["camera"] = (
+        as_opened_process(standby),
+        channel,  # pyright: ignore[reportArgumentType]
+    )
+
+    run_monitor_once(process_monitor, monkeypatch)
+
+    assert process_monitor.processes["camera"] is standby
+    assert active.stop_calls == 1
+    assert channel.closed
+    assert deployment_modules.started == []
+    assert "camera" not in process_monitor.standbys
+    assert process_monitor.get_failover_stats()["camera"]["count"] == 1
+
+
+def test_monitor_restarts_when_standby_is_not_waiting(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    replacement = FakeProcess(alive=True)
+    deployment_modules = FakeDeploymentModules({"camera": [replacement]})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    standby = FakeProcess(alive=True)
+    process_monitor.processes["camera"] = as_opened_process(FakeProcess(alive=False))
+    process_monitor.process_mem.append("camera")
+    process_monitor.standbys["camera"] = (
+        as_opened_process(standby),
+        FakeChannel(ready=False),  # pyright: ignore[reportArgumentType]
+    )
+
+    run_monitor_once(process_monitor, monkeypatch)
+
+    assert process_monitor.processes["camera"] is replacement
+    assert standby.stop_calls == 1
+    assert process_monitor.get_failover_stats() == {}
+
+
+class WriterRecordingDict(dict[int, LaunchInputs]):
+    def __init__(self):
+        super().__init__()
+        self.writers: set[threading.Thread] = set()
+
+    def __setitem__(self, key: int, value: LaunchInputs) -> None:
+        self.writers.add(threading.current_thread())
+        super().__setitem__(key, value)
+
+
+def test_standby_is_spawned_in_a_thread_but_recorded_on_the_loop(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    standby = FakeProcess(pid=-2)
+    deployment_modules = FakeDeploymentModules({"camera": [standby]})
+    deployment_modules.modules[0].hot_standby = True
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    process_monitor.processes["camera"] = as_opened_process(FakeProcess())
+    launch_inputs = WriterRecordingDict()
+    process_monitor.launch_inputs = launch_inputs
+    spawned_on: list[threading.Thread] = []
+
+    def start_module(
+        module: BackendRunnableModule,
+        bundle_path: str,
+        flags: dict[str, str],
+        **_: object,
+    ) -> FakeProcess | None:
+        spawned_on.append(threading.current_thread())
+        return deployment_modules.start_module(module, bundle_path, flags)
+
+    monkeypatch.setattr(OpenedProcess, "start_module", staticmethod(start_module))
+
+    async def respawn() -> threading.Thread:
+        await process_monitor.start_standby("camera")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(respawn())
+    try:
+        assert process_monitor.standbys["camera"][0] is standby
+        assert len(spawned_on) == 1 and spawned_on[0] is not loop_thread
+        assert launch_inputs.writers == {loop_thread}
+    finally:
+        process_monitor.standbys["camera"][1].close()
+
+
+def test_promoted_standby_is_placed_without_looking_up_its_module(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    standby = FakeProcess(pid=-2)
+    deployment_modules = FakeDeploymentModules({"camera": [standby]})
+    profile = ResourceProfile(cpus=[2, 3])
+    deployment_modules.modules[0].hot_standby = True
+    deployment_modules.modules[0].resources = profile
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+    process_monitor.processes["camera"] = as_opened_process(FakeProcess(alive=False))
+    placements: list[tuple[int, ResourceProfileLike | None, str]] = []
+
+    def place(
+        pid: int, profile: ResourceProfileLike | None, cgroup_name: str
+    ) -> ProcessPlacement:
+        placements.append((pid, profile, cgroup_name))
+        return ProcessPlacement()
+
+    def start_module(
+        module: BackendRunnableModule,
+        bundle_path: str,
+        flags: dict[str, str],
+        **_: object,
+    ) -> FakeProcess | None:
+        return deployment_modules.start_module(module, bundle_path, flags)
+
+    monkeypatch.setattr(OpenedProcess, "start_module", staticmethod(start_module))
+    monkeypatch.setattr("watchdog.monitor.apply_resource_profile", place)
+    asyncio.run(process_monitor.start_standby("camera"))
+    channel = process_monitor.standbys["camera"][1]
+    monkeypatch.setattr(channel, "promote", lambda: True)
+    lookups = 0
+
+    def get_modules() -> list[object]:
+        nonlocal lookups
+        lookups += 1
+        return []
+
+    monkeypatch.setattr("watchdog.monitor.get_modules", get_modules)
+
+    promote = process_monitor._promote_standby  # pyright: ignore[reportPrivateUsage]
+    assert asyncio.run(promote("camera", time.perf_counter()))
+
+    assert lookups == 0
+    assert process_monitor.processes["camera"] is standby
+    assert placements == [(-2, profile, "camera.standby"), (-2, profile, "camera")]
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from pytest import MonkeyPatch
+
+from backend.deployment.module.base import StartupPolicy
+from watchdog.startup import StartupPlanner, StartupPolicyLike
+
+
+class FakeModules:
+    def __init__(self, ready_after: dict[str, float] | None = None):
+        self.ready_after: dict[str, float] = ready_after or {}
+        self.launched_at: dict[str, float] = {}
+        self.order: list[str] = []
+
+    async def launch(self, name: str) -> bool:
+        self.launched_at[name] = time.monotonic()
+        self.order.append(name)
+        return name != "broken"
+
+    def is_alive(self, name: str) -> bool:
+        return name in self.launched_at
+
+    def has_signalled_ready(self, name: str) -> bool | None:
+        if name not in self.ready_after:
+            return None
+        launched_at = self.launched_at.get(name)
+        return (
+            launched_at is not None
+            and time.monotonic() - launched_at >= self.ready_after[name]
+        )
+
+
+def run_planner(
+    policies: dict[str, StartupPolicyLike | None], modules: FakeModules
+) -> StartupPlanner:
+    planner = StartupPlanner(
+        policies, modules.launch, modules.is_alive, modules.has_signalled_ready
+    )
+    report = asyncio.run(planner.run())
+    assert set(report.processes) == set(policies)
+    return planner
+
+
+def test_startup_waits_for_dependencies_and_lower_priorities(
+    monkeypatch: MonkeyPatch,
+):
+    monkeypatch.setattr("watchdog.startup.STARTUP_POLL_INTERVAL_SECONDS", 0.01)
+    modules = FakeModules(ready_after={"camera": 0.1})
+    policies: dict[str, StartupPolicyLike | None] = {
+        "localization": StartupPolicy(depends_on=["camera"]),
+        "camera": StartupPolicy(priority=0),
+        "logger": StartupPolicy(priority=1),
+        "dashboard": None,
+    }
+
+    _ = run_planner(policies, modules)
+
+    camera_ready_at = modules.launched_at["camera"] + 0.1
+    assert modules.launched_at["dashboard"] < camera_ready_at
+    assert modules.launched_at["localization"] >= camera_ready_at
+    assert modules.launched_at["logger"] >= camera_ready_at
+
+
+def test_startup_staggers_launches(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr("watchdog.startup.STARTUP_POLL_INTERVAL_SECONDS", 0.01)
+    modules = FakeModules()
+    policies: dict[str, StartupPolicyLike | None] = {
+        "camera_front": StartupPolicy(stagger_seconds=0.1),
+        "camera_back": StartupPolicy(stagger_seconds=0.1),
+    }
+
+    _ = run_planner(policies, modules)
+
+    first, second = sorted(modules.launched_at.values())
+    assert second - first >= 0.1
+
+
+def test_startup_report_times_out_and_tolerates_failures(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr("watchdog.startup.STARTUP_POLL_INTERVAL_SECONDS", 0.01)
+    modules = FakeModules(ready_after={"camera": 60})
+    policies: dict[str, StartupPolicyLike | None] = {
+        "camera": StartupPolicy(ready_timeout_seconds=0.05),
+        "broken": None,
+        "localization": StartupPolicy(depends_on=["camera", "broken"]),
+    }
+    planner = StartupPlanner(
+        policies, modules.launch, modules.is_alive, modules.has_signalled_ready
+    )
+
+    report = asyncio.run(planner.run())
+
+    assert report.processes["camera"].timed_out
+    assert report.processes["broken"].launched_at is None
+    assert report.processes["localization"].ready_at is not None
+    assert report.all_ready_at is None
+    assert report.to_json()["boot_to_all_ready"] is None
+
+
+def test_startup_ignores_contradicting_priorities():
+    modules = FakeModules()
+    policies: dict[str, StartupPolicyLike | None] = {
+        "camera": StartupPolicy(priority=1),
+        "localization": StartupPolicy(depends_on=["camera"]),
+    }
+
+    planner = run_planner(policies, modules)
+
+    assert planner.waits_on() == {"camera": set(), "localization": {"camera"}}
+    assert modules.order == ["camera", "localization"]
@@ -0,0 +1,78 @@
+import asyncio
+import json
+from pathlib import Path
+
+from aiohttp import ClientResponse
+from aiohttp.test_utils import TestClient
+from pytest import MonkeyPatch
+
+from watchdog.__tests__.test_api import run_with_client
+from watchdog.__tests__.test_monitor import (
+    FakeDeploymentModules,
+    FakeProcess,
+    make_monitor,
+)
+from watchdog.status_stream import (
+    STATUS_STREAM_BUFFER_EVENTS,
+    StatusEvent,
+    StatusSubscriber,
+)
+
+
+async def read_event(response: ClientResponse) -> tuple[str, dict[str, object]]:
+    kind = ""
+    while True:
+        line = (await response.content.readline()).decode().rstrip("\n")
+        if line.startswith("event: "):
+            kind = line.removeprefix("event: ")
+        elif line.startswith("data: "):
+            return kind, json.loads(line.removeprefix("data: "))
+
+
+def test_slow_subscriber_is_resynced_instead_of_buffering():
+    async def run() -> StatusSubscriber:
+        subscriber = StatusSubscriber()
+        for i in range(STATUS_STREAM_BUFFER_EVENTS + 5):
+            subscriber.offer(
+                StatusEvent("delta", {"changed": {"n": i}, "removed": []}),
+                {"n": i},
+            )
+        return subscriber
+
+    subscriber = asyncio.run(run())
+
+    assert subscriber.resyncs == 1
+    assert subscriber.queue.qsize() <= STATUS_STREAM_BUFFER_EVENTS
+    first = subscriber.queue.get_nowait()
+    assert first == StatusEvent("snapshot", {"n": STATUS_STREAM_BUFFER_EVENTS})
+
+
+def test_status_stream_sends_snapshot_then_deltas(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.setattr("watchdog.status_stream.STATUS_STREAM_INTERVAL_SECONDS", 0.01)
+    deployment_modules = FakeDeploymentModules({"camera": [FakeProcess()]})
+    process_monitor, _ = make_monitor(tmp_path, deployment_modules, monkeypatch)
+
+    async def test(client: TestClient) -> None:
+        response = await client.get("/get/system/status/stream")
+        assert response.headers["Content-Type"] == "text/event-stream"
+
+        kind, snapshot = await asyncio.wait_for(read_event(response), 5)
+        assert kind == "snapshot"
+        assert snapshot["active_processes"] == []
+        assert snapshot["config_hash"] is not None
+
+        _ = await client.post("/set/processes", json={"process_types": ["camera"]})
+        while True:
+            kind, delta = await asyncio.wait_for(read_event(response), 5)
+            assert kind == "delta"
+            changed = delta["changed"]
+            assert isinstance(changed, dict)
+            if "active_processes" in changed:
+                break
+        assert changed["active_processes"] == ["camera"]
+        assert "possible_processes" not in changed
+        response.close()
+
+    run_with_client(process_monitor, tmp_path / "config.txt", test)
@@ -0,0 +1,131 @@
+import json
+import subprocess
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from watchdog.zygote import (
+    ForkedProcess,
+    Zygote,
+    ZygoteError,
+    get_zygote,
+    stop_all_zygotes,
+)
+
+
+@dataclass
+class FakeZygoteModule:
+    name: str
+    main_source: str
+    folder: Path
+    preload_modules: list[str] = field(default_factory=lambda: ["json"])
+
+    def get_interpreter_path(self) -> str:
+        return sys.executable
+
+    def get_entrypoint_path(self, bundle_path: str) -> str:
+        main_path = self.folder / bundle_path / self.name / "__main__.py"
+        main_path.parent.mkdir(parents=True, exist_ok=True)
+        _ = main_path.write_text(self.main_source)
+        return str(main_path)
+
+    def get_extra_run_args(self) -> str:
+        return "--mode fast"
+
+
+@pytest.fixture(autouse=True)
+def stop_zygotes() -> Iterator[None]:
+    yield
+    stop_all_zygotes()
+
+
+def test_forked_process_runs_module_main_with_arguments(tmp_path: Path):
+    output_path = tmp_path / "output.json"
+    module = FakeZygoteModule(
+        name="zygote-args",
+        main_source=(
+            "import json, sys\n"
+            f"json.dump(sys.argv[1:], open({str(output_path)!r}, 'w'))\n"
+            "sys.exit(3)\n"
+        ),
+        folder=tmp_path,
+    )
+
+    process = ForkedProcess.start_module(module, "bundle", {"system-name": "pi"})
+
+    assert process.wait(timeout=10) == 3
+    assert not process.is_alive()
+    assert json.loads(output_path.read_text()) == [
+        "--mode",
+        "fast",
+        "--system-name",
+        "pi",
+    ]
+
+    restarted = ForkedProcess.start_module(module, "bundle", {})
+    assert restarted.zygote is process.zygote
+    assert restarted.wait(timeout=10) == 3
+
+
+def test_zygote_is_replaced_when_the_deployed_code_changes(tmp_path: Path):
+    module = FakeZygoteModule(
+        name="zygote-deploy", main_source="import sys\nsys.exit(0)\n", folder=tmp_path
+    )
+
+    first = ForkedProcess.start_module(module, "bundle", {}, code_hash="a:b")
+    assert first.wait(timeout=10) == 0
+    same = ForkedProcess.start_module(module, "bundle", {}, code_hash="a:b")
+    assert same.zygote is first.zygote
+    assert same.wait(timeout=10) == 0
+
+    redeployed = ForkedProcess.start_module(module, "bundle", {}, code_hash="a:c")
+
+    assert redeployed.zygote is not first.zygote
+    assert not first.zygote.is_alive()
+    assert redeployed.wait(timeout=10) == 0
+
+
+def test_forked_process_stop_terminates_child(tmp_path: Path):
+    module = FakeZygoteModule(
+        name="zygote-stop",
+        main_source="import time\ntime.sleep(60)\n",
+        folder=tmp_path,
+    )
+
+    process = ForkedProcess.start_module(module, "bundle", {})
+    assert process.is_alive()
+
+    process.stop()
+
+    assert not process.is_alive()
+    assert get_zygote(module, "bundle").is_alive()
+
+
+class UnreachableZygote(Zygote):
+    def __init__(self):
+        super().__init__("unreachable", [])
+        self.requests: int = 0
+
+    def request(self, payload: dict[str, object]) -> dict[str, object]:
+        self.requests += 1
+        raise ZygoteError("unreachable")
+
+
+def test_forked_process_liveness_is_checked_without_the_zygote():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    zygote = UnreachableZygote()
+    process = ForkedProcess(child.pid, zygote)
+    try:
+        assert process.is_alive()
+        assert process.poll() is None
+        assert zygote.requests == 0
+    finally:
+        child.kill()
+        _ = child.wait()
+
+    assert not process.is_alive()
+    assert process.poll() == -1
+    assert zygote.requests == 1
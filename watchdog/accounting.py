@@ -0,0 +1,160 @@
+import os
+import time
+from dataclasses import dataclass
+
+import psutil
+
+
+@dataclass
+class AccountingTarget:
+    name: str
+    pid: int
+    # cgroup leaf holding only this process and its children, if any.
+    cgroup: str | None
+
+
+@dataclass
+class ProcessUsage:
+    name: str
+    pid: int
+    cpu_time_us: int
+    # Everything charged to the process, page cache and kernel memory
+    # included; for reporting.
+    memory_bytes: int
+    # Memory only the process itself holds (anonymous memory, or RSS without
+    # a cgroup); what it can be expected to give back by restarting.
+    resident_bytes: int
+    io_read_bytes: int
+    io_write_bytes: int
+    threads: int
+    from_cgroup: bool
+    # Percent of one core used since the previous sample.
+    cpu_usage: float = 0.0
+
+
+class ProcessAccountant:
+    """
+    Samples the resource usage of managed processes, from their cgroup leaf
+    where they have one and from their process tree otherwise.
+    """
+
+    def __init__(self):
+        self._previous: dict[tuple[str, int], tuple[int, float]] = {}
+
+    def sample(self, targets: list[AccountingTarget]) -> list[ProcessUsage]:
+        sampled_at = time.monotonic()
+        usages: list[ProcessUsage] = []
+        previous: dict[tuple[str, int], tuple[int, float]] = {}
+
+        for target in targets:
+            usage = read_usage(target)
+            if usage is None:
+                continue
+
+            key = (target.name, target.pid)
+            last = self._previous.get(key)
+            if last is not None and sampled_at > last[1]:
+                # A process tree loses the CPU time of children that exit.
+                cpu_delta_us = max(0, usage.cpu_time_us - last[0])
+                usage.cpu_usage = cpu_delta_us / ((sampled_at - last[1]) * 1e4)
+            previous[key] = (usage.cpu_time_us, sampled_at)
+            usages.append(usage)
+
+        self._previous = previous
+        return usages
+
+
+def read_usage(target: AccountingTarget) -> ProcessUsage | None:
+    usage = read_cgroup_usage(target) if target.cgroup is not None else None
+    return usage if usage is not None else read_process_tree_usage(target)
+
+
+def read_cgroup_usage(target: AccountingTarget) -> ProcessUsage | None:
+    """
+    Reads usage from cgroup v2 files, one read each. Returns None when the
+    cgroup is gone or lacks the cpu/memory accounting files.
+    """
+
+    assert target.cgroup is not None
+    try:
+        cpu_stat = _read_key_values(os.path.join(target.cgroup, "cpu.stat"))
+        memory_bytes = int(_read_file(os.path.join(target.cgroup, "memory.current")))
+        memory_stat = _read_key_values(os.path.join(target.cgroup, "memory.stat"))
+        threads = len(_read_file(os.path.join(target.cgroup, "cgroup.threads")).split())
+    except (OSError, ValueError):
+        return None
+
+    io_read_bytes = io_write_bytes = 0
+    try:
+        # One line per device: "259:0 rbytes=... wbytes=... rios=... ..."
+        for line in _read_file(os.path.join(target.cgroup, "io.stat")).splitlines():
+            fields = dict(
+                field.split("=", 1) for field in line.split()[1:] if "=" in field
+            )
+            io_read_bytes += int(fields.get("rbytes", 0))
+            io_write_bytes += int(fields.get("wbytes", 0))
+    except (OSError, ValueError):
+        pass  # io controller not enabled
+
+    return ProcessUsage(
+        name=target.name,
+        pid=target.pid,
+        cpu_time_us=cpu_stat.get("usage_usec", 0),
+        memory_bytes=memory_bytes,
+        resident_bytes=memory_stat.get("anon", 0),
+        io_read_bytes=io_read_bytes,
+        io_write_bytes=io_write_bytes,
+        threads=threads,
+        from_cgroup=True,
+    )
+
+
+def read_process_tree_usage(target: AccountingTarget) -> ProcessUsage | None:
+    try:
+        parent = psutil.Process(target.pid)
+        processes = [parent, *parent.children(recursive=True)]
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+    usage = ProcessUsage(
+        name=target.name,
+        pid=target.pid,
+        cpu_time_us=0,
+        memory_bytes=0,
+        resident_bytes=0,
+        io_read_bytes=0,
+        io_write_bytes=0,
+        threads=0,
+        from_cgroup=False,
+    )
+    for process in processes:
+        try:
+            with process.oneshot():
+                cpu_times = process.cpu_times()
+                usage.cpu_time_us += int((cpu_times.user + cpu_times.system) * 1e6)
+                rss = process.memory_info().rss
+                usage.memory_bytes += rss
+                usage.resident_bytes += rss
+                usage.threads += process.num_threads()
+                try:
+                    io_counters = process.io_counters()
+                    usage.io_read_bytes += io_counters.read_bytes
+                    usage.io_write_bytes += io_counters.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    pass  # not readable for this process, or not on this platform
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return usage
+
+
+def _read_key_values(path: str) -> dict[str, int]:
+    values: dict[str, int] = {}
+    for line in _read_file(path).splitlines():
+        key, _, value = line.partition(" ")
+        values[key] = int(value)
+    return values
+
+
+def _read_file(path: str) -> str:
+    with open(path) as f:
+        return f.read().strip()
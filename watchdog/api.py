@@ -0,0 +1,129 @@
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from aiohttp import web
+
+from watchdog.monitor import ProcessMonitor
+from watchdog.status_stream import StatusBroadcaster
+
+# Idle connections from the deployer and dashboards are kept open this long.
+API_KEEPALIVE_SECONDS = 75.0
+# Bounds JSON bodies such as inline base64 configs; uploads are streamed.
+API_MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Durations kept per route for the timing percentiles.
+MAX_TIMING_SAMPLES = 1000
+
+PROCESS_MONITOR_KEY = web.AppKey("process_monitor", ProcessMonitor)
+SYSTEM_NAME_KEY = web.AppKey("system_name", str)
+DESIRED_CONFIG_BASE64_FILE_KEY = web.AppKey("desired_config_base64_file", str)
+STATUS_BROADCASTER_KEY = web.AppKey("status_broadcaster", StatusBroadcaster)
+
+
+class RouteTimings:
+    def __init__(self):
+        self.durations: deque[float] = deque(maxlen=MAX_TIMING_SAMPLES)
+        self.count: int = 0
+        self.errors: int = 0
+
+    def add(self, duration: float, status: int) -> None:
+        self.durations.append(duration)
+        self.count += 1
+        if status >= 500:
+            self.errors += 1
+
+    def to_json(self) -> dict[str, float | int]:
+        durations_ms = sorted(d * 1000 for d in self.durations)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(statistics.fmean(durations_ms), 2),
+            "p50_ms": round(_percentile(durations_ms, 0.5), 2),
+            "p95_ms": round(_percentile(durations_ms, 0.95), 2),
+            "max_ms": round(durations_ms[-1], 2),
+        }
+
+
+REQUEST_TIMINGS_KEY = web.AppKey("request_timings", dict[str, RouteTimings])
+
+
+@web.middleware
+async def timing_middleware(
+    request: web.Request,
+    handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+) -> web.StreamResponse:
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        # Headers of a streamed response are already sent.
+        if not response.prepared:
+            response.headers["Server-Timing"] = (
+                f"app;dur={(time.perf_counter() - started_at) * 1000:.1f}"
+            )
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        route = request.match_info.route.resource
+        name = route.canonical if route is not None else "unmatched"
+        timings = request.app[REQUEST_TIMINGS_KEY]
+        timings.setdefault(f"{request.method} {name}", RouteTimings()).add(
+            time.perf_counter() - started_at, status
+        )
+
+
+async def read_json(request: web.Request) -> object | None:
+    """
+    The request's JSON body, or None if it is missing or malformed.
+    """
+
+    try:
+        return await request.json()  # pyright: ignore[reportAny]
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def create_app(
+    process_monitor: ProcessMonitor,
+    system_name: str,
+    desired_config_base64_file: str,
+) -> web.Application:
+    # Imported here: the route modules look up the keys defined above.
+    from watchdog.routes.bundles import BUNDLES_ROUTES
+    from watchdog.routes.getters import GETTERS_ROUTES
+    from watchdog.routes.setters import SETTERS_ROUTES
+
+    app = web.Application(
+        middlewares=[timing_middleware], client_max_size=API_MAX_REQUEST_BYTES
+    )
+    app[PROCESS_MONITOR_KEY] = process_monitor
+    app[SYSTEM_NAME_KEY] = system_name
+    app[DESIRED_CONFIG_BASE64_FILE_KEY] = desired_config_base64_file
+    app[REQUEST_TIMINGS_KEY] = {}
+    app[STATUS_BROADCASTER_KEY] = StatusBroadcaster(process_monitor, system_name)
+    app.add_routes(GETTERS_ROUTES)
+    app.add_routes(SETTERS_ROUTES)
+    app.add_routes(BUNDLES_ROUTES)
+    return app
+
+
+async def start_api(app: web.Application, host: str, port: int) -> web.AppRunner:
+    """
+    Serves `app` from the running event loop, next to the process monitor.
+    """
+
+    runner = web.AppRunner(
+        app, keepalive_timeout=API_KEEPALIVE_SECONDS, access_log=None
+    )
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = round(fraction * (len(sorted_values) - 1))
+    return sorted_values[index]
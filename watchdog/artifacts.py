@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Collection
+from dataclasses import dataclass
+
+# The status endpoints recheck module files at most this often; starting a
+# process or applying a new process list always rechecks them.
+ARTIFACT_CHECK_INTERVAL_SECONDS = 10.0
+# Written next to the sources while a module runs, so never part of its hash.
+IGNORED_ARTIFACT_DIRS = frozenset({"__pycache__"})
+
+
+@dataclass(frozen=True)
+class LaunchInputs:
+    """
+    What a process was started from. It needs a restart once they change.
+    """
+
+    argv: tuple[str, ...]
+    artifact_hash: str | None
+    # The rest of the bundle: libraries, dependencies, generated modules and
+    # the like, which a module's own files don't cover.
+    bundle_hash: str | None = None
+
+    def changes_from(self, current: "LaunchInputs") -> list[str]:
+        changes: list[str] = []
+        if self.artifact_hash != current.artifact_hash:
+            changes.append("artifacts")
+        if self.argv != current.argv:
+            changes.append("argv")
+        if self.bundle_hash != current.bundle_hash:
+            changes.append("bundle")
+        return changes
+
+    @property
+    def code_hash(self) -> str:
+        """
+        Identifies the code the process can import: its module's files and
+        the rest of the bundle, but not its arguments.
+        """
+
+        return f"{self.artifact_hash}:{self.bundle_hash}"
+
+
+class ArtifactHasher:
+    """
+    Content hashes of the modules' installed files (their project path in
+    the bundle). A file is only read again when its size or mtime changed,
+    which both unzip and tar keep for unchanged files. Safe to share between
+    the spawn threads and the status endpoints.
+    """
+
+    def __init__(self):
+        # File path -> ((size, mtime_ns), sha256 of its contents).
+        self._files: dict[str, tuple[tuple[int, int], str]] = {}
+        # (Root, excluded folders) -> (when it was hashed, its hash).
+        self._trees: dict[tuple[str, frozenset[str]], tuple[float, str | None]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def tree_hash(
+        self, root: str, max_age_seconds: float = 0.0, exclude: Collection[str] = ()
+    ) -> str | None:
+        """
+        Hash of the paths and contents of every file under `root`, but not
+        under the folders in `exclude`, or None if there are none.
+        """
+
+        with self._lock:
+            return self._tree_hash(root, max_age_seconds, frozenset(exclude))
+
+    def _tree_hash(
+        self, root: str, max_age_seconds: float, exclude: frozenset[str]
+    ) -> str | None:
+        now = time.monotonic()
+        cached = self._trees.get((root, exclude))
+        if cached is not None and now - cached[0] < max_age_seconds:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        found = False
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names[:] = sorted(
+                d
+                for d in dir_names
+                if d not in IGNORED_ARTIFACT_DIRS
+                and os.path.join(dir_path, d) not in exclude
+            )
+            for file_name in sorted(file_names):
+                path = os.path.join(dir_path, file_name)
+                try:
+                    file_hash = self._file_hash(path)
+                except OSError:
+                    continue  # removed while walking
+                found = True
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(b"\0" + file_hash.encode() + b"\n")
+
+        tree_hash = digest.hexdigest() if found else None
+        self._trees[(root, exclude)] = (now, tree_hash)
+        return tree_hash
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._files.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        self._files[path] = (key, digest.hexdigest())
+        return digest.hexdigest()
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import ipaddress
+import os
+import socket
+import tempfile
+from collections.abc import AsyncIterable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, cast
+from urllib.parse import urlsplit
+
+from watchdog.constants import BLITZ_PATH
+from watchdog.util.logger import error, info
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Each relay hop gets this long plus the time to upload the bundle to all of
+# its children at once over a slow Wi-Fi link.
+RELAY_HOP_TIMEOUT_SECONDS = 30.0
+RELAY_MIN_BYTES_PER_SECOND = 1024 * 1024
+# Received and relayed bundles may only be written here, relative to
+# BLITZ_PATH (the deployer's default remote bundle path).
+BUNDLE_STAGING_DIR = "bundles"
+BUNDLE_SUFFIX = ".zip"
+
+
+class RelayError(RuntimeError):
+    pass
+
+
+def resolve_relay_path(path: str) -> str:
+    """
+    Resolves a bundle path sent by a peer (relative to BLITZ_PATH, or
+    absolute). Peers are not authenticated, so only .zip archives inside the
+    bundle staging directory are accepted, never the watchdog's own files.
+    """
+
+    staging_root = os.path.realpath(os.path.join(BLITZ_PATH, BUNDLE_STAGING_DIR))
+    resolved = os.path.realpath(os.path.join(BLITZ_PATH, path))
+    if (
+        os.path.commonpath([staging_root, resolved]) != staging_root
+        or resolved == staging_root
+        or not resolved.endswith(BUNDLE_SUFFIX)
+    ):
+        raise RelayError(
+            f"Refusing bundle path outside {staging_root} or not a "
+            f"{BUNDLE_SUFFIX} archive: {path}"
+        )
+    return resolved
+
+
+def check_relay_targets(
+    targets: list[dict[str, object]], watchdog_port: int | None
+) -> None:
+    """
+    Relay trees come from unauthenticated peers, so every target must look
+    like another watchdog: a plain http://host:port URL on the watchdog port,
+    not addressed to this machine. Raises RelayError otherwise.
+    """
+
+    for target in targets:
+        url = target.get("url")
+        children = target.get("children") or []
+        if not isinstance(url, str) or not isinstance(target.get("path"), str):
+            raise RelayError(f"Relay target needs a url and a path: {target}")
+        if not isinstance(children, list) or not all(
+            isinstance(child, dict) for child in children
+        ):
+            raise RelayError(f"Relay target children must be targets: {url}")
+
+        parts = urlsplit(url)
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if (
+            parts.scheme != "http"
+            or not parts.hostname
+            or port != watchdog_port
+            or parts.username is not None
+            or parts.path.strip("/")
+            or parts.query
+            or parts.fragment
+        ):
+            raise RelayError(
+                f"Refusing relay target that is not a watchdog on port "
+                f"{watchdog_port}: {url}"
+            )
+        if parts.hostname == "localhost" or _is_local_address(parts.hostname):
+            raise RelayError(f"Refusing relay target on this machine: {url}")
+
+        check_relay_targets(cast(list[dict[str, object]], children), watchdog_port)
+
+
+def _is_local_address(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_unspecified or address.is_multicast
+
+
+def _check_resolved_host(host: str) -> None:
+    # A hostname can still resolve to this machine.
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except OSError as e:
+        raise RelayError(f"Cannot resolve relay target {host}: {e}") from e
+    for info in infos:
+        if _is_local_address(str(info[4][0])):
+            raise RelayError(f"Refusing relay target on this machine: {host}")
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def relay_timeout(size_bytes: int, targets: list[dict[str, object]]) -> float:
+    """
+    How long relaying `size_bytes` through the `targets` tree may take: one
+    hop per level, each uploading to as many peers as the widest fan-out.
+    """
+
+    depth, fan_out = _tree_shape(targets)
+    return depth * _hop_timeout(size_bytes, fan_out)
+
+
+def _hop_timeout(size_bytes: int, fan_out: int) -> float:
+    return RELAY_HOP_TIMEOUT_SECONDS + size_bytes * fan_out / RELAY_MIN_BYTES_PER_SECOND
+
+
+def _tree_shape(targets: list[dict[str, object]]) -> tuple[int, int]:
+    depth, fan_out = 0, len(targets)
+    for target in targets:
+        children = cast(list[dict[str, object]], target.get("children") or [])
+        child_depth, child_fan_out = _tree_shape(children)
+        depth = max(depth, child_depth)
+        fan_out = max(fan_out, child_fan_out)
+    return (depth + 1 if targets else 0), fan_out
+
+
+async def store_bundle_async(
+    path: str, chunks: AsyncIterable[bytes], expected_sha256: str
+) -> None:
+    """
+    Writes a bundle received on the event loop next to its destination, from
+    a worker thread, and only moves it into place when the content hash
+    matches.
+    """
+
+    temp_path, f = await asyncio.to_thread(_open_temp_file, path)
+    digest = hashlib.sha256()
+    try:
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                _ = await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    _move_into_place(temp_path, path, digest.hexdigest(), expected_sha256)
+
+
+def _open_temp_file(path: str) -> tuple[str, IO[bytes]]:
+    # A file of its own per upload, so concurrent uploads of the same bundle
+    # never write into each other.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".part"
+    )
+    return temp_path, os.fdopen(fd, "wb")
+
+
+def _move_into_place(temp_path: str, path: str, sha256: str, expected_sha256: str):
+    if sha256 != expected_sha256:
+        os.unlink(temp_path)
+        raise RelayError(f"Hash mismatch for received bundle {path}")
+
+    os.replace(temp_path, path)
+
+
+def relay_bundle(
+    path: str, sha256: str, targets: Iterable[dict[str, object]]
+) -> list[str]:
+    """
+    Pushes a local bundle to every target concurrently and asks each target to
+    relay it on to its own children. Returns the URLs of failed subtrees.
+    """
+
+    targets = list(targets)
+    if not targets:
+        return []
+
+    size_bytes = os.path.getsize(path)
+    upload_timeout = _hop_timeout(size_bytes, len(targets))
+
+    def relay_to(target: dict[str, object]) -> list[str]:
+        return _relay_to_target(path, sha256, target, size_bytes, upload_timeout)
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        results = list(executor.map(relay_to, targets))
+
+    return [failed for failures in results for failed in failures]
+
+
+def _relay_to_target(
+    path: str,
+    sha256: str,
+    target: dict[str, object],
+    size_bytes: int,
+    upload_timeout: float,
+) -> list[str]:
+    import requests  # pyright: ignore[reportMissingModuleSource]
+
+    url = str(target.get("url", "")).rstrip("/")
+    remote_path = str(target.get("path", ""))
+    children = cast(list[dict[str, object]], target.get("children") or [])
+
+    try:
+        _check_resolved_host(urlsplit(url).hostname or "")
+        with open(path, "rb") as f:
+            r = requests.post(
+                f"{url}/bundle/receive",
+                params={"path": remote_path, "sha256": sha256},
+                data=f,
+                timeout=upload_timeout,
+            )
+        if r.status_code != 200:
+            raise RelayError(r.text)
+        info(f"Relayed bundle to {url}")
+
+        if children:
+            r = requests.post(
+                f"{url}/bundle/relay",
+                json={"path": remote_path, "sha256": sha256, "targets": children},
+                timeout=relay_timeout(size_bytes, children),
+            )
+            if r.status_code != 200:
+                raise RelayError(r.text)
+    except (requests.RequestException, RelayError) as e:
+        error(f"Failed to relay bundle to {url}: {e}")
+        return [url]
+
+    return []
@@ -0,0 +1,148 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+class CommandKind(Enum):
+    SET_PROCESSES = "set_processes"
+    START_PROCESSES = "start_processes"
+    STOP_PROCESSES = "stop_processes"
+    STOP_ALL = "stop_all"
+    REFRESH_CONFIG = "refresh_config"
+    # SET_PROCESSES that may also restart the processes it keeps running.
+    APPLY = "apply"
+    # Restart the processes whose module files or launch arguments changed.
+    RESTART_CHANGED = "restart_changed"
+
+
+_DESIRED_STATE_KINDS = (
+    CommandKind.SET_PROCESSES,
+    CommandKind.START_PROCESSES,
+    CommandKind.STOP_PROCESSES,
+    CommandKind.APPLY,
+)
+_FULL_STATE_KINDS = (CommandKind.SET_PROCESSES, CommandKind.APPLY)
+
+
+@dataclass
+class MonitorCommand:
+    kind: CommandKind
+    process_types: list[str] = field(default_factory=list)
+    # APPLY only: restart the processes that stay running, e.g. after the
+    # config changed.
+    restart_running: bool = False
+
+    def merge(self, later: "MonitorCommand") -> "MonitorCommand | None":
+        """
+        One command with the same end state as running this one and then
+        `later`, or None if they have to run separately.
+        """
+
+        if later.kind in _FULL_STATE_KINDS and self.kind in _DESIRED_STATE_KINDS:
+            if CommandKind.APPLY not in (self.kind, later.kind):
+                return later
+            # A restart already requested still has to happen.
+            return MonitorCommand(
+                CommandKind.APPLY,
+                later.process_types,
+                restart_running=self.restart_running or later.restart_running,
+            )
+
+        match self.kind, later.kind:
+            case (
+                CommandKind.SET_PROCESSES | CommandKind.APPLY,
+                CommandKind.START_PROCESSES,
+            ):
+                return MonitorCommand(
+                    self.kind,
+                    _unique(self.process_types + later.process_types),
+                    restart_running=self.restart_running,
+                )
+            case (
+                CommandKind.SET_PROCESSES | CommandKind.APPLY,
+                CommandKind.STOP_PROCESSES,
+            ):
+                return MonitorCommand(
+                    self.kind,
+                    [p for p in self.process_types if p not in later.process_types],
+                    restart_running=self.restart_running,
+                )
+            case (CommandKind.START_PROCESSES, CommandKind.START_PROCESSES) | (
+                CommandKind.STOP_PROCESSES,
+                CommandKind.STOP_PROCESSES,
+            ):
+                return MonitorCommand(
+                    self.kind, _unique(self.process_types + later.process_types)
+                )
+            case (
+                (CommandKind.STOP_ALL, CommandKind.STOP_ALL)
+                | (CommandKind.REFRESH_CONFIG, CommandKind.REFRESH_CONFIG)
+                | (CommandKind.RESTART_CHANGED, CommandKind.RESTART_CHANGED)
+            ):
+                return self
+            case _:
+                return None
+
+
+class MonitorCommandQueue:
+    """
+    Serializes changes to the monitor's state on the event loop. Commands that
+    queue up while another runs are merged, so a burst of API calls results in
+    one reconciliation. A command may await (e.g. a process stopping in a
+    thread); the next one only starts after it finished.
+    """
+
+    def __init__(self, execute: Callable[[MonitorCommand], Awaitable[None]]):
+        self._execute: Callable[[MonitorCommand], Awaitable[None]] = execute
+        self._queue: asyncio.Queue[tuple[MonitorCommand, asyncio.Future[None]]] = (
+            asyncio.Queue()
+        )
+        self._task: asyncio.Task[None] | None = None
+
+    async def submit(self, command: MonitorCommand) -> None:
+        """
+        Queues `command` and waits until it (or a command it was merged
+        into) has run, raising whatever that raised.
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((command, future))
+        await future
+
+    async def _run(self) -> None:
+        carried: tuple[MonitorCommand, asyncio.Future[None]] | None = None
+        while True:
+            command, future = (
+                carried if carried is not None else await self._queue.get()
+            )
+            carried = None
+            futures = [future]
+            # Let submissions that are already scheduled land in the queue.
+            await asyncio.sleep(0)
+
+            while not self._queue.empty():
+                next_command, next_future = self._queue.get_nowait()
+                merged = command.merge(next_command)
+                if merged is None:
+                    carried = (next_command, next_future)
+                    break
+                command = merged
+                futures.append(next_future)
+
+            try:
+                await self._execute(command)
+            except Exception as e:
+                for pending in futures:
+                    if not pending.done():
+                        pending.set_exception(e)
+            else:
+                for pending in futures:
+                    if not pending.done():
+                        pending.set_result(None)
+
+
+def _unique(process_types: list[str]) -> list[str]:
+    return list(dict.fromkeys(process_types))
@@ -0,0 +1,237 @@
+import base64
+import binascii
+import glob
+import hashlib
+import os
+import re
+import struct
+import time
+import zlib
+from collections.abc import AsyncIterable
+
+from watchdog.ext.managed_process import (
+    DECODED_CONFIG_HEADER,
+    DECODED_CONFIG_MAGIC,
+    DECODED_CONFIG_VERSION,
+    decoded_config_path,
+)
+from watchdog.util.files import sync_directory, write_atomically
+
+# Decompressed config uploads larger than this are refused.
+MAX_CONFIG_BYTES = 64 * 1024 * 1024
+# Staged uploads no /apply has named in this long are removed.
+STAGED_CONFIG_MAX_AGE_SECONDS = 3600.0
+
+_NON_BASE64_CHARACTERS = re.compile(r"[^A-Za-z0-9+/=]")
+_SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+# Config path -> ((mtime_ns, size), sha256) of the file when it was hashed.
+_config_hashes: dict[str, tuple[tuple[int, int], str | None]] = {}
+
+
+class ConfigUploadError(RuntimeError):
+    pass
+
+
+def clean_base64(config_base64: str) -> str:
+    return _NON_BASE64_CHARACTERS.sub("", config_base64)
+
+
+def decode_config(config_base64: str) -> bytes:
+    try:
+        return base64.b64decode(config_base64, validate=True)
+    except binascii.Error as e:
+        raise ConfigUploadError(f"Config is not valid base64: {e}") from e
+
+
+def config_sha256(path: str) -> str | None:
+    """
+    sha256 of the decoded config stored as base64 in `path`, or None if there
+    is no config. Only recomputed when the file was rewritten.
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_hashes.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    sha256 = None
+    if contents:
+        try:
+            config = base64.b64decode(contents)
+        except binascii.Error:
+            # Still gets an identity; no uploaded config will ever match it.
+            config = contents
+        sha256 = hashlib.sha256(config).hexdigest()
+    _config_hashes[path] = (key, sha256)
+    return sha256
+
+
+def staged_config_path(path: str, sha256: str) -> str:
+    """
+    Where an upload with hash `sha256` is staged, one file per hash so
+    concurrent deploys don't overwrite each other's config.
+    """
+
+    if not _SHA256_HEX.fullmatch(sha256):
+        raise ConfigUploadError(f"Not a sha256: {sha256}")
+    return f"{path}.staged-{sha256}"
+
+
+def stage_config(path: str, sha256: str, config: bytes) -> None:
+    """
+    Keeps the decoded `config` for an /apply naming `sha256`, and removes
+    staged uploads that were never applied.
+    """
+
+    staged_path = staged_config_path(path, sha256)
+    write_atomically(staged_path, base64.b64encode(config).decode())
+    expired_before = time.time() - STAGED_CONFIG_MAX_AGE_SECONDS
+    for other_path in glob.glob(f"{glob.escape(path)}.staged-*"):
+        if other_path == staged_path:
+            continue
+        try:
+            if os.path.getmtime(other_path) < expired_before:
+                os.unlink(other_path)
+        except OSError:
+            pass  # applied or removed meanwhile
+
+
+def replace_config(path: str, config_base64: str) -> bool:
+    """
+    Atomically writes `config_base64` unless the file already has it; True
+    if it changed.
+    """
+
+    try:
+        with open(path) as f:
+            if f.read() == config_base64:
+                return False
+    except FileNotFoundError:
+        pass
+
+    write_atomically(path, config_base64)
+    return True
+
+
+def install_config(path: str, config: bytes) -> bool:
+    """
+    Makes the decoded `config` current: written as base64 to `path` and
+    decoded for ConfigCache. True if it changed.
+    """
+
+    changed = replace_config(path, base64.b64encode(config).decode())
+    _ = _write_decoded_config(path, config)
+    return changed
+
+
+def sync_decoded_config(path: str) -> int | None:
+    """
+    Brings the decoded copy of the base64 config at `path` up to date, e.g.
+    after an upgrade. Returns its generation, or None if there is no valid
+    config.
+    """
+
+    try:
+        with open(path, "rb") as f:
+            config = base64.b64decode(f.read(), validate=True)
+    except (OSError, binascii.Error):
+        return None
+    if not config:
+        return None
+    return _write_decoded_config(path, config)
+
+
+def config_generation(path: str) -> int | None:
+    """
+    Generation of the decoded copy of the config at `path`, if there is one.
+    """
+
+    try:
+        with open(decoded_config_path(path), "rb") as f:
+            header = f.read(DECODED_CONFIG_HEADER.size)
+        magic, _, generation, _, _ = DECODED_CONFIG_HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    return generation if magic == DECODED_CONFIG_MAGIC else None
+
+
+def promote_staged_config(path: str, sha256: str) -> bool:
+    """
+    Makes the config with hash `sha256` current, moving a staged upload into
+    place if needed; True if the config changed.
+    """
+
+    if config_sha256(path) == sha256:
+        return False
+
+    staged_path = staged_config_path(path, sha256)
+    if config_sha256(staged_path) != sha256:
+        raise ConfigUploadError(f"No uploaded config with sha256 {sha256}")
+    os.replace(staged_path, path)
+    sync_directory(os.path.dirname(path) or ".")
+    _ = sync_decoded_config(path)
+    return True
+
+
+def _write_decoded_config(path: str, config: bytes) -> int:
+    sha256 = hashlib.sha256(config).digest()
+    decoded_path = decoded_config_path(path)
+    generation = 0
+    try:
+        with open(decoded_path, "rb") as f:
+            header = f.read(DECODED_CONFIG_HEADER.size)
+        _, _, generation, _, current_sha256 = DECODED_CONFIG_HEADER.unpack(header)
+        if current_sha256 == sha256:
+            return generation
+    except (OSError, struct.error):
+        pass
+
+    generation += 1
+    header = DECODED_CONFIG_HEADER.pack(
+        DECODED_CONFIG_MAGIC, DECODED_CONFIG_VERSION, generation, len(config), sha256
+    )
+    # Replaced, never rewritten: modules keep their current mapping intact.
+    write_atomically(decoded_path, header + config)
+    return generation
+
+
+async def read_compressed_config(
+    chunks: AsyncIterable[bytes], expected_sha256: str
+) -> bytes:
+    """
+    Inflates a zlib-compressed config upload as it arrives and checks it
+    against `expected_sha256`.
+    """
+
+    decompressor = zlib.decompressobj()
+    parts: list[bytes] = []
+    size = 0
+    try:
+        async for chunk in chunks:
+            while chunk:
+                part = decompressor.decompress(chunk, MAX_CONFIG_BYTES + 1 - size)
+                size += len(part)
+                if size > MAX_CONFIG_BYTES:
+                    raise ConfigUploadError(
+                        f"Config is larger than {MAX_CONFIG_BYTES} bytes"
+                    )
+                parts.append(part)
+                chunk = decompressor.unconsumed_tail
+        parts.append(decompressor.flush())
+    except zlib.error as e:
+        raise ConfigUploadError(f"Config is not zlib-compressed: {e}") from e
+
+    if not decompressor.eof:
+        raise ConfigUploadError("Config upload is truncated")
+
+    config = b"".join(parts)
+    if hashlib.sha256(config).hexdigest() != expected_sha256:
+        raise ConfigUploadError("Hash mismatch for uploaded config")
+    return config
@@ -6,7 +6,6 @@ from typing import Any
 
 from watchdog.util.lazy_importer import lazy_import_class, lazy_import_function
 
-
 DEFAULT_DEPLOY_MODULE = "backend.deploy"
 DEFAULT_RUNTIME_BUNDLE_PATH = "backend"
 
@@ -31,6 +30,12 @@ class Module:
 class RunnableModule(Module):
     extra_run_args: list[tuple[str, str]]
     equivalent_run_definition: WeightedProcess
+    hot_standby: bool
+    resources: Any
+    liveness: Any
+    memory_budget: Any
+    startup: Any
+    live_config: bool
 
     def get_run_command(self, bundle_path: Any) -> str: ...
 
@@ -0,0 +1,202 @@
+"""
+Helpers for code running inside a process started by the watchdog.
+
+Only the standard library is used, so modules can import this from their own
+environment without pulling in the watchdog's dependencies.
+"""
+
+import base64
+import mmap
+import os
+import select
+import socket
+import struct
+import time
+
+# Set on instances started as a hot standby (RunnableModule.hot_standby). The
+# watchdog promotes the standby by writing to this FIFO.
+STANDBY_FIFO_ENV_VAR = "BLITZ_STANDBY_FIFO"
+# Set on instances with a heartbeat liveness check (RunnableModule.liveness):
+# where to send heartbeats, and the token identifying this instance.
+HEARTBEAT_SOCKET_ENV_VAR = "BLITZ_HEARTBEAT_SOCKET"
+HEARTBEAT_TOKEN_ENV_VAR = "BLITZ_HEARTBEAT_TOKEN"
+# Heartbeats closer together than this are dropped on the module's side.
+HEARTBEAT_MIN_INTERVAL_SECONDS = 0.1
+# Set on instances of modules with live config (RunnableModule.live_config):
+# where ConfigCache listens for the watchdog's config-changed notices.
+CONFIG_NOTIFY_SOCKET_ENV_VAR = "BLITZ_CONFIG_NOTIFY_SOCKET"
+
+# The watchdog decodes the config once and writes it next to --config-path:
+# this header (magic, format version, generation, payload length, sha256 of
+# the payload) followed by the decoded config bytes.
+DECODED_CONFIG_MAGIC = b"BLZC"
+DECODED_CONFIG_VERSION = 1
+DECODED_CONFIG_HEADER = struct.Struct("<4sHxxQQ32s")
+
+_heartbeat_socket: socket.socket | None = None
+_last_heartbeat_at: float = 0.0
+
+
+def is_standby() -> bool:
+    return bool(os.environ.get(STANDBY_FIFO_ENV_VAR))
+
+
+def wait_until_promoted() -> None:
+    """
+    Parks a hot-standby instance until the watchdog promotes it.
+
+    Call this once the module is initialized (imports done, models loaded,
+    sockets opened) and before it starts publishing. The watchdog only treats
+    a standby as ready while it is waiting here; otherwise it falls back to a
+    regular restart. Returns immediately for a normal (active) instance.
+    """
+
+    fifo_path = os.environ.pop(STANDBY_FIFO_ENV_VAR, None)
+    if not fifo_path:
+        return
+
+    with open(fifo_path, "rb") as fifo:
+        _ = fifo.read(1)
+
+
+def heartbeat() -> None:
+    """
+    Tells the watchdog this process is making progress.
+
+    Call it from the module's main loop, after the work that could hang (e.g.
+    each camera frame). It is cheap enough to call on every iteration, never
+    blocks, and does nothing when the module has no heartbeat liveness check.
+    """
+
+    global _heartbeat_socket, _last_heartbeat_at
+
+    socket_path = os.environ.get(HEARTBEAT_SOCKET_ENV_VAR)
+    token = os.environ.get(HEARTBEAT_TOKEN_ENV_VAR)
+    if not socket_path or not token:
+        return
+
+    now = time.monotonic()
+    if now - _last_heartbeat_at < HEARTBEAT_MIN_INTERVAL_SECONDS:
+        return
+    _last_heartbeat_at = now
+
+    if _heartbeat_socket is None:
+        _heartbeat_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        _heartbeat_socket.setblocking(False)
+    try:
+        _ = _heartbeat_socket.sendto(token.encode(), socket_path)
+    except OSError:
+        pass  # watchdog restarting or its socket buffer full; try again next time
+
+
+def decoded_config_path(config_path: str) -> str:
+    return f"{config_path}.bin"
+
+
+class ConfigCache:
+    """
+    The decoded config, mapped read-only from the file the watchdog writes
+    next to --config-path instead of read and base64-decoded by every module.
+
+        config = ConfigCache(args.config_path)
+        settings = parse(config.data)
+        ...
+        if config.refresh():  # cheap; call it as often as needed
+            settings = parse(config.data)
+
+    `generation` goes up each time the watchdog installs a new config. Don't
+    hold on to `data` (or slices of it) across a refresh(). Without the
+    decoded file (an older watchdog) the base64 file is decoded instead.
+
+    Modules with live config wait_for_update() (or select() on
+    notify_fileno()) and are then told about new configs rather than
+    restarted for them.
+    """
+
+    def __init__(self, config_path: str):
+        self.config_path: str = config_path
+        self.path: str = decoded_config_path(config_path)
+        self.generation: int = 0
+        self.sha256: str | None = None
+        self.data: memoryview = memoryview(b"")
+        self._mapped: mmap.mmap | None = None
+        self._file_id: tuple[int, int] | None = None
+        self._notify_socket: socket.socket | None = None
+        notify_path = os.environ.get(CONFIG_NOTIFY_SOCKET_ENV_VAR)
+        if notify_path:
+            self._notify_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._notify_socket.setblocking(False)
+            self._notify_socket.bind(notify_path)
+        if not self.refresh():
+            with open(config_path, "rb") as f:
+                self.data = memoryview(base64.b64decode(f.read()))
+
+    def refresh(self) -> bool:
+        """
+        Maps the file again if the watchdog replaced it; True if the config
+        generation changed.
+        """
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        # The watchdog replaces the file rather than rewriting it in place.
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id == self._file_id:
+            return False
+
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, generation, length, sha256 = (
+                DECODED_CONFIG_HEADER.unpack_from(mapped)
+            )
+        except struct.error:
+            magic, version, generation, length, sha256 = b"", 0, 0, 0, b""
+        if (
+            magic != DECODED_CONFIG_MAGIC
+            or version != DECODED_CONFIG_VERSION
+            or DECODED_CONFIG_HEADER.size + length != len(mapped)
+        ):
+            mapped.close()
+            raise ValueError(f"{self.path} is not a decoded config")
+
+        # The previous mapping is unmapped once nothing references it.
+        self._mapped = mapped
+        self._file_id = file_id
+        self.data = memoryview(mapped)[DECODED_CONFIG_HEADER.size :]
+        self.sha256 = sha256.hex()
+        changed = generation != self.generation
+        self.generation = generation
+        return changed
+
+    def notify_fileno(self) -> int | None:
+        """
+        Readable when the watchdog sent a config-changed notice, for modules
+        with their own select()/event loop; then call wait_for_update(0).
+        """
+
+        if self._notify_socket is None:
+            return None
+        return self._notify_socket.fileno()
+
+    def wait_for_update(self, timeout_seconds: float | None = 0.0) -> bool:
+        """
+        Waits up to `timeout_seconds` (forever for None) for the watchdog's
+        config-changed notice; True if a new config generation is now mapped.
+        Without live config it only refresh()es.
+        """
+
+        if self._notify_socket is None:
+            return self.refresh()
+
+        readable, _, _ = select.select([self._notify_socket], [], [], timeout_seconds)
+        if not readable:
+            return False
+        try:
+            while True:
+                _ = self._notify_socket.recv(64)
+        except BlockingIOError:
+            pass
+        return self.refresh()
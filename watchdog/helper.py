@@ -4,13 +4,17 @@ from autobahn_client.client import Autobahn
 import psutil
 from watchdog.util.logger import stats, info
 import watchdog.util.logger as logger_module
+from watchdog.accounting import AccountingTarget, ProcessAccountant, ProcessUsage
 from watchdog.generated.PiStatus_pb2 import (
+    ManagedProcessUsage,
     PiProcess,
     PiStatus,
     Ping,
     Pong,
     StatusType,
 )
+from watchdog.memory_budget import MemoryTrend
+from watchdog.monitor import ProcessMonitor
 from watchdog.util.system import (
     WatchdogSystemConfig,
     get_camera_video_ports,
@@ -19,7 +23,10 @@ from watchdog.util.system import (
 )
 
 
-def _collect_system_stats():
+def _collect_system_stats(
+    accountant: ProcessAccountant, managed_targets: list[AccountingTarget]
+):
+    managed_usage = accountant.sample(managed_targets)
     cpu_per_core = psutil.cpu_percent(interval=1, percpu=True)
     cpu_usage_total = (
         sum(cpu_per_core) / len(cpu_per_core) if cpu_per_core else psutil.cpu_percent()
@@ -37,15 +44,49 @@ def _collect_system_stats():
         net_info,
         top_10_processes,
         ports_in_use,
+        managed_usage,
     )
 
 
-async def process_watcher(config: WatchdogSystemConfig | None):
+def _to_managed_process_usage(
+    usage: ProcessUsage, trend: MemoryTrend | None
+) -> ManagedProcessUsage:
+    memory_budget_fields: dict[str, float | int] = {}
+    if trend is not None:
+        seconds = trend.seconds_until_budget()
+        memory_budget_fields = {
+            "memory_budget_bytes": trend.budget_bytes,
+            "memory_growth_bytes_per_second": trend.growth_bytes_per_second(),
+            "seconds_until_memory_budget": seconds if seconds is not None else -1,
+        }
+    return ManagedProcessUsage(
+        name=usage.name,
+        pid=usage.pid,
+        cpu_usage=usage.cpu_usage,
+        cpu_time_us=usage.cpu_time_us,
+        memory_bytes=usage.memory_bytes,
+        io_read_bytes=usage.io_read_bytes,
+        io_write_bytes=usage.io_write_bytes,
+        threads=usage.threads,
+        from_cgroup=usage.from_cgroup,
+        **memory_budget_fields,
+    )
+
+
+async def process_watcher(
+    config: WatchdogSystemConfig | None, process_monitor: ProcessMonitor | None = None
+):
     print(
         f"[DEBUG] Process watcher running! autobahn_instance={logger_module.autobahn_instance is not None}, PREFIX={logger_module.PREFIX}"
     )
+    accountant = ProcessAccountant()
     while True:
         if config and config.watchdog_api.publish_system_stats:
+            managed_targets = (
+                process_monitor.get_accounting_targets()
+                if process_monitor is not None
+                else []
+            )
             (
                 cpu_per_core,
                 cpu_usage_total,
@@ -54,7 +95,15 @@ async def process_watcher(config: WatchdogSystemConfig | None):
                 net_info,
                 top_10_processes,
                 ports_in_use,
-            ) = await asyncio.to_thread(_collect_system_stats)
+                managed_usage,
+            ) = await asyncio.to_thread(
+                _collect_system_stats, accountant, managed_targets
+            )
+            memory_trends = (
+                process_monitor.get_memory_trends()
+                if process_monitor is not None
+                else {}
+            )
             pi_status = PiStatus(
                 type=StatusType.SYSTEM_STATUS,
                 pi_name=get_system_name(),
@@ -73,6 +122,10 @@ async def process_watcher(config: WatchdogSystemConfig | None):
                     for process in top_10_processes
                 ],
                 ports_in_use=ports_in_use,
+                managed_processes=[
+                    _to_managed_process_usage(usage, memory_trends.get(usage.name))
+                    for usage in managed_usage
+                ],
             )
 
             await stats(pi_status.SerializeToString())
@@ -0,0 +1,51 @@
+import os
+import socket
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+from watchdog.ext.managed_process import CONFIG_NOTIFY_SOCKET_ENV_VAR
+
+CONFIG_NOTIFY_DIR = os.path.join(tempfile.gettempdir(), "blitz-config-notify")
+
+
+@dataclass
+class ConfigNotifyChannel:
+    """
+    Datagram socket a module with live config (RunnableModule.live_config)
+    binds through ConfigCache; the watchdog sends it each new generation.
+    """
+
+    socket_path: str
+
+    @classmethod
+    def create(cls, process_type: str) -> "ConfigNotifyChannel":
+        os.makedirs(CONFIG_NOTIFY_DIR, mode=0o700, exist_ok=True)
+        return cls(
+            os.path.join(
+                CONFIG_NOTIFY_DIR, f"{process_type}-{uuid.uuid4().hex[:8]}.sock"
+            )
+        )
+
+    def env(self) -> dict[str, str]:
+        return {CONFIG_NOTIFY_SOCKET_ENV_VAR: self.socket_path}
+
+    def notify(self, generation: int) -> bool:
+        """
+        Tells the module to reload. Fails when it isn't listening (still
+        starting, or not using ConfigCache), in which case it gets restarted.
+        """
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            try:
+                _ = sock.sendto(str(generation).encode(), self.socket_path)
+            except OSError:
+                return False
+        return True
+
+    def close(self) -> None:
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
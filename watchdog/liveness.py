@@ -0,0 +1,223 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from typing import IO, Protocol
+
+from watchdog.accounting import AccountingTarget, read_usage
+from watchdog.ext.managed_process import (
+    HEARTBEAT_SOCKET_ENV_VAR,
+    HEARTBEAT_TOKEN_ENV_VAR,
+)
+from watchdog.util.logger import debug
+
+HEARTBEAT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "blitz-heartbeat.sock")
+# Stall events kept per process for the status endpoint.
+MAX_STALL_EVENTS = 20
+# CPU-time progress is sampled this often, however often the process is
+# polled (every 50 ms while a standby waits).
+CPU_SAMPLE_INTERVAL_SECONDS = 1.0
+
+
+class LivenessCheckLike(Protocol):
+    """
+    What the watchdog reads from backend.deployment.module.base.LivenessCheck.
+    """
+
+    mode: Enum
+    timeout_seconds: float
+    startup_grace_seconds: float
+    min_cpu_seconds: float
+
+
+class HeartbeatServer:
+    """
+    Unix datagram socket modules send heartbeat() tokens to. Received beats
+    are recorded from a background thread.
+    """
+
+    def __init__(self, socket_path: str = HEARTBEAT_SOCKET_PATH):
+        self.socket_path: str = socket_path
+        self.last_beats: dict[str, float] = {}
+        self._socket: socket.socket | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._socket is not None:
+                return
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.bind(self.socket_path)
+            threading.Thread(
+                target=self._receive, args=(self._socket,), daemon=True
+            ).start()
+
+    def env(self, token: str) -> dict[str, str]:
+        self.ensure_started()
+        return {
+            HEARTBEAT_SOCKET_ENV_VAR: self.socket_path,
+            HEARTBEAT_TOKEN_ENV_VAR: token,
+        }
+
+    def last_beat(self, token: str) -> float | None:
+        return self.last_beats.get(token)
+
+    def forget(self, token: str) -> None:
+        _ = self.last_beats.pop(token, None)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._socket is None:
+                return
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _receive(self, server: socket.socket) -> None:
+        while True:
+            try:
+                data = server.recv(256)
+            except OSError:
+                return  # closed
+            self.last_beats[data.decode(errors="replace")] = time.monotonic()
+
+
+@dataclass
+class StallEvent:
+    detected_at: float
+    stalled_seconds: float
+    mode: str
+
+    def to_json(self) -> dict[str, float | str]:
+        return {
+            "detected_at": self.detected_at,
+            "stalled_seconds": round(self.stalled_seconds, 2),
+            "mode": self.mode,
+        }
+
+
+class LivenessTracker:
+    """
+    Progress of one process started with a liveness check.
+    """
+
+    def __init__(
+        self,
+        check: LivenessCheckLike,
+        heartbeats: HeartbeatServer,
+        mode: str | None = None,
+    ):
+        self.check: LivenessCheckLike = check
+        self.mode: str = mode or str(check.mode.value)
+        self.heartbeats: HeartbeatServer = heartbeats
+        self.token: str = uuid.uuid4().hex
+        self.started_at: float = time.monotonic()
+        self.last_progress_at: float = self.started_at
+        self._cpu_time_at_progress_us: int | None = None
+        self._cpu_sampled_at: float | None = None
+
+    def env(self) -> dict[str, str]:
+        return self.heartbeats.env(self.token) if self.mode == "heartbeat" else {}
+
+    def reset(self) -> None:
+        """
+        Restarts the grace period, e.g. when a parked standby is promoted.
+        """
+
+        self.started_at = self.last_progress_at = time.monotonic()
+
+    def beat(self) -> None:
+        self.last_progress_at = time.monotonic()
+
+    def has_signalled_ready(self) -> bool | None:
+        """
+        Whether the process has shown its first progress since it started;
+        None when the mode can't tell (CPU time is used while initializing).
+        """
+
+        match self.mode:
+            case "heartbeat":
+                last_beat = self.heartbeats.last_beat(self.token)
+                return last_beat is not None and last_beat >= self.started_at
+            case "stdout":
+                return self.last_progress_at > self.started_at
+            case _:
+                return None
+
+    def is_cpu_sample_due(self) -> bool:
+        return self.mode == "cpu_time" and (
+            self._cpu_sampled_at is None
+            or time.monotonic() - self._cpu_sampled_at >= CPU_SAMPLE_INTERVAL_SECONDS
+        )
+
+    def sample_cpu(self, target: AccountingTarget) -> None:
+        """
+        Records CPU-time progress. Without a cgroup this walks the process
+        tree, so the monitor calls it from a worker thread.
+        """
+
+        now = time.monotonic()
+        self._cpu_sampled_at = now
+        usage = read_usage(target)
+        if usage is None:
+            return
+
+        if self._cpu_time_at_progress_us is None:
+            self._cpu_time_at_progress_us = usage.cpu_time_us
+            return
+        used_us = usage.cpu_time_us - self._cpu_time_at_progress_us
+        if used_us >= self.check.min_cpu_seconds * 1e6 or used_us < 0:
+            self._cpu_time_at_progress_us = usage.cpu_time_us
+            self.last_progress_at = now
+
+    def stalled_for(self) -> float | None:
+        """
+        How long the process has shown no progress, if that is past its
+        deadline; None while it is considered alive.
+        """
+
+        now = time.monotonic()
+        match self.mode:
+            case "heartbeat":
+                last_beat = self.heartbeats.last_beat(self.token)
+                if last_beat is not None:
+                    self.last_progress_at = max(self.last_progress_at, last_beat)
+            case _:
+                # stdout: the pump thread calls beat(); cpu_time: the monitor
+                # calls sample_cpu().
+                pass
+
+        deadline = max(
+            self.started_at + self.check.startup_grace_seconds,
+            self.last_progress_at + self.check.timeout_seconds,
+        )
+        if now <= deadline:
+            return None
+        return now - self.last_progress_at
+
+    def close(self) -> None:
+        self.heartbeats.forget(self.token)
+
+
+def pump_stdout(name: str, stream: IO[str], tracker: LivenessTracker) -> None:
+    """
+    Forwards a piped module's output to the watchdog's stdout, counting each
+    line as progress. Runs in its own thread until the stream closes.
+    """
+
+    def run() -> None:
+        for line in stream:
+            tracker.beat()
+            _ = sys.stdout.write(line)
+        sys.stdout.flush()
+        debug(f"Output of {name} closed")
+
+    threading.Thread(target=run, name=f"{name}-stdout", daemon=True).start()
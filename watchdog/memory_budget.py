@@ -0,0 +1,102 @@
+import time
+from collections import deque
+from typing import Protocol
+
+# How often the RSS of a process with a memory budget is sampled.
+MEMORY_SAMPLE_INTERVAL_SECONDS = 5.0
+# A trend is only projected once the samples span this part of the window,
+# so the burst of allocations while a module starts up isn't taken for a leak.
+MIN_TREND_SPAN_FRACTION = 0.25
+
+
+class MemoryBudgetLike(Protocol):
+    """
+    What the watchdog reads from backend.deployment.module.base.MemoryBudget.
+    """
+
+    max_rss_mb: int
+    window_seconds: float
+    warn_horizon_seconds: float
+    restart: bool
+
+
+class MemoryTrend:
+    """
+    RSS samples of one process over a sliding window, with a least-squares
+    growth rate fitted to them.
+    """
+
+    def __init__(self, budget: MemoryBudgetLike):
+        self.budget: MemoryBudgetLike = budget
+        self.samples: deque[tuple[float, int]] = deque()
+        self.last_warned_at: float | None = None
+
+    @property
+    def budget_bytes(self) -> int:
+        return self.budget.max_rss_mb * 1024 * 1024
+
+    def is_sample_due(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return not self.samples or now - self.samples[-1][0] >= (
+            MEMORY_SAMPLE_INTERVAL_SECONDS
+        )
+
+    def add(self, rss_bytes: int, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, rss_bytes))
+        while self.samples and now - self.samples[0][0] > self.budget.window_seconds:
+            _ = self.samples.popleft()
+
+    def growth_bytes_per_second(self) -> float:
+        if len(self.samples) < 3:
+            return 0.0
+        span = self.samples[-1][0] - self.samples[0][0]
+        if span < self.budget.window_seconds * MIN_TREND_SPAN_FRACTION:
+            return 0.0
+
+        mean_t = sum(t for t, _ in self.samples) / len(self.samples)
+        mean_rss = sum(rss for _, rss in self.samples) / len(self.samples)
+        covariance = sum((t - mean_t) * (rss - mean_rss) for t, rss in self.samples)
+        variance = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        return covariance / variance if variance > 0 else 0.0
+
+    def seconds_until_budget(self) -> float | None:
+        """
+        0 once the budget is exceeded; None while RSS isn't growing toward it.
+        """
+
+        if not self.samples:
+            return None
+        rss = self.samples[-1][1]
+        if rss >= self.budget_bytes:
+            return 0.0
+        growth = self.growth_bytes_per_second()
+        if growth <= 0:
+            return None
+        return (self.budget_bytes - rss) / growth
+
+    def should_warn(self, now: float | None = None) -> bool:
+        """
+        True at most once per window while the budget is about to be exceeded.
+        """
+
+        now = time.monotonic() if now is None else now
+        seconds = self.seconds_until_budget()
+        if seconds is None or seconds > self.budget.warn_horizon_seconds:
+            return False
+        if (
+            self.last_warned_at is not None
+            and now - self.last_warned_at < self.budget.window_seconds
+        ):
+            return False
+        self.last_warned_at = now
+        return True
+
+    def to_json(self) -> dict[str, float | int | None]:
+        seconds = self.seconds_until_budget()
+        return {
+            "rss_bytes": self.samples[-1][1] if self.samples else None,
+            "growth_bytes_per_second": round(self.growth_bytes_per_second(), 1),
+            "budget_bytes": self.budget_bytes,
+            "seconds_until_budget": round(seconds, 1) if seconds is not None else None,
+        }
@@ -1,36 +1,106 @@
+import atexit
 import json
 import asyncio
 import pathlib
+import shlex
+import threading
+import time
+from collections import deque
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from typing import cast
 from watchdog.constants import (
     BASIC_SYSTEM_CONFIG_PATH,
     BLITZ_PATH,
     BUNDLE_FOLDER_PATH,
     SYSTEM_NAME,
 )
+from watchdog.artifacts import (
+    ARTIFACT_CHECK_INTERVAL_SECONDS,
+    ArtifactHasher,
+    LaunchInputs,
+)
+from watchdog.config_store import config_generation
 from watchdog.ext.expected_deployment_struct import RunnableModule, get_modules
+from watchdog.live_config import ConfigNotifyChannel
+from watchdog.liveness import (
+    MAX_STALL_EVENTS,
+    HeartbeatServer,
+    LivenessCheckLike,
+    LivenessTracker,
+    StallEvent,
+    pump_stdout,
+)
+from watchdog.memory_budget import MemoryBudgetLike, MemoryTrend
 from watchdog.process_starter import OpenedProcess
+from watchdog.accounting import AccountingTarget, read_usage
+from watchdog.commands import (
+    CommandKind,
+    MonitorCommand,
+    MonitorCommandQueue,
+)
+from watchdog.resources import (
+    ProcessPlacement,
+    ResourceProfileLike,
+    apply_resource_profile,
+    read_effective_resources,
+)
+from watchdog.standby import (
+    STANDBY_POLL_INTERVAL_SECONDS,
+    FailoverStats,
+    StandbyChannel,
+)
+from watchdog.startup import StartupPlanner, StartupPolicyLike, StartupReport
+from watchdog.util.files import write_atomically
 from watchdog.util.lazy_importer import LazyImportError
 from watchdog.util.logger import debug, error, info, warning
+from watchdog.zygote import ForkedProcess, ZygoteModule, stop_all_zygotes
 import os
 
+ManagedProcess = OpenedProcess | ForkedProcess
+
+
+# Bursts of changes to the process memory (e.g. a crash loop) are written once
+# this long after the first of them.
+PROCESS_MEMORY_DEBOUNCE_SECONDS = 0.5
+
 
 class ProcessesMemory(list[str]):
-    def __init__(self, processes: list[str], file_path: str):
+    def __init__(
+        self, processes: list[str], file_path: str, debounce_seconds: float = 0.0
+    ):
         super().__init__(processes)
         self.file_path: str = file_path
+        self.debounce_seconds: float = debounce_seconds
+        self._lock: threading.Lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        self._written: str | None = None
+        if debounce_seconds > 0:
+            _ = atexit.register(self.flush)
 
     @staticmethod
-    def from_file(file_path: str) -> "ProcessesMemory":
-        ProcessesMemory.__verify_non_empty(file_path)
-
-        f = open(file_path, "r")
-        data: list[str] = (
-            json.load(f).get("processes", []) or []  # pyright: ignore[reportAny]
-        )
-
-        f.close()
-
-        return ProcessesMemory(data, file_path)
+    def from_file(file_path: str, debounce_seconds: float = 0.0) -> "ProcessesMemory":
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        data: list[str] = []
+        contents: str | None = None
+        try:
+            with open(file_path, "r") as f:
+                contents = f.read()
+            stored: dict[str, list[str]] = json.loads(  # pyright: ignore[reportAny]
+                contents
+            )
+            data = stored.get("processes", []) or []
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            contents = None
+            warning(f"Ignoring unreadable process memory {file_path}: {e}")
+
+        memory = ProcessesMemory(data, file_path, debounce_seconds)
+        # An intact file in the format flush() writes is not written again.
+        memory._written = contents
+        memory.flush()
+        return memory
 
     def append(self, process_type: str):  # pyright: ignore[reportImplicitOverride]
         if process_type not in self:
@@ -49,17 +119,55 @@ class ProcessesMemory(list[str]):
                 super().append(process_type)
         self.save()
 
-    @staticmethod
-    def __verify_non_empty(file_path: str):
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            with open(file_path, "w") as f:
-                json.dump({"processes": []}, f)
-
     def save(self):
-        ProcessesMemory.__verify_non_empty(self.file_path)
-        with open(self.file_path, "w") as f:
-            json.dump({"processes": self}, f)
+        """
+        Writes the memory now, or with a debounce from a timer thread so the
+        caller (usually the event loop) doesn't wait on the disk.
+        """
+
+        if self.debounce_seconds <= 0:
+            self.flush()
+            return
+
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.debounce_seconds, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            contents = json.dumps({"processes": list(self)})
+            if contents == self._written:
+                return
+            write_atomically(self.file_path, contents)
+            self._written = contents
+
+
+@dataclass
+class _Launch:
+    """
+    A process about to be spawned, with what was set up for it beforehand.
+    """
+
+    process_type: str
+    module: RunnableModule
+    env: dict[str, str]
+    pipe_stdout: bool
+    standby_channel: StandbyChannel | None
+    liveness: LivenessTracker | None
+    config_channel: ConfigNotifyChannel | None
+
+    def abandon(self) -> None:
+        # The spawn failed; its channels would otherwise never be closed.
+        if self.liveness is not None:
+            self.liveness.close()
+        if self.config_channel is not None:
+            self.config_channel.close()
 
 
 class ProcessMonitor:
@@ -68,21 +176,68 @@ class ProcessMonitor:
         memory_file: str,
         config_path: str,
         loop: asyncio.AbstractEventLoop,
+        memory_debounce_seconds: float = PROCESS_MEMORY_DEBOUNCE_SECONDS,
     ):
         self.processes: dict[
             str,
-            OpenedProcess,
+            ManagedProcess,
         ] = {}
+        # Hot-standby instances, parked until the active instance dies.
+        self.standbys: dict[str, tuple[ManagedProcess, StandbyChannel]] = {}
+        self.failovers: dict[str, FailoverStats] = {}
+        # Where each active process was placed and what of its resource
+        # profile could not be applied.
+        self.placements: dict[str, ProcessPlacement] = {}
+        # Progress of processes started with a liveness check, by pid.
+        self.liveness: dict[int, LivenessTracker] = {}
+        self.heartbeats: HeartbeatServer = HeartbeatServer()
+        self.stall_events: dict[str, deque[StallEvent]] = {}
+        # RSS trends of processes with a memory budget, by pid.
+        self.memory_trends: dict[int, MemoryTrend] = {}
+        # Config-changed channels of processes with live config, by pid.
+        self.config_channels: dict[int, ConfigNotifyChannel] = {}
+        # What each process was started from, by pid.
+        self.launch_inputs: dict[int, LaunchInputs] = {}
+        # Resource profile each process was started with, by pid, so a
+        # promoted standby is placed without looking its module up again.
+        self.resource_profiles: dict[int, ResourceProfileLike | None] = {}
+        self.artifacts: ArtifactHasher = ArtifactHasher()
+        self.startup_report: StartupReport | None = None
+        # Every state change requested through the API runs from here.
+        self.commands: MonitorCommandQueue = MonitorCommandQueue(self.execute_command)
         self.config_path: str = config_path
-        self.process_mem: ProcessesMemory = ProcessesMemory.from_file(memory_file)
-        self._loop: asyncio.AbstractEventLoop = loop
-        self.is_config_exists: bool = (
-            pathlib.Path(config_path).exists()
-            and pathlib.Path(config_path).is_file()
-            and os.path.getsize(config_path) > 0
+        self.process_mem: ProcessesMemory = ProcessesMemory.from_file(
+            memory_file, memory_debounce_seconds
         )
+        self._loop: asyncio.AbstractEventLoop = loop
+        self.is_config_exists: bool = self._config_file_exists()
+
+    async def run_command(self, command: MonitorCommand) -> None:
+        await self.commands.submit(command)
+
+    async def execute_command(self, command: MonitorCommand) -> None:
+        match command.kind:
+            case CommandKind.SET_PROCESSES:
+                await self.set_processes(command.process_types)
+            case CommandKind.START_PROCESSES:
+                for process_type in command.process_types:
+                    await self.start_and_monitor_process(process_type)
+            case CommandKind.STOP_PROCESSES:
+                for process_type in command.process_types:
+                    await self.stop_process(process_type)
+            case CommandKind.STOP_ALL:
+                await self.abort_all_processes()
+            case CommandKind.REFRESH_CONFIG:
+                await self.refresh_config()
+            case CommandKind.APPLY:
+                await self.apply(
+                    command.process_types,
+                    restart_running=command.restart_running,
+                )
+            case CommandKind.RESTART_CHANGED:
+                _ = await self.restart_changed_processes()
 
-    def set_processes(self, new_processes: list[str]):
+    async def set_processes(self, new_processes: list[str]):
         current_active = set(self.get_active_processes())
         new_set = set(new_processes)
 
@@ -90,14 +245,135 @@ class ProcessMonitor:
         to_start = new_set - current_active
 
         for process_type in to_stop:
-            self.stop_process(process_type)
+            await self.stop_process(process_type)
 
         self.process_mem.replace(new_processes)
 
         for process_type in to_start:
-            self.start_and_monitor_process(process_type)
+            await self.start_and_monitor_process(process_type)
+
+    async def apply(
+        self,
+        new_processes: list[str],
+        *,
+        restart_running: bool,
+    ):
+        """
+        set_processes() after the config file or bundle was (possibly)
+        replaced. Processes that stay are restarted if their module files,
+        the rest of the bundle or their launch arguments changed, and with
+        `restart_running` (a new config) unless they take it live, so every
+        process restarts at most once.
+        """
+
+        self.is_config_exists = self._config_file_exists()
+        kept = set(self.processes) & set(new_processes)
+        pending = await self.get_pending_restarts(max_age_seconds=0)
+        restart = kept & pending.keys()
+        if restart_running:
+            restart |= kept - restart - await self._push_config(kept - restart)
+        for process_type in restart:
+            await self._stop_for_restart(process_type)
+        await self.set_processes(new_processes)
+
+    async def restart_changed_processes(self) -> list[str]:
+        """
+        Restarts the processes whose module files or launch arguments changed
+        since they were started, e.g. after a bundle install.
+        """
+
+        restart = list(await self.get_pending_restarts(max_age_seconds=0))
+        for process_type in restart:
+            info(f"Restarting {process_type}: its inputs changed")
+            await self._stop_for_restart(process_type)
+            await self.start_and_monitor_process(process_type)
+        return restart
+
+    async def get_pending_restarts(
+        self, max_age_seconds: float = ARTIFACT_CHECK_INTERVAL_SECONDS
+    ) -> dict[str, list[str]]:
+        """
+        Running processes started from other module files ("artifacts"),
+        other shared bundle files ("bundle") or arguments ("argv") than they
+        would be now, with what changed.
+        """
+
+        # The state is read here, on the loop; walking and hashing the module
+        # files happens in a thread.
+        launched = {
+            process_type: inputs
+            for process_type, process in self.processes.items()
+            if (inputs := self.launch_inputs.get(process.pid)) is not None
+        }
+        if not launched:
+            return {}
+        return await asyncio.to_thread(
+            self._changed_launch_inputs, launched, max_age_seconds
+        )
+
+    def _changed_launch_inputs(
+        self, launched: dict[str, LaunchInputs], max_age_seconds: float
+    ) -> dict[str, list[str]]:
+        modules = {
+            module.name: module
+            for module in get_modules()
+            if isinstance(module, RunnableModule)
+        }
+        bundle_hash = self._bundle_hash(modules.values(), max_age_seconds)
+
+        pending: dict[str, list[str]] = {}
+        for process_type, inputs in launched.items():
+            module = modules.get(process_type)
+            if module is None:
+                continue
+            changes = inputs.changes_from(
+                self._launch_inputs(module, bundle_hash, max_age_seconds)
+            )
+            if changes:
+                pending[process_type] = changes
+        return pending
 
-    def start_and_monitor_process(self, process_type: str):
+    def _launch_inputs(
+        self,
+        module: RunnableModule,
+        bundle_hash: str | None,
+        max_age_seconds: float = 0,
+    ) -> LaunchInputs:
+        argv = shlex.split(module.get_run_command(BUNDLE_FOLDER_PATH))
+        for flag, value in self._launch_flags().items():
+            argv.extend([f"--{flag}", value])
+        project_path = str(module.get_project_path(BUNDLE_FOLDER_PATH))
+        return LaunchInputs(
+            tuple(argv),
+            self.artifacts.tree_hash(project_path, max_age_seconds),
+            bundle_hash,
+        )
+
+    def _bundle_hash(
+        self, modules: Iterable[RunnableModule], max_age_seconds: float = 0
+    ) -> str | None:
+        # Hashed from the installed files rather than taken from the archive,
+        # whose bytes differ on every build. The runnable modules' own
+        # folders are left out, so changing one module doesn't restart the
+        # others.
+        return self.artifacts.tree_hash(
+            BUNDLE_FOLDER_PATH,
+            max_age_seconds,
+            exclude=[
+                str(module.get_project_path(BUNDLE_FOLDER_PATH)) for module in modules
+            ],
+        )
+
+    def _launch_flags(self) -> dict[str, str]:
+        return {
+            "config-path": self.config_path,
+            "basic-system-config-path": BASIC_SYSTEM_CONFIG_PATH,
+            "blitz-path": BLITZ_PATH,
+            "bundle-folder-path": BUNDLE_FOLDER_PATH,
+            "system-name": SYSTEM_NAME,
+        }
+
+    async def start_and_monitor_process(self, process_type: str):
         if not self.is_config_exists:
             warning(f"Config not set! Cannot start process {process_type}.")
             return
@@ -106,30 +382,313 @@ class ProcessMonitor:
             return
 
         debug(f"Starting process {process_type}")
-        process = self.start_process(process_type)
+        process = await self.start_process(process_type)
         if process is None:
             warning(f"Failed to start process {process_type}, skipping...")
             return
+        if process_type in self.processes:
+            # Started by the monitor meanwhile; keep that one.
+            await self._stop(process)
+            return
 
         self.processes[process_type] = process
         self.process_mem.append(process_type)
+        await self.start_standby(process_type)
 
         _ = self._loop.call_soon_threadsafe(
             asyncio.create_task, self.monitor_process(process_type)
         )
 
-    # todo: make it wait a bit and then try again maybe? some other solution?
-    def _restore_processes_from_memory(self):
+    async def start_standby(self, process_type: str) -> None:
+        launch = self._prepare_standby(process_type)
+        if launch is not None:
+            spawned = await asyncio.to_thread(self._spawn, launch)
+            await self._finish_standby(launch, spawned)
+
+    def _prepare_standby(self, process_type: str) -> _Launch | None:
+        module = self._find_runnable_module(process_type)
+        if module is None or not getattr(module, "hot_standby", False):
+            return None
+        if process_type not in self.processes:
+            return None
+
+        channel = StandbyChannel.create(process_type)
+        launch = self._prepare_launch(process_type, standby_channel=channel)
+        if launch is None:
+            channel.close()
+        return launch
+
+    async def _finish_standby(
+        self, launch: _Launch, spawned: tuple[ManagedProcess, LaunchInputs] | None
+    ) -> None:
+        assert launch.standby_channel is not None
+        standby = self._record_launch(launch, spawned)
+        if standby is None:
+            launch.standby_channel.close()
+            warning(f"Failed to start standby for {launch.process_type}")
+            return
+        await self._set_standby(launch.process_type, standby, launch.standby_channel)
+
+    async def _set_standby(
+        self, process_type: str, standby: ManagedProcess, channel: StandbyChannel
+    ) -> None:
+        if process_type not in self.processes:
+            # Stopped while the standby was starting.
+            channel.close()
+            await self._stop(standby)
+            return
+
+        previous = self.standbys.pop(process_type, None)
+        self.standbys[process_type] = (standby, channel)
+        debug(f"Started standby for {process_type}")
+        if previous is not None:
+            await self._discard_standby(previous)
+
+    async def _stop_standby(self, process_type: str) -> None:
+        standby = self.standbys.pop(process_type, None)
+        if standby is not None:
+            await self._discard_standby(standby)
+
+    async def _discard_standby(
+        self, standby: tuple[ManagedProcess, StandbyChannel]
+    ) -> None:
+        process, channel = standby
+        channel.close()
+        await self._stop(process)
+
+    async def _stop(self, process: ManagedProcess) -> None:
+        # Stopping waits up to seconds for the process (and its children) to
+        # exit, so it runs in a thread; the state is forgotten on the loop.
+        await asyncio.to_thread(process.stop)
+        self._forget_process_state(process)
+
+    async def _promote_standby(self, process_type: str, last_alive_at: float) -> bool:
+        """
+        Swaps a waiting standby in for a dead active instance. Returns False,
+        discarding the standby, if it isn't ready to take over.
+        """
+
+        standby = self.standbys.pop(process_type, None)
+        if standby is None:
+            return False
+
+        process, channel = standby
+        promoted = process.is_alive() and channel.promote()
+        channel.close()
+        if not promoted:
+            warning(f"Standby for {process_type} was not ready; restarting instead")
+            await self._stop(process)
+            return False
+
+        latency_s = time.perf_counter() - last_alive_at
+        self.processes[process_type] = process
+        self._apply_resources(
+            process_type, process, self.resource_profiles.get(process.pid)
+        )
+        tracker = self.liveness.get(process.pid)
+        if tracker is not None:
+            tracker.reset()
+        self.failovers.setdefault(process_type, FailoverStats()).record(latency_s)
+        info(
+            f"Promoted standby for {process_type} "
+            f"(failover within {latency_s * 1000:.0f} ms)"
+        )
+        return True
+
+    def get_failover_stats(self) -> dict[str, dict[str, float | int]]:
+        return {
+            process_type: stats.to_json()
+            for process_type, stats in self.failovers.items()
+        }
+
+    def _apply_resources(
+        self,
+        process_type: str,
+        process: ManagedProcess,
+        profile: ResourceProfileLike | None,
+        *,
+        standby: bool = False,
+    ) -> None:
+        # Standbys get their own cgroup so they don't count against the
+        # active instance's limits or usage; promotion moves them over.
+        cgroup_name = f"{process_type}.standby" if standby else process_type
+        placement = apply_resource_profile(process.pid, profile, cgroup_name)
+        if not standby:
+            self.placements[process_type] = placement
+
+    def get_resource_report(self) -> dict[str, dict[str, object]]:
+        report: dict[str, dict[str, object]] = {}
+        for process_type, process in self.processes.items():
+            effective = read_effective_resources(process.pid)
+            if effective is not None:
+                placement = self.placements.get(process_type, ProcessPlacement())
+                effective["errors"] = placement.errors
+                report[process_type] = effective
+        return report
+
+    def _accounting_target(
+        self, process_type: str, process: ManagedProcess
+    ) -> AccountingTarget:
+        return AccountingTarget(
+            name=process_type,
+            pid=process.pid,
+            cgroup=self.placements.get(process_type, ProcessPlacement()).cgroup,
+        )
+
+    def get_accounting_targets(self) -> list[AccountingTarget]:
+        return [
+            self._accounting_target(process_type, process)
+            for process_type, process in self.processes.items()
+            if process.is_alive()
+        ]
+
+    def _create_liveness_tracker(
+        self, module: RunnableModule
+    ) -> LivenessTracker | None:
+        check = cast(LivenessCheckLike | None, getattr(module, "liveness", None))
+        if check is None:
+            return None
+
+        mode = None
+        if check.mode.value == "stdout" and getattr(module, "use_zygote", False):
+            warning(
+                f"{module.name} is forked by a zygote, so its output can't be "
+                "watched; checking its CPU time for liveness instead"
+            )
+            mode = "cpu_time"
+        return LivenessTracker(check, self.heartbeats, mode)
+
+    async def _is_stalled(self, process_type: str, process: ManagedProcess) -> bool:
+        tracker = self.liveness.get(process.pid)
+        if tracker is None:
+            return False
+        if tracker.is_cpu_sample_due():
+            await asyncio.to_thread(
+                tracker.sample_cpu, self._accounting_target(process_type, process)
+            )
+        stalled_seconds = tracker.stalled_for()
+        if stalled_seconds is None:
+            return False
+
+        events = self.stall_events.setdefault(
+            process_type, deque(maxlen=MAX_STALL_EVENTS)
+        )
+        events.append(StallEvent(time.time(), stalled_seconds, tracker.mode))
+        error(
+            f"Process {process_type} made no progress ({tracker.mode}) for "
+            f"{stalled_seconds:.1f} s; restarting..."
+        )
+        return True
+
+    def _is_due_for_memory_restart(
+        self, process_type: str, process: ManagedProcess
+    ) -> bool:
+        trend = self.memory_trends.get(process.pid)
+        if trend is None or not trend.is_sample_due():
+            return False
+        usage = read_usage(self._accounting_target(process_type, process))
+        if usage is None:
+            return False
+        trend.add(usage.resident_bytes)
+
+        seconds = trend.seconds_until_budget()
+        if trend.should_warn():
+            warning(
+                f"Process {process_type} uses {usage.resident_bytes / 2**20:.0f} MiB, "
+                f"growing {trend.growth_bytes_per_second() / 1024:.1f} KiB/s; "
+                f"its {trend.budget.max_rss_mb} MiB budget is exceeded "
+                + ("now" if seconds == 0 else f"in {seconds:.0f} s")
+            )
+        if not trend.budget.restart or seconds is None:
+            return False
+        if seconds > trend.budget.warn_horizon_seconds:
+            return False
+
+        # Safe moments: a standby can take over without a gap, or waiting
+        # longer would only let the process push the Pi into swap.
+        standby = self.standbys.get(process_type)
+        if seconds > 0 and (standby is None or not standby[0].is_alive()):
+            return False
+        info(f"Restarting {process_type} before it exceeds its memory budget")
+        return True
+
+    def get_memory_trends(self) -> dict[str, MemoryTrend]:
+        return {
+            process_type: trend
+            for process_type, process in self.processes.items()
+            if (trend := self.memory_trends.get(process.pid)) is not None
+        }
+
+    def get_memory_report(self) -> dict[str, dict[str, float | int | None]]:
+        return {
+            process_type: trend.to_json()
+            for process_type, trend in self.get_memory_trends().items()
+        }
+
+    def _forget_process_state(self, process: ManagedProcess) -> None:
+        tracker = self.liveness.pop(process.pid, None)
+        if tracker is not None:
+            tracker.close()
+        _ = self.memory_trends.pop(process.pid, None)
+        channel = self.config_channels.pop(process.pid, None)
+        if channel is not None:
+            channel.close()
+        _ = self.launch_inputs.pop(process.pid, None)
+        _ = self.resource_profiles.pop(process.pid, None)
+
+    def get_stall_events(self) -> dict[str, list[dict[str, float | str]]]:
+        return {
+            process_type: [event.to_json() for event in events]
+            for process_type, events in self.stall_events.items()
+        }
+
+    def get_standby_processes(self) -> list[str]:
+        return [
+            process_type
+            for process_type, (process, _) in self.standbys.items()
+            if process.is_alive()
+        ]
+
+    async def restore_processes_from_memory(self) -> StartupReport | None:
         if not self.is_config_exists:
             warning(f"Config not set! Cannot restore processes from memory.")
-            return
+            return None
 
+        policies: dict[str, StartupPolicyLike | None] = {}
         for process_str in self.process_mem:
-            try:
-                info(f"Restoring process from memory: {process_str}")
-                self.start_and_monitor_process(process_str)
-            except (ValueError, KeyError):
+            module = self._find_runnable_module(process_str)
+            if module is None:
                 warning(f"Invalid process type in memory: {process_str}")
+                continue
+            policies[process_str] = cast(
+                StartupPolicyLike | None, getattr(module, "startup", None)
+            )
+
+        planner = StartupPlanner(
+            policies,
+            self._restore_process,
+            lambda process_type: process_type in self.ping_processes_and_get_alive(),
+            self._has_signalled_ready,
+        )
+        self.startup_report = await planner.run()
+        return self.startup_report
+
+    async def _restore_process(self, process_type: str) -> bool:
+        info(f"Restoring process from memory: {process_type}")
+        await self.run_command(
+            MonitorCommand(CommandKind.START_PROCESSES, [process_type])
+        )
+        return process_type in self.processes
+
+    def _has_signalled_ready(self, process_type: str) -> bool | None:
+        process = self.processes.get(process_type)
+        tracker = self.liveness.get(process.pid) if process is not None else None
+        return tracker.has_signalled_ready() if tracker is not None else None
+
+    def get_startup_report(self) -> dict[str, object] | None:
+        if self.startup_report is None:
+            return None
+        return self.startup_report.to_json()
 
     def get_active_processes(self):
         return list(self.processes.keys())
@@ -149,73 +708,225 @@ class ProcessMonitor:
             if self.processes[process_type].is_alive()
         ]
 
-    def stop_process(self, process_type: str):
+    async def stop_process(self, process_type: str):
         self.process_mem.remove(process_type)
         process = self.processes.pop(process_type, None)
         if process is not None:
-            process.stop()
+            await self._stop(process)
+        await self._stop_standby(process_type)
 
-    def abort_all_processes(self):
+    async def abort_all_processes(self):
         info("Start Abort!")
         for process_type in list(self.processes.keys()):
-            self.stop_process(process_type)
+            await self.stop_process(process_type)
         self.process_mem.replace([])
+        await asyncio.to_thread(stop_all_zygotes)
 
         info("Aborted Successfully!")
 
-    def refresh_config(self):
-        self.reboot_processes()
-        self.is_config_exists = (
+    async def refresh_config(self):
+        await self.reboot_processes(keep=await self._push_config(list(self.processes)))
+        self.is_config_exists = self._config_file_exists()
+
+    async def _push_config(self, process_types: Iterable[str]) -> set[str]:
+        """
+        Sends the new config generation to the processes with live config;
+        returns those that took it, the rest need a restart.
+        """
+
+        generation = config_generation(self.config_path)
+        if generation is None:
+            return set()
+
+        reloaded: set[str] = set()
+        for process_type in process_types:
+            process = self.processes.get(process_type)
+            if process is None:
+                continue
+            channel = self.config_channels.get(process.pid)
+            if channel is None or not channel.notify(generation):
+                continue
+            reloaded.add(process_type)
+            info(f"Sent config generation {generation} to {process_type}")
+
+            standby = self.standbys.get(process_type)
+            standby_channel = (
+                self.config_channels.get(standby[0].pid) if standby else None
+            )
+            if standby is not None and (
+                standby_channel is None or not standby_channel.notify(generation)
+            ):
+                # It can't be told; park a fresh one with the new config.
+                await self._stop_standby(process_type)
+                await self.start_standby(process_type)
+        return reloaded
+
+    def _config_file_exists(self) -> bool:
+        return (
             pathlib.Path(self.config_path).exists()
             and pathlib.Path(self.config_path).is_file()
             and os.path.getsize(self.config_path) > 0
         )
 
-    def reboot_processes(self):
+    async def reboot_processes(self, keep: Collection[str] = ()):
         info("Start reboot!")
         process_types_to_restore = list(self.process_mem)
         for process_type in list(self.processes.keys()):
-            self.processes.pop(process_type).stop()
+            if process_type not in keep:
+                await self._stop_for_restart(process_type)
 
         for process_type in process_types_to_restore:
-            self.start_and_monitor_process(process_type)
+            await self.start_and_monitor_process(process_type)
 
         info("Rebooted Successfully!")
 
-    def start_process(self, process_type: str) -> OpenedProcess | None:
+    async def _stop_for_restart(self, process_type: str) -> None:
+        # Unlike stop_process(), the process stays in the process memory.
+        process = self.processes.pop(process_type, None)
+        if process is not None:
+            await self._stop(process)
+        await self._stop_standby(process_type)
+
+    def _find_runnable_module(self, process_type: str) -> RunnableModule | None:
         module = next(
             (module for module in get_modules() if module.name == process_type),
             None,
         )
+        return module if isinstance(module, RunnableModule) else None
+
+    async def start_process(
+        self,
+        process_type: str,
+        *,
+        standby_channel: StandbyChannel | None = None,
+    ) -> ManagedProcess | None:
+        launch = self._prepare_launch(process_type, standby_channel=standby_channel)
+        if launch is None:
+            return None
+        # Only the spawn runs in a thread (a zygote's first start can take up
+        # to a minute); its state is recorded back here, on the loop.
+        spawned = await asyncio.to_thread(self._spawn, launch)
+        return self._record_launch(launch, spawned)
 
-        if module is None or not isinstance(module, RunnableModule):
+    def _prepare_launch(
+        self,
+        process_type: str,
+        *,
+        standby_channel: StandbyChannel | None = None,
+    ) -> _Launch | None:
+        module = self._find_runnable_module(process_type)
+        if module is None:
             debug(f"Process {process_type} is not a valid RunnableModule, skipping...")
             return None
 
+        liveness = self._create_liveness_tracker(module)
+        config_channel = (
+            ConfigNotifyChannel.create(process_type)
+            if getattr(module, "live_config", False)
+            else None
+        )
+        env = {
+            **(standby_channel.env() if standby_channel is not None else {}),
+            **(liveness.env() if liveness is not None else {}),
+            **(config_channel.env() if config_channel is not None else {}),
+        }
+        return _Launch(
+            process_type,
+            module,
+            env,
+            pipe_stdout=liveness is not None and liveness.mode == "stdout",
+            standby_channel=standby_channel,
+            liveness=liveness,
+            config_channel=config_channel,
+        )
+
+    def _spawn(self, launch: _Launch) -> tuple[ManagedProcess, LaunchInputs] | None:
+        """
+        Starts the process for `launch`. Touches none of the per-process state,
+        so it can run in a worker thread; _record_launch() records the result.
+        """
+
+        module = launch.module
+        flags = self._launch_flags()
+        launch_inputs = self._launch_inputs(
+            module,
+            self._bundle_hash(
+                module for module in get_modules() if isinstance(module, RunnableModule)
+            ),
+        )
+        # Launch options are only passed when used, so launchers that don't
+        # support them keep working for everything else.
+        launch_kwargs: dict[str, dict[str, str]] = (
+            {"env": launch.env} if launch.env else {}
+        )
         try:
-            process = OpenedProcess.start_module(
-                module,
-                BUNDLE_FOLDER_PATH,
-                {
-                    "config-path": self.config_path,
-                    "basic-system-config-path": BASIC_SYSTEM_CONFIG_PATH,
-                    "blitz-path": BLITZ_PATH,
-                    "bundle-folder-path": BUNDLE_FOLDER_PATH,
-                    "system-name": SYSTEM_NAME,
-                },
-            )
+            process: ManagedProcess
+            if getattr(module, "use_zygote", False):
+                process = ForkedProcess.start_module(
+                    cast(ZygoteModule, cast(object, module)),
+                    BUNDLE_FOLDER_PATH,
+                    flags,
+                    code_hash=launch_inputs.code_hash,
+                    **launch_kwargs,
+                )
+            elif launch.pipe_stdout:
+                process = OpenedProcess.start_module(
+                    module, BUNDLE_FOLDER_PATH, flags, pipe_stdout=True, **launch_kwargs
+                )
+            else:
+                process = OpenedProcess.start_module(
+                    module, BUNDLE_FOLDER_PATH, flags, **launch_kwargs
+                )
         except LazyImportError as e:
-            error(f"Failed to start process {process_type}: {e}")
-            return
+            error(f"Failed to start process {launch.process_type}: {e}")
+            return None
         except Exception as e:
-            error(f"Failed to start process {process_type}: {e}")
-            return
+            error(f"Failed to start process {launch.process_type}: {e}")
+            return None
+
+        if process is None:
+            return None
+        return process, launch_inputs
+
+    def _record_launch(
+        self, launch: _Launch, spawned: tuple[ManagedProcess, LaunchInputs] | None
+    ) -> ManagedProcess | None:
+        if spawned is None:
+            launch.abandon()
+            return None
+
+        process, launch_inputs = spawned
+        profile = cast(
+            ResourceProfileLike | None, getattr(launch.module, "resources", None)
+        )
+        self.resource_profiles[process.pid] = profile
+        self._apply_resources(
+            launch.process_type,
+            process,
+            profile,
+            standby=launch.standby_channel is not None,
+        )
+        budget = cast(
+            MemoryBudgetLike | None, getattr(launch.module, "memory_budget", None)
+        )
+        if budget is not None:
+            self.memory_trends[process.pid] = MemoryTrend(budget)
+        if launch.liveness is not None:
+            self.liveness[process.pid] = launch.liveness
+            if isinstance(process, OpenedProcess) and process.stdout is not None:
+                pump_stdout(launch.process_type, process.stdout, launch.liveness)
+        if launch.config_channel is not None:
+            self.config_channels[process.pid] = launch.config_channel
+        self.launch_inputs[process.pid] = launch_inputs
         return process
 
     async def monitor_process(self, process_type: str):
         timer = 0
+        last_alive_at = time.perf_counter()
         while True:
-            await asyncio.sleep(1)
+            await asyncio.sleep(
+                STANDBY_POLL_INTERVAL_SECONDS if process_type in self.standbys else 1
+            )
             if process_type not in self.processes.keys():
                 timer += 1
                 if timer > 10:
@@ -225,25 +936,60 @@ class ProcessMonitor:
                     break
                 continue
 
-            process = self.processes.get(process_type, None)
+            process = self.processes[process_type]
             timer = 0
 
-            if process is None or not process.is_alive():
-                return_code = process.poll() if process is not None else None
+            if process.is_alive():
+                stalled = await self._is_stalled(process_type, process)
+                if stalled or self._is_due_for_memory_restart(process_type, process):
+                    # Hung or leaking: stop it and handle it like a crash below.
+                    await asyncio.to_thread(process.stop)
+                else:
+                    last_alive_at = time.perf_counter()
+                    standby = self.standbys.get(process_type)
+                    if standby is not None and not standby[0].is_alive():
+                        warning(f"Standby for {process_type} exited; replacing it")
+                        await self._stop_standby(process_type)
+                        self._respawn_standby(process_type)
+                    continue
+
+            return_code = await asyncio.to_thread(process.poll)
+            await self._stop(process)
+            if self.processes.get(process_type) is not process:
+                # A command stopped or replaced it in the meantime.
+                continue
+            if await self._promote_standby(process_type, last_alive_at):
                 warning(
-                    f"Process {process_type} exited with code {return_code}; restarting..."
+                    f"Process {process_type} exited with code {return_code}; "
+                    "standby took over"
                 )
-                if process is not None:
-                    process.stop()
+                self._respawn_standby(process_type)
+                continue
 
-                process = self.start_process(process_type)
-                if process is None:
-                    warning(f"Failed to restart process {process_type}, retrying...")
-                    continue
+            warning(
+                f"Process {process_type} exited with code {return_code}; restarting..."
+            )
+
+            replacement = await self.start_process(process_type)
+            if replacement is None:
+                warning(f"Failed to restart process {process_type}, retrying...")
+                continue
+            if self.processes.get(process_type) is not process:
+                await self._stop(replacement)
+                continue
 
-                self.processes[process_type] = process
-                self.process_mem.append(process_type)
-                info(f"Restarted process {process_type}")
+            self.processes[process_type] = replacement
+            self.process_mem.append(process_type)
+            info(f"Restarted process {process_type}")
+            if process_type not in self.standbys:
+                self._respawn_standby(process_type)
+
+    def _respawn_standby(self, process_type: str) -> None:
+        module = self._find_runnable_module(process_type)
+        if module is None or not getattr(module, "hot_standby", False):
+            return
+        # In the background, so the active instance is watched meanwhile.
+        _ = asyncio.get_running_loop().create_task(self.start_standby(process_type))
 
     def set_event_loop(self, loop: asyncio.AbstractEventLoop):
         self._loop = loop
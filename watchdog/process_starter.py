@@ -1,3 +1,4 @@
+import os
 import subprocess
 import shlex
 
@@ -43,7 +44,12 @@ class OpenedProcess(subprocess.Popen[str]):
 
     @classmethod
     def start_module(
-        cls, module: RunnableModule, bundle_path: str, flags: dict[str, str]
+        cls,
+        module: RunnableModule,
+        bundle_path: str,
+        flags: dict[str, str],
+        env: dict[str, str] | None = None,
+        pipe_stdout: bool = False,
     ) -> "OpenedProcess":
         cmd = f"{module.get_run_command(bundle_path)} {OpenedProcess._format_flags(flags)}".strip()
         debug(f"Starting: {cmd}\n")
@@ -52,4 +58,6 @@ class OpenedProcess(subprocess.Popen[str]):
             text=True,
             bufsize=1,
             universal_newlines=True,
+            env={**os.environ, **env} if env else None,
+            stdout=subprocess.PIPE if pipe_stdout else None,
         )
@@ -0,0 +1,271 @@
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from watchdog.util.logger import debug, warning
+
+CGROUP_FS_ROOT = "/sys/fs/cgroup"
+# Overrides the cgroup the watchdog manages, e.g. when it isn't started by the
+# systemd unit (which delegates its own cgroup to it).
+CGROUP_ROOT_ENV_VAR = "BLITZ_CGROUP_ROOT"
+# cgroup v2 only allows processes in leaves once controllers are enabled, so
+# the watchdog (and processes without limits) move into this one.
+WATCHDOG_CGROUP_LEAF = "watchdog"
+CPU_MAX_PERIOD_US = 100_000
+
+
+class ResourceProfileLike(Protocol):
+    """
+    What the watchdog reads from backend.deployment.module.base.ResourceProfile.
+    """
+
+    cpus: list[int] | None
+    nice: int | None
+    cpu_max: float | None
+    memory_max_mb: int | None
+    realtime_priority: int | None
+
+
+class CgroupTree:
+    """
+    The cgroup v2 subtree delegated to the watchdog, with one leaf per module.
+    """
+
+    def __init__(self, root: str):
+        self.root: str = root
+        self._prepared: bool = False
+
+    @classmethod
+    def for_watchdog(cls) -> "CgroupTree | None":
+        root = os.environ.get(CGROUP_ROOT_ENV_VAR)
+        if root is None:
+            own_cgroup = _process_cgroup(os.getpid())
+            if own_cgroup is None:
+                return None
+            if os.path.basename(own_cgroup) == WATCHDOG_CGROUP_LEAF:
+                own_cgroup = os.path.dirname(own_cgroup)
+            # Only a service's cgroup is the watchdog's own to manage; a login
+            # session's would also hold the shell it was started from.
+            if not own_cgroup.endswith(".service"):
+                return None
+            root = os.path.join(CGROUP_FS_ROOT, own_cgroup.lstrip("/"))
+        return cls(root)
+
+    def prepare(self) -> None:
+        if self._prepared:
+            return
+
+        watchdog_leaf = os.path.join(self.root, WATCHDOG_CGROUP_LEAF)
+        os.makedirs(watchdog_leaf, exist_ok=True)
+        for pid in _read_file(os.path.join(self.root, "cgroup.procs")).split():
+            try:
+                _write_file(os.path.join(watchdog_leaf, "cgroup.procs"), pid)
+            except ProcessLookupError:
+                pass
+
+        available = _read_file(os.path.join(self.root, "cgroup.controllers")).split()
+        for controller in ("cpu", "memory", "io"):
+            if controller in available:
+                _write_file(
+                    os.path.join(self.root, "cgroup.subtree_control"),
+                    f"+{controller}",
+                )
+        self._prepared = True
+
+    def place(
+        self,
+        pid: int,
+        name: str,
+        cpu_max: float | None,
+        memory_max_mb: int | None,
+    ) -> str:
+        self.prepare()
+        leaf = os.path.join(self.root, name)
+        os.makedirs(leaf, exist_ok=True)
+        _write_file(os.path.join(leaf, "cgroup.procs"), str(pid))
+
+        limits = {
+            "cpu.max": (
+                f"{round(cpu_max * CPU_MAX_PERIOD_US)} {CPU_MAX_PERIOD_US}"
+                if cpu_max is not None
+                else None
+            ),
+            "memory.max": (
+                str(memory_max_mb * 1024 * 1024) if memory_max_mb is not None else None
+            ),
+        }
+        for limit, value in limits.items():
+            path = os.path.join(leaf, limit)
+            # Unset limits are reset, so one removed from the profile is lifted
+            # again; a missing file means the controller isn't available.
+            if value is None and not os.path.exists(path):
+                continue
+            _write_file(path, value if value is not None else "max")
+        return leaf
+
+
+_cgroup_tree: CgroupTree | None = None
+
+
+def get_cgroup_tree() -> CgroupTree | None:
+    # Resolved once: the watchdog moves itself into a leaf on first use.
+    global _cgroup_tree
+    if _cgroup_tree is None:
+        _cgroup_tree = CgroupTree.for_watchdog()
+    return _cgroup_tree
+
+
+@dataclass
+class ProcessPlacement:
+    # cgroup leaf directory the process runs in, if it got one of its own.
+    cgroup: str | None = None
+    # Resource profile settings that could not be applied.
+    errors: list[str] = field(default_factory=list)
+
+
+def apply_resource_profile(
+    pid: int, profile: ResourceProfileLike | None, cgroup_name: str
+) -> ProcessPlacement:
+    """
+    Places `pid` in its own cgroup leaf when one is available and applies
+    `profile` to every thread of it. Settings the watchdog isn't permitted to
+    make are skipped and listed in the result's errors.
+    """
+
+    placement = ProcessPlacement()
+    errors = placement.errors
+    cpu_max = profile.cpu_max if profile is not None else None
+    memory_max_mb = profile.memory_max_mb if profile is not None else None
+
+    tree = get_cgroup_tree()
+    try:
+        if tree is None:
+            raise OSError("no delegated cgroup v2 hierarchy found")
+        placement.cgroup = tree.place(pid, cgroup_name, cpu_max, memory_max_mb)
+        debug(f"Placed {pid} in {placement.cgroup}")
+    except OSError as e:
+        # Without limits to enforce the cgroup is only used for accounting,
+        # which falls back to the process tree.
+        if cpu_max is not None or memory_max_mb is not None:
+            errors.append(f"cgroup: {e}")
+        else:
+            debug(f"Not placing {pid} in a cgroup: {e}")
+
+    if profile is None:
+        return placement
+
+    thread_ids = _thread_ids(pid)
+    if profile.cpus is not None:
+        cpus = set(profile.cpus)
+        errors.extend(
+            _for_each_thread(
+                "cpus", thread_ids, lambda tid: os.sched_setaffinity(tid, cpus)
+            )
+        )
+    if profile.nice is not None:
+        nice = profile.nice
+        errors.extend(
+            _for_each_thread(
+                "nice",
+                thread_ids,
+                lambda tid: os.setpriority(os.PRIO_PROCESS, tid, nice),
+            )
+        )
+    if profile.realtime_priority is not None:
+        priority = profile.realtime_priority
+        errors.extend(
+            _for_each_thread(
+                "realtime_priority",
+                thread_ids,
+                lambda tid: os.sched_setscheduler(
+                    tid, os.SCHED_FIFO, os.sched_param(priority)
+                ),
+            )
+        )
+
+    for message in errors:
+        warning(f"Resource profile for {cgroup_name} ({pid}) not applied: {message}")
+    return placement
+
+
+def read_effective_resources(pid: int) -> dict[str, object] | None:
+    """
+    The scheduling and limits `pid` actually runs with, or None if it is gone.
+    """
+
+    try:
+        policy = os.sched_getscheduler(pid)
+        effective: dict[str, object] = {
+            "cpus": sorted(os.sched_getaffinity(pid)),
+            "nice": os.getpriority(os.PRIO_PROCESS, pid),
+            "scheduler": _SCHEDULER_NAMES.get(policy, str(policy)),
+            "realtime_priority": os.sched_getparam(pid).sched_priority,
+        }
+    except (OSError, AttributeError):
+        return None
+
+    cgroup = _process_cgroup(pid)
+    effective["cgroup"] = cgroup
+    if cgroup is not None:
+        cgroup_path = os.path.join(CGROUP_FS_ROOT, cgroup.lstrip("/"))
+        for limit in ("cpu.max", "memory.max"):
+            try:
+                effective[limit.replace(".", "_")] = _read_file(
+                    os.path.join(cgroup_path, limit)
+                )
+            except OSError:
+                effective[limit.replace(".", "_")] = None
+    return effective
+
+
+_SCHEDULER_NAMES: dict[int, str] = {
+    getattr(os, name): name.removeprefix("SCHED_").lower()
+    for name in ("SCHED_OTHER", "SCHED_BATCH", "SCHED_IDLE", "SCHED_FIFO", "SCHED_RR")
+    if hasattr(os, name)
+}
+
+
+def _for_each_thread(
+    setting: str, thread_ids: list[int], apply: Callable[[int], None]
+) -> list[str]:
+    errors: list[str] = []
+    for tid in thread_ids:
+        try:
+            apply(tid)
+        except ProcessLookupError:
+            continue  # thread exited in the meantime
+        except (OSError, ValueError, AttributeError) as e:
+            # AttributeError: the platform lacks the call (e.g. macOS).
+            errors.append(f"{setting}: {e}")
+            break
+    return errors
+
+
+def _thread_ids(pid: int) -> list[int]:
+    try:
+        return sorted(int(tid) for tid in os.listdir(f"/proc/{pid}/task"))
+    except OSError:
+        return [pid]
+
+
+def _process_cgroup(pid: int) -> str | None:
+    try:
+        lines = _read_file(f"/proc/{pid}/cgroup").splitlines()
+    except OSError:
+        return None
+    # cgroup v2 only has the unified "0::<path>" entry.
+    for line in lines:
+        if line.startswith("0::"):
+            return line[3:]
+    return None
+
+
+def _read_file(path: str) -> str:
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _write_file(path: str, value: str) -> None:
+    with open(path, "w") as f:
+        _ = f.write(value)
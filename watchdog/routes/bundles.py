@@ -0,0 +1,121 @@
+import asyncio
+import os
+
+from aiohttp import web
+from typing import cast
+
+from watchdog.api import read_json
+from watchdog.bundle_relay import (
+    HASH_CHUNK_SIZE,
+    RelayError,
+    check_relay_targets,
+    relay_bundle,
+    resolve_relay_path,
+    sha256_file,
+    store_bundle_async,
+)
+
+BUNDLES_ROUTES = web.RouteTableDef()
+
+
+@BUNDLES_ROUTES.post("/bundle/receive")
+async def receive_bundle(request: web.Request) -> web.Response:
+    print("receive_bundle")
+    path = request.query.get("path")
+    sha256 = request.query.get("sha256")
+    if not path or not sha256:
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    try:
+        await store_bundle_async(
+            resolve_relay_path(path),
+            request.content.iter_chunked(HASH_CHUNK_SIZE),
+            sha256,
+        )
+    except RelayError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+
+    return web.json_response({"status": "success"}, status=200)
+
+
+@BUNDLES_ROUTES.post("/bundle/relay")
+async def relay(request: web.Request) -> web.Response:
+    print("relay")
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    data = cast(dict[str, object], data)
+    path = data.get("path")
+    sha256 = data.get("sha256")
+    targets = data.get("targets")
+    if (
+        not isinstance(path, str)
+        or not isinstance(sha256, str)
+        or not isinstance(targets, list)
+        or not all(isinstance(t, dict) for t in targets)
+    ):
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    targets = cast(list[dict[str, object]], targets)
+    try:
+        local_path = resolve_relay_path(path)
+        # Peers listen on the same port as this watchdog.
+        check_relay_targets(targets, _local_port(request))
+    except RelayError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+
+    if not os.path.isfile(local_path) or (
+        await asyncio.to_thread(sha256_file, local_path) != sha256
+    ):
+        return web.json_response(
+            {"status": "error", "message": "Bundle to relay is not present"},
+            status=409,
+        )
+
+    failed = await asyncio.to_thread(relay_bundle, local_path, sha256, targets)
+    if failed:
+        return web.json_response({"status": "error", "failed": failed}, status=502)
+
+    return web.json_response({"status": "success"}, status=200)
+
+
+def _local_port(request: web.Request) -> int | None:
+    if request.transport is None:
+        return None
+    sockname = cast(
+        tuple[str, int] | None, request.transport.get_extra_info("sockname")
+    )
+    return sockname[1] if sockname else None
+
+
+@BUNDLES_ROUTES.get("/get/bundle/hash")
+async def get_bundle_hash(request: web.Request) -> web.Response:
+    path = request.query.get("path")
+    if not path:
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    try:
+        local_path = resolve_relay_path(path)
+    except RelayError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+
+    if not os.path.isfile(local_path):
+        return web.json_response(
+            {"status": "error", "message": "Bundle not found"}, status=404
+        )
+
+    sha256 = await asyncio.to_thread(sha256_file, local_path)
+    return web.json_response({"status": "success", "sha256": sha256}, status=200)
@@ -1,35 +1,96 @@
-from flask import Blueprint, current_app, request, jsonify
-from watchdog.monitor import ProcessMonitor
-from typing import cast
-
-
-GETTERS_BP = Blueprint("getter_routes", __name__)
-
-
-@GETTERS_BP.route("/get/system/status", methods=["GET"])
-def get_system_info():
-    process_monitor = current_app.extensions.get("process_monitor", None)
-    if not isinstance(process_monitor, ProcessMonitor):
-        return (
-            jsonify({"status": "error", "message": "Process monitor not initialized"}),
-            500,
-        )
-
-    active_processes = process_monitor.ping_processes_and_get_alive()
-    possible_processes: list[str] = process_monitor.get_possible_processes()
-    cfg = cast(dict[str, object], current_app.config)
-    system_name_obj = cfg.get("SYSTEM_NAME", None)
-    system_name = system_name_obj if isinstance(system_name_obj, str) else ""
-
-    return (
-        jsonify(
-            {
-                "status": "success",
-                "system_info": system_name,
-                "active_processes": active_processes,
-                "possible_processes": possible_processes,
-                "config_set": process_monitor.is_config_exists,
-            }
-        ),
-        200,
+import asyncio
+import json
+
+from aiohttp import web
+
+from watchdog.api import (
+    DESIRED_CONFIG_BASE64_FILE_KEY,
+    PROCESS_MONITOR_KEY,
+    REQUEST_TIMINGS_KEY,
+    STATUS_BROADCASTER_KEY,
+    SYSTEM_NAME_KEY,
+)
+from watchdog.config_store import config_sha256
+from watchdog.status_stream import STATUS_STREAM_KEEPALIVE_SECONDS, build_status
+
+GETTERS_ROUTES = web.RouteTableDef()
+
+
+@GETTERS_ROUTES.get("/get/system/status")
+async def get_system_info(request: web.Request) -> web.Response:
+    process_monitor = request.app[PROCESS_MONITOR_KEY]
+
+    # Both reload the backend's module list (and the latter hashes module
+    # files), so they stay off the loop like in StatusBroadcaster.sample().
+    possible_processes: list[str] = await asyncio.to_thread(
+        process_monitor.get_possible_processes
+    )
+    pending_restarts = await process_monitor.get_pending_restarts()
+    system_name = request.app[SYSTEM_NAME_KEY]
+
+    return web.json_response(
+        {
+            "status": "success",
+            **build_status(
+                process_monitor, system_name, possible_processes, pending_restarts
+            ),
+        },
+        status=200,
+    )
+
+
+@GETTERS_ROUTES.get("/get/system/status/stream")
+async def stream_system_status(request: web.Request) -> web.StreamResponse:
+    """
+    Server-sent events: one "snapshot" of the status, then a "delta" with the
+    changed and removed keys whenever it changes.
+    """
+
+    broadcaster = request.app[STATUS_BROADCASTER_KEY]
+    response = web.StreamResponse(
+        headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+    )
+    _ = await response.prepare(request)
+
+    subscriber = await broadcaster.subscribe()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), STATUS_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                await response.write(b": keepalive\n\n")
+                continue
+            await response.write(
+                f"event: {event.kind}\ndata: {json.dumps(event.data)}\n\n".encode()
+            )
+    except ConnectionResetError:
+        pass  # client went away
+    finally:
+        broadcaster.unsubscribe(subscriber)
+    return response
+
+
+@GETTERS_ROUTES.get("/get/config/hash")
+async def get_config_hash(request: web.Request) -> web.Response:
+    """
+    sha256 of the decoded config (null if none is set), so the deployer can
+    skip uploading a config the Pi already has.
+    """
+
+    desired_config_base64_file = request.app[DESIRED_CONFIG_BASE64_FILE_KEY]
+    sha256 = await asyncio.to_thread(config_sha256, desired_config_base64_file)
+    return web.json_response({"status": "success", "sha256": sha256}, status=200)
+
+
+@GETTERS_ROUTES.get("/get/api/timings")
+async def get_api_timings(request: web.Request) -> web.Response:
+    timings = request.app[REQUEST_TIMINGS_KEY]
+    return web.json_response(
+        {
+            "status": "success",
+            "routes": {route: t.to_json() for route, t in sorted(timings.items())},
+        },
+        status=200,
     )
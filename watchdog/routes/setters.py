@@ -1,164 +1,324 @@
-from flask import Blueprint, current_app, request, jsonify
-from watchdog.monitor import ProcessMonitor
-from typing import cast
+import asyncio
+import os
 
+from aiohttp import web
+from watchdog.api import DESIRED_CONFIG_BASE64_FILE_KEY, PROCESS_MONITOR_KEY, read_json
+from watchdog.bundle_relay import (
+    HASH_CHUNK_SIZE,
+    RelayError,
+    resolve_relay_path,
+    sha256_file,
+)
+from watchdog.commands import CommandKind, MonitorCommand
+from watchdog.config_store import (
+    ConfigUploadError,
+    clean_base64,
+    promote_staged_config,
+    read_compressed_config,
+    decode_config,
+    install_config,
+    stage_config,
+)
+from typing import cast
 
-SETTERS_BP = Blueprint("setter_routes", __name__)
+SETTERS_ROUTES = web.RouteTableDef()
 
 
-@SETTERS_BP.route("/set/config", methods=["POST"])
-def set_config():
+@SETTERS_ROUTES.post("/set/config")
+async def set_config(request: web.Request) -> web.Response:
     print("set_config")
-    data = request.get_json(silent=True)
+    data = await read_json(request)
     if not isinstance(data, dict) or not isinstance(data.get("config_base64"), str):
-        return (
-            jsonify({"status": "error", "message": "Missing or invalid parameters"}),
-            400,
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
         )
 
-    desired_config_base64_file: str = cast(
-        str, current_app.config.get("DESIRED_CONFIG_BASE64_FILE")
-    )
+    desired_config_base64_file = request.app[DESIRED_CONFIG_BASE64_FILE_KEY]
 
     config_base64: str = cast(str, data.get("config_base64"))
-    filtered = "".join(c for c in config_base64 if c.isalnum() or c in "+/=")
-    with open(desired_config_base64_file, "w") as f:
-        f.write(filtered)
+    filtered = clean_base64(config_base64)
+    try:
+        config = decode_config(filtered)
+    except ConfigUploadError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+    config_changed = await asyncio.to_thread(
+        install_config, desired_config_base64_file, config
+    )
+    if config_changed:
+        monitor = request.app[PROCESS_MONITOR_KEY]
+        await monitor.run_command(MonitorCommand(CommandKind.REFRESH_CONFIG))
+    return web.json_response(
+        {"status": "success", "config_changed": config_changed}, status=200
+    )
+
 
-    monitor = current_app.extensions.get("process_monitor")
-    if not isinstance(monitor, ProcessMonitor):
-        return (
-            jsonify({"status": "error", "message": "Process monitor not initialized"}),
-            500,
+@SETTERS_ROUTES.post("/set/config/binary")
+async def set_config_binary(request: web.Request) -> web.Response:
+    """
+    Takes the config as a zlib-compressed body with the sha256 of the
+    uncompressed config in the query. With `stage=1` it is only kept for an
+    /apply naming that hash.
+    """
+
+    print("set_config_binary")
+    sha256 = request.query.get("sha256")
+    if not sha256:
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    try:
+        config = await read_compressed_config(
+            request.content.iter_chunked(HASH_CHUNK_SIZE), sha256
         )
+    except ConfigUploadError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
 
-    monitor.refresh_config()
-    return jsonify({"status": "success"}), 200
+    desired_config_base64_file = request.app[DESIRED_CONFIG_BASE64_FILE_KEY]
+    if request.query.get("stage") == "1":
+        await asyncio.to_thread(
+            stage_config, desired_config_base64_file, sha256, config
+        )
+        return web.json_response({"status": "success"}, status=200)
 
+    config_changed = await asyncio.to_thread(
+        install_config, desired_config_base64_file, config
+    )
+    if config_changed:
+        monitor = request.app[PROCESS_MONITOR_KEY]
+        await monitor.run_command(MonitorCommand(CommandKind.REFRESH_CONFIG))
+    return web.json_response(
+        {"status": "success", "config_changed": config_changed}, status=200
+    )
 
-@SETTERS_BP.route("/start/process", methods=["POST"])
-def start_process():
+
+@SETTERS_ROUTES.post("/start/process")
+async def start_process(request: web.Request) -> web.Response:
     print("start_process")
-    data = request.get_json(silent=True)
+    data = await read_json(request)
     process_types = data.get("process_types") if isinstance(data, dict) else None
     if not isinstance(process_types, list) or not all(
         isinstance(p, str) for p in process_types
     ):
-        return (
-            jsonify({"status": "error", "message": "Missing or invalid parameters"}),
-            400,
-        )
-
-    monitor = current_app.extensions.get("process_monitor")
-    if not isinstance(monitor, ProcessMonitor):
-        return (
-            jsonify({"status": "error", "message": "Process monitor not initialized"}),
-            500,
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
         )
 
+    monitor = request.app[PROCESS_MONITOR_KEY]
     if not monitor.is_config_exists:
-        return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": "Config not set. Please set the config and try again",
-                }
-            ),
-            400,
+        return web.json_response(
+            {
+                "status": "error",
+                "message": "Config not set. Please set the config and try again",
+            },
+            status=400,
         )
 
-    for process_name in process_types:
-        monitor.start_and_monitor_process(process_name)
+    await monitor.run_command(
+        MonitorCommand(CommandKind.START_PROCESSES, cast(list[str], process_types))
+    )
 
-    return jsonify({"status": "success"}), 200
+    return web.json_response({"status": "success"}, status=200)
 
 
-@SETTERS_BP.route("/stop/all/processes", methods=["POST"])
-def stop_all_processes():
+@SETTERS_ROUTES.post("/stop/all/processes")
+async def stop_all_processes(request: web.Request) -> web.Response:
     print("stop_all_processes")
-    process_monitor = current_app.extensions.get("process_monitor", None)
-    if not isinstance(process_monitor, ProcessMonitor):
-        return (
-            jsonify({"status": "error", "message": "Process monitor not initialized"}),
-            500,
-        )
-
-    process_monitor.abort_all_processes()
-    return jsonify({"status": "success"}), 200
+    process_monitor = request.app[PROCESS_MONITOR_KEY]
+    await process_monitor.run_command(MonitorCommand(CommandKind.STOP_ALL))
+    return web.json_response({"status": "success"}, status=200)
 
 
-@SETTERS_BP.route("/stop/process", methods=["POST"])
-def stop_process():
+@SETTERS_ROUTES.post("/stop/process")
+async def stop_process(request: web.Request) -> web.Response:
     print("stop_process")
-    data_raw = request.get_json(silent=True)
+    data_raw = await read_json(request)
     if not isinstance(data_raw, dict):
-        return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": "Missing or invalid parameters.",
-                }
-            ),
-            400,
+        return web.json_response(
+            {
+                "status": "error",
+                "message": "Missing or invalid parameters.",
+            },
+            status=400,
         )
 
     data = cast(dict[str, object], data_raw)
     process_types_obj = data.get("process_types", None)
     if not isinstance(process_types_obj, list):
-        return (
-            jsonify({"status": "error", "message": "Missing or invalid parameters."}),
-            400,
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters."},
+            status=400,
         )
 
     process_types_obj = cast(list[object], process_types_obj)
     process_types = [x for x in process_types_obj if isinstance(x, str)]
     if len(process_types) != len(process_types_obj):
-        return (
-            jsonify({"status": "error", "message": "Missing or invalid parameters."}),
-            400,
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters."},
+            status=400,
         )
 
-    process_monitor: ProcessMonitor = cast(
-        ProcessMonitor, current_app.extensions.get("process_monitor")
+    process_monitor = request.app[PROCESS_MONITOR_KEY]
+    await process_monitor.run_command(
+        MonitorCommand(CommandKind.STOP_PROCESSES, process_types)
     )
 
-    for process_name in process_types:
-        process_monitor.stop_process(process_name)
+    return web.json_response({"status": "success"}, status=200)
+
 
-    return jsonify({"status": "success"}), 200
+@SETTERS_ROUTES.post("/restart/changed")
+async def restart_changed_processes(request: web.Request) -> web.Response:
+    """
+    Restarts only the processes listed in the status' pending_restarts, e.g.
+    after a bundle was installed without an /apply.
+    """
 
+    print("restart_changed_processes")
+    monitor = request.app[PROCESS_MONITOR_KEY]
+    await monitor.run_command(MonitorCommand(CommandKind.RESTART_CHANGED))
+    return web.json_response({"status": "success"}, status=200)
 
-@SETTERS_BP.route("/set/processes", methods=["POST"])
-def set_processes():
+
+@SETTERS_ROUTES.post("/set/processes")
+async def set_processes(request: web.Request) -> web.Response:
     print("set_processes")
-    data = request.get_json(silent=True)
+    data = await read_json(request)
     process_types = data.get("process_types") if isinstance(data, dict) else None
     if not isinstance(process_types, list) or not all(
         isinstance(p, str) for p in process_types
     ):
-        return (
-            jsonify({"status": "error", "message": "Missing or invalid parameters"}),
-            400,
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
         )
 
-    monitor = current_app.extensions.get("process_monitor")
-    if not isinstance(monitor, ProcessMonitor):
-        return (
-            jsonify({"status": "error", "message": "Process monitor not initialized"}),
-            500,
+    monitor = request.app[PROCESS_MONITOR_KEY]
+    if not monitor.is_config_exists and process_types:
+        return web.json_response(
+            {
+                "status": "error",
+                "message": "Config not set. Please set the config and try again",
+            },
+            status=400,
         )
 
-    if not monitor.is_config_exists and process_types:
-        return (
-            jsonify(
+    await monitor.run_command(
+        MonitorCommand(CommandKind.SET_PROCESSES, cast(list[str], process_types))
+    )
+
+    return web.json_response({"status": "success"}, status=200)
+
+
+@SETTERS_ROUTES.post("/apply")
+async def apply(request: web.Request) -> web.Response:
+    """
+    Sets the config (optional) and the processes in one reconciliation, after
+    checking that the expected bundle (optional) is in place. Processes
+    restart once at most: those kept running only if the config, their module
+    files or the bundle changed.
+
+    The config is either inline (`config_base64`) or named by `config_sha256`
+    after a staged /set/config/binary upload.
+    """
+
+    print("apply")
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    data = cast(dict[str, object], data)
+    config_base64 = data.get("config_base64")
+    config_sha256 = data.get("config_sha256")
+    process_types = data.get("process_types")
+    bundle = data.get("bundle")
+    if (
+        (config_base64 is not None and not isinstance(config_base64, str))
+        or (config_sha256 is not None and not isinstance(config_sha256, str))
+        or not isinstance(process_types, list)
+        or not all(isinstance(p, str) for p in process_types)
+        or (
+            bundle is not None
+            and not (
+                isinstance(bundle, dict)
+                and isinstance(bundle.get("path"), str)
+                and isinstance(bundle.get("sha256"), str)
+            )
+        )
+    ):
+        return web.json_response(
+            {"status": "error", "message": "Missing or invalid parameters"},
+            status=400,
+        )
+
+    if isinstance(bundle, dict):
+        bundle = cast(dict[str, str], bundle)
+        try:
+            local_path = resolve_relay_path(bundle["path"])
+        except RelayError as e:
+            return web.json_response({"status": "error", "message": str(e)}, status=400)
+        sha256 = (
+            await asyncio.to_thread(sha256_file, local_path)
+            if os.path.isfile(local_path)
+            else None
+        )
+        if sha256 != bundle["sha256"]:
+            return web.json_response(
                 {
                     "status": "error",
-                    "message": "Config not set. Please set the config and try again",
-                }
-            ),
-            400,
+                    "message": "Deployed bundle does not match",
+                    "sha256": sha256,
+                },
+                status=409,
+            )
+
+    monitor = request.app[PROCESS_MONITOR_KEY]
+    has_config = bool(config_base64 or config_sha256)
+    if process_types and not has_config and not monitor.is_config_exists:
+        return web.json_response(
+            {
+                "status": "error",
+                "message": "Config not set. Please set the config and try again",
+            },
+            status=400,
         )
 
-    monitor.set_processes(process_types)
+    desired_config_base64_file = request.app[DESIRED_CONFIG_BASE64_FILE_KEY]
+    config_changed = False
+    if isinstance(config_base64, str):
+        try:
+            config = decode_config(clean_base64(config_base64))
+        except ConfigUploadError as e:
+            return web.json_response({"status": "error", "message": str(e)}, status=400)
+        config_changed = await asyncio.to_thread(
+            install_config, desired_config_base64_file, config
+        )
+    elif isinstance(config_sha256, str):
+        try:
+            config_changed = await asyncio.to_thread(
+                promote_staged_config, desired_config_base64_file, config_sha256
+            )
+        except ConfigUploadError as e:
+            return web.json_response({"status": "error", "message": str(e)}, status=409)
 
-    return jsonify({"status": "success"}), 200
+    await monitor.run_command(
+        MonitorCommand(
+            CommandKind.APPLY,
+            cast(list[str], process_types),
+            restart_running=config_changed,
+        )
+    )
+
+    return web.json_response(
+        {
+            "status": "success",
+            "config_changed": config_changed,
+            "active_processes": monitor.get_active_processes(),
+        },
+        status=200,
+    )
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+from watchdog.ext.managed_process import STANDBY_FIFO_ENV_VAR
+
+STANDBY_FIFO_DIR = os.path.join(tempfile.gettempdir(), "blitz-standby")
+# Processes with a standby are polled this often, which bounds the time
+# between the active instance dying and the standby taking over.
+STANDBY_POLL_INTERVAL_SECONDS = 0.05
+
+
+@dataclass
+class StandbyChannel:
+    """
+    FIFO a standby instance blocks on until it is promoted.
+    """
+
+    fifo_path: str
+
+    @classmethod
+    def create(cls, process_type: str) -> "StandbyChannel":
+        os.makedirs(STANDBY_FIFO_DIR, mode=0o700, exist_ok=True)
+        fifo_path = os.path.join(
+            STANDBY_FIFO_DIR, f"{process_type}-{uuid.uuid4().hex[:8]}.fifo"
+        )
+        os.mkfifo(fifo_path, 0o600)
+        return cls(fifo_path)
+
+    def env(self) -> dict[str, str]:
+        return {STANDBY_FIFO_ENV_VAR: self.fifo_path}
+
+    def promote(self) -> bool:
+        """
+        Wakes the standby. Fails when the standby isn't waiting on the FIFO
+        (still initializing, or not calling wait_until_promoted()).
+        """
+
+        try:
+            fd = os.open(self.fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return False
+        try:
+            _ = os.write(fd, b"1")
+        finally:
+            os.close(fd)
+        return True
+
+    def close(self) -> None:
+        try:
+            os.unlink(self.fifo_path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class FailoverStats:
+    count: int = 0
+    last_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    def record(self, latency_s: float) -> None:
+        latency_ms = latency_s * 1000
+        self.count += 1
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+    def to_json(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "last_latency_ms": round(self.last_latency_ms, 1),
+            "max_latency_ms": round(self.max_latency_ms, 1),
+        }
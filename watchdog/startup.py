@@ -0,0 +1,225 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from graphlib import CycleError, TopologicalSorter
+from typing import Protocol
+
+import psutil
+
+from watchdog.util.logger import info, warning
+
+# How often readiness is checked while dependents wait on a module.
+STARTUP_POLL_INTERVAL_SECONDS = 0.1
+
+
+class StartupPolicyLike(Protocol):
+    """
+    What the watchdog reads from backend.deployment.module.base.StartupPolicy.
+    """
+
+    priority: int
+    depends_on: list[str]
+    stagger_seconds: float
+    ready_after_seconds: float
+    ready_timeout_seconds: float
+
+
+@dataclass
+class _DefaultStartupPolicy:
+    priority: int = 0
+    depends_on: list[str] = field(default_factory=list)
+    stagger_seconds: float = 0.0
+    ready_after_seconds: float = 0.0
+    ready_timeout_seconds: float = 30.0
+
+
+@dataclass
+class StartupTiming:
+    # Seconds after the restore began.
+    launched_at: float | None = None
+    ready_at: float | None = None
+    timed_out: bool = False
+
+    def to_json(self) -> dict[str, float | bool | None]:
+        return {
+            "launched_at": _rounded(self.launched_at),
+            "ready_at": _rounded(self.ready_at),
+            "timed_out": self.timed_out,
+        }
+
+
+@dataclass
+class StartupReport:
+    # Seconds between the system booting and the restore beginning.
+    began_after_boot: float | None
+    processes: dict[str, StartupTiming] = field(default_factory=dict)
+    # Seconds after the restore began when every process was ready.
+    all_ready_at: float | None = None
+
+    @property
+    def boot_to_all_ready(self) -> float | None:
+        if self.began_after_boot is None or self.all_ready_at is None:
+            return None
+        return self.began_after_boot + self.all_ready_at
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "began_after_boot": _rounded(self.began_after_boot),
+            "all_ready_at": _rounded(self.all_ready_at),
+            "boot_to_all_ready": _rounded(self.boot_to_all_ready),
+            "processes": {
+                name: timing.to_json() for name, timing in self.processes.items()
+            },
+        }
+
+
+class StartupPlanner:
+    """
+    Launches the processes restored at startup concurrently, each as soon as
+    the modules it waits on (its dependencies and every lower priority) are
+    ready, keeping the configured stagger between launches.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, StartupPolicyLike | None],
+        launch: Callable[[str], Awaitable[bool]],
+        is_alive: Callable[[str], bool],
+        has_signalled_ready: Callable[[str], bool | None],
+    ):
+        """
+        `has_signalled_ready` returns None for processes that have no way to
+        signal readiness; those are ready once alive for ready_after_seconds.
+        """
+
+        self.policies: dict[str, StartupPolicyLike] = {
+            name: policy if policy is not None else _DefaultStartupPolicy()
+            for name, policy in policies.items()
+        }
+        self._launch: Callable[[str], Awaitable[bool]] = launch
+        self._is_alive: Callable[[str], bool] = is_alive
+        self._has_signalled_ready: Callable[[str], bool | None] = has_signalled_ready
+        self._launch_lock: asyncio.Lock = asyncio.Lock()
+        self._last_launch_at: float | None = None
+
+    def waits_on(self) -> dict[str, set[str]]:
+        """
+        The processes each process waits to be ready before launching.
+        Priorities are dropped if they contradict the dependencies, and all
+        ordering if the dependencies themselves are circular.
+        """
+
+        dependencies = {
+            name: {
+                dependency
+                for dependency in policy.depends_on
+                if dependency in self.policies and dependency != name
+            }
+            for name, policy in self.policies.items()
+        }
+        for name, policy in self.policies.items():
+            missing = set(policy.depends_on) - set(self.policies) - {name}
+            if missing:
+                warning(f"{name} depends on {sorted(missing)}, which aren't started")
+
+        with_priorities = {
+            name: dependencies[name]
+            | {
+                other
+                for other, other_policy in self.policies.items()
+                if other_policy.priority < policy.priority
+            }
+            for name, policy in self.policies.items()
+        }
+        for graph, fallback in (
+            (with_priorities, "ignoring priorities"),
+            (dependencies, "starting everything at once"),
+        ):
+            try:
+                _ = tuple(TopologicalSorter(graph).static_order())
+                return graph
+            except CycleError as e:
+                warning(f"Circular startup order {e.args[1]}; {fallback}")
+        return {name: set() for name in self.policies}
+
+    async def run(self) -> StartupReport:
+        began_at = time.monotonic()
+        report = StartupReport(began_after_boot=_seconds_since_boot())
+        report.processes = {name: StartupTiming() for name in self.policies}
+        ready = {name: asyncio.Event() for name in self.policies}
+        waits_on = self.waits_on()
+
+        async def start(name: str) -> None:
+            for dependency in waits_on[name]:
+                _ = await ready[dependency].wait()
+            timing = report.processes[name]
+            try:
+                if await self._launch_staggered(name):
+                    timing.launched_at = time.monotonic() - began_at
+                    await self._wait_until_ready(name, timing)
+                    if not timing.timed_out:
+                        timing.ready_at = time.monotonic() - began_at
+            finally:
+                # Dependents go ahead even if this failed, like they would
+                # without an ordering.
+                ready[name].set()
+
+        _ = await asyncio.gather(*(start(name) for name in self.policies))
+
+        if all(timing.ready_at is not None for timing in report.processes.values()):
+            report.all_ready_at = time.monotonic() - began_at
+            info(
+                f"All {len(report.processes)} restored processes ready after "
+                f"{report.all_ready_at:.2f}s"
+                + (
+                    f" ({report.boot_to_all_ready:.1f}s after boot)"
+                    if report.boot_to_all_ready is not None
+                    else ""
+                )
+            )
+        return report
+
+    async def _launch_staggered(self, name: str) -> bool:
+        async with self._launch_lock:
+            stagger = self.policies[name].stagger_seconds
+            if self._last_launch_at is not None and stagger > 0:
+                await asyncio.sleep(
+                    max(0.0, self._last_launch_at + stagger - time.monotonic())
+                )
+            launched = await self._launch(name)
+            if launched:
+                self._last_launch_at = time.monotonic()
+            return launched
+
+    async def _wait_until_ready(self, name: str, timing: StartupTiming) -> None:
+        policy = self.policies[name]
+        launched_at = time.monotonic()
+        while True:
+            now = time.monotonic()
+            alive_long_enough = now - launched_at >= policy.ready_after_seconds
+            signalled = self._has_signalled_ready(name)
+            if signalled is None:
+                if alive_long_enough and self._is_alive(name):
+                    return
+            elif signalled:
+                return
+            if now - launched_at >= policy.ready_timeout_seconds:
+                warning(
+                    f"{name} not ready after {policy.ready_timeout_seconds}s; "
+                    "starting its dependents anyway"
+                )
+                timing.timed_out = True
+                return
+            await asyncio.sleep(STARTUP_POLL_INTERVAL_SECONDS)
+
+
+def _seconds_since_boot() -> float | None:
+    try:
+        return time.time() - psutil.boot_time()
+    except (OSError, RuntimeError):
+        return None
+
+
+def _rounded(seconds: float | None) -> float | None:
+    return round(seconds, 2) if seconds is not None else None
@@ -0,0 +1,147 @@
+import asyncio
+from dataclasses import dataclass, field
+
+import psutil
+
+from watchdog.config_store import config_sha256
+from watchdog.monitor import ProcessMonitor
+
+# How often the status is sampled while anyone is subscribed.
+STATUS_STREAM_INTERVAL_SECONDS = 0.5
+# get_possible_processes() and get_pending_restarts() reload the deployed
+# modules, so they are refreshed far less often than the rest of the status.
+POSSIBLE_PROCESSES_REFRESH_SECONDS = 10.0
+# Events queued per subscriber before it is resynced with one snapshot.
+STATUS_STREAM_BUFFER_EVENTS = 16
+# Idle streams get a comment this often so proxies keep them open.
+STATUS_STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+def build_status(
+    process_monitor: ProcessMonitor,
+    system_name: str,
+    possible_processes: list[str],
+    pending_restarts: dict[str, list[str]],
+) -> dict[str, object]:
+    return {
+        "system_info": system_name,
+        "active_processes": process_monitor.ping_processes_and_get_alive(),
+        "possible_processes": possible_processes,
+        "config_set": process_monitor.is_config_exists,
+        "standby_processes": process_monitor.get_standby_processes(),
+        "failovers": process_monitor.get_failover_stats(),
+        "resources": process_monitor.get_resource_report(),
+        "stalls": process_monitor.get_stall_events(),
+        "memory": process_monitor.get_memory_report(),
+        "startup": process_monitor.get_startup_report(),
+        "pending_restarts": pending_restarts,
+    }
+
+
+@dataclass
+class StatusEvent:
+    # "snapshot" (the full status) or "delta" (changed and removed keys).
+    kind: str
+    data: dict[str, object]
+
+
+@dataclass(eq=False)
+class StatusSubscriber:
+    queue: asyncio.Queue[StatusEvent] = field(
+        default_factory=lambda: asyncio.Queue(STATUS_STREAM_BUFFER_EVENTS)
+    )
+    # Times the buffer overflowed and was replaced by a snapshot.
+    resyncs: int = 0
+
+    def offer(self, event: StatusEvent, snapshot: dict[str, object]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is behind: its queued deltas are superseded by one
+            # snapshot, so the watchdog never buffers more than this.
+            while not self.queue.empty():
+                _ = self.queue.get_nowait()
+            self.queue.put_nowait(StatusEvent("snapshot", snapshot))
+            self.resyncs += 1
+
+
+class StatusBroadcaster:
+    """
+    Samples the status while there are subscribers and pushes a snapshot to
+    each new subscriber, then only the top-level keys that changed.
+    """
+
+    def __init__(self, process_monitor: ProcessMonitor, system_name: str):
+        self.process_monitor: ProcessMonitor = process_monitor
+        self.system_name: str = system_name
+        self.subscribers: set[StatusSubscriber] = set()
+        self.snapshot: dict[str, object] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._possible_processes: list[str] = []
+        self._pending_restarts: dict[str, list[str]] = {}
+        self._possible_processes_at: float | None = None
+
+    async def subscribe(self) -> StatusSubscriber:
+        subscriber = StatusSubscriber()
+        if self.snapshot is None or self._task is None or self._task.done():
+            self.snapshot = await self.sample()
+        subscriber.queue.put_nowait(StatusEvent("snapshot", self.snapshot))
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: StatusSubscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    async def sample(self) -> dict[str, object]:
+        now = asyncio.get_running_loop().time()
+        if (
+            self._possible_processes_at is None
+            or now - self._possible_processes_at >= POSSIBLE_PROCESSES_REFRESH_SECONDS
+        ):
+            self._possible_processes = await asyncio.to_thread(
+                self.process_monitor.get_possible_processes
+            )
+            self._pending_restarts = await self.process_monitor.get_pending_restarts()
+            self._possible_processes_at = now
+
+        status = build_status(
+            self.process_monitor,
+            self.system_name,
+            self._possible_processes,
+            self._pending_restarts,
+        )
+        status["config_hash"] = await asyncio.to_thread(
+            config_sha256, self.process_monitor.config_path
+        )
+        status["system"] = await asyncio.to_thread(_read_system_stats)
+        return status
+
+    async def _run(self) -> None:
+        while self.subscribers:
+            await asyncio.sleep(STATUS_STREAM_INTERVAL_SECONDS)
+            snapshot = await self.sample()
+            previous = self.snapshot or {}
+            self.snapshot = snapshot
+
+            changed = {
+                key: value
+                for key, value in snapshot.items()
+                if key not in previous or previous[key] != value
+            }
+            removed = [key for key in previous if key not in snapshot]
+            if not changed and not removed:
+                continue
+            event = StatusEvent("delta", {"changed": changed, "removed": removed})
+            for subscriber in list(self.subscribers):
+                subscriber.offer(event, snapshot)
+
+
+def _read_system_stats() -> dict[str, float]:
+    return {
+        # Since the previous sample; psutil doesn't block for it.
+        "cpu_usage_total": psutil.cpu_percent(interval=None),
+        "memory_usage": psutil.virtual_memory().percent,
+        "disk_usage": psutil.disk_usage("/").percent,
+    }
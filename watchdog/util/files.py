@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+
+def write_atomically(file_path: str, contents: str | bytes) -> None:
+    """
+    Replaces `file_path` with `contents`. A power cut leaves either the old
+    or the new file, never a truncated one.
+    """
+
+    directory = os.path.dirname(file_path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(file_path)}."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _ = f.write(contents.encode() if isinstance(contents, str) else contents)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    sync_directory(directory)
+
+
+def sync_directory(directory: str) -> None:
+    """
+    Makes renames and deletions in `directory` survive a power cut.
+    """
+
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,278 @@
+import json
+import os
+import shlex
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Protocol
+
+import psutil
+
+from watchdog.util.logger import debug, info, warning
+
+ZYGOTE_SERVER_PATH = os.path.join(os.path.dirname(__file__), "zygote_server.py")
+ZYGOTE_SOCKET_DIR = os.path.join(tempfile.gettempdir(), "blitz-zygotes")
+ZYGOTE_START_TIMEOUT_SECONDS = 60.0
+ZYGOTE_REQUEST_TIMEOUT_SECONDS = 5.0
+
+
+class ZygoteError(Exception):
+    pass
+
+
+class ZygoteModule(Protocol):
+    """
+    What the watchdog needs from a PythonModule with `use_zygote` set.
+    """
+
+    name: str
+    preload_modules: list[str]
+
+    def get_interpreter_path(self) -> str: ...
+
+    def get_entrypoint_path(self, bundle_path: str) -> str: ...
+
+    def get_extra_run_args(self) -> str: ...
+
+
+class Zygote:
+    """
+    A running zygote_server.py for one module, and the client side of its socket.
+    Spawns run in threads off the event loop, so starting and stopping the
+    server is serialized.
+    """
+
+    def __init__(self, name: str, command: list[str], code_hash: str | None = None):
+        self.name: str = name
+        self.command: list[str] = command
+        # The code the preloaded modules were imported from.
+        self.code_hash: str | None = code_hash
+        self.socket_path: str = os.path.join(ZYGOTE_SOCKET_DIR, f"{name}.sock")
+        self.process: subprocess.Popen[bytes] | None = None
+        self._lock: threading.RLock = threading.RLock()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self.is_alive():
+            return
+
+        os.makedirs(ZYGOTE_SOCKET_DIR, mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        command = [*self.command, "--socket", self.socket_path]
+        debug(f"Starting zygote for {self.name}: {shlex.join(command)}")
+        started_at = time.perf_counter()
+        self.process = subprocess.Popen(command)
+
+        deadline = started_at + ZYGOTE_START_TIMEOUT_SECONDS
+        while time.perf_counter() < deadline:
+            if not self.is_alive():
+                raise ZygoteError(f"Zygote for {self.name} exited during startup")
+            try:
+                _ = self.request({"op": "ping"})
+                info(
+                    f"Zygote for {self.name} ready in "
+                    f"{time.perf_counter() - started_at:.2f} s"
+                )
+                return
+            except ZygoteError:
+                time.sleep(0.05)
+
+        self.stop()
+        raise ZygoteError(f"Zygote for {self.name} did not start in time")
+
+    def request(self, payload: dict[str, object]) -> dict[str, object]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(ZYGOTE_REQUEST_TIMEOUT_SECONDS)
+                connection.connect(self.socket_path)
+                connection.sendall((json.dumps(payload) + "\n").encode())
+                response = json.loads(connection.makefile("r").readline() or "{}")
+        except (OSError, ValueError) as e:
+            raise ZygoteError(f"Zygote for {self.name} request failed: {e}") from e
+
+        if not isinstance(response, dict):
+            raise ZygoteError(f"Zygote for {self.name} sent {response!r}")
+        return response
+
+    def spawn(self, argv: list[str], env: dict[str, str] | None = None) -> int:
+        with self._lock:
+            self._ensure_started()
+            response = self.request({"op": "spawn", "argv": argv, "env": env or {}})
+        pid = response.get("pid")
+        if not isinstance(pid, int):
+            raise ZygoteError(f"Zygote for {self.name} failed to spawn: {response}")
+        return pid
+
+    def status(self, pid: int) -> tuple[bool, int | None]:
+        response = self.request({"op": "status", "pid": pid})
+        returncode = response.get("returncode")
+        return (
+            bool(response.get("alive")),
+            returncode if isinstance(returncode, int) else None,
+        )
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.process is None:
+                return
+            self.process.terminate()
+            try:
+                _ = self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+
+_zygotes: dict[str, Zygote] = {}
+_zygotes_lock = threading.Lock()
+
+
+def get_zygote(
+    module: ZygoteModule, bundle_path: str, code_hash: str | None = None
+) -> Zygote:
+    """
+    Returns the zygote for `module`, replacing it if the command it should run
+    with changed (e.g. a deploy switched the module's Python environment) or
+    a deploy changed the code (`code_hash`) its preloaded modules came from.
+    """
+
+    command = [
+        module.get_interpreter_path(),
+        "-u",
+        ZYGOTE_SERVER_PATH,
+        "--main",
+        module.get_entrypoint_path(bundle_path),
+        "--preload",
+        *module.preload_modules,
+    ]
+    with _zygotes_lock:
+        zygote = _zygotes.get(module.name)
+        if zygote is not None and (
+            zygote.command != command or zygote.code_hash != code_hash
+        ):
+            zygote.stop()
+            zygote = None
+        if zygote is None:
+            zygote = Zygote(module.name, command, code_hash)
+            _zygotes[module.name] = zygote
+        return zygote
+
+
+def stop_all_zygotes() -> None:
+    with _zygotes_lock:
+        for zygote in _zygotes.values():
+            zygote.stop()
+        _zygotes.clear()
+
+
+class ForkedProcess:
+    """
+    A module process forked by a zygote, with the same interface the monitor
+    uses on OpenedProcess.
+    """
+
+    def __init__(self, pid: int, zygote: Zygote):
+        self.pid: int = pid
+        self.zygote: Zygote = zygote
+        self.returncode: int | None = None
+        try:
+            self._process: psutil.Process | None = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            self._process = None
+
+    def poll(self) -> int | None:
+        if self.returncode is not None or self.is_alive():
+            return self.returncode
+
+        # Only the zygote knows the exit code of its child.
+        try:
+            alive, returncode = self.zygote.status(self.pid)
+        except ZygoteError:
+            # Without its zygote the child is reparented and its exit code is
+            # lost.
+            alive, returncode = False, None
+
+        if not alive:
+            self.returncode = returncode if returncode is not None else -1
+        return self.returncode
+
+    def is_alive(self) -> bool:
+        # Checked locally rather than over the zygote's socket: the monitor
+        # and the status endpoints ask this from the event loop.
+        return self.returncode is None and _is_running(self._process)
+
+    def wait(self, timeout: float | None = None) -> int:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while (returncode := self.poll()) is None:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout or 0)
+            time.sleep(0.02)
+        return returncode
+
+    def stop(self) -> None:
+        try:
+            parent = psutil.Process(self.pid)
+            children = parent.children(recursive=True)
+            for child in children:
+                debug(f"Killing child process {child.pid}")
+                child.terminate()
+            _, alive = psutil.wait_procs(children, timeout=2)
+            for child in alive:
+                debug(f"Force killing stubborn child process {child.pid}")
+                child.kill()
+            parent.terminate()
+            try:
+                _ = self.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                parent.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            debug("Process already dead or inaccessible")
+
+    @classmethod
+    def start_module(
+        cls,
+        module: ZygoteModule,
+        bundle_path: str,
+        flags: dict[str, str],
+        env: dict[str, str] | None = None,
+        code_hash: str | None = None,
+    ) -> "ForkedProcess":
+        argv = shlex.split(module.get_extra_run_args())
+        for flag, value in flags.items():
+            argv.extend([f"--{flag}", value])
+
+        zygote = get_zygote(module, bundle_path, code_hash)
+        started_at = time.perf_counter()
+        try:
+            pid = zygote.spawn(argv, env)
+        except ZygoteError:
+            warning(f"Zygote for {module.name} is unresponsive; restarting it")
+            zygote.stop()
+            pid = zygote.spawn(argv, env)
+        debug(
+            f"Forked {module.name} as {pid} in "
+            f"{(time.perf_counter() - started_at) * 1000:.1f} ms"
+        )
+        return cls(pid, zygote)
+
+
+def _is_running(process: psutil.Process | None) -> bool:
+    # is_running() also catches the pid having been reused by now.
+    try:
+        return (
+            process is not None
+            and process.is_running()
+            and process.status() != psutil.STATUS_ZOMBIE
+        )
+    except psutil.NoSuchProcess:
+        return False
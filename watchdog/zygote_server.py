@@ -0,0 +1,146 @@
+"""
+Fork server for PythonModule processes started with `use_zygote`.
+
+The watchdog starts one of these per module with the module's interpreter. It
+imports the module's heavy dependencies once, then forks a child for every
+start request; the child runs the module's __main__.py as if it had been
+launched directly. Only the standard library is used here, since this runs in
+the module's environment rather than the watchdog's.
+
+Requests are one JSON line per connection on a unix socket:
+    {"op": "spawn", "argv": [...], "env": {...}} -> {"pid": 1234}
+    {"op": "status", "pid": 1234}                -> {"alive": false, "returncode": 0}
+    {"op": "ping"}                               -> {"ok": true}
+"""
+
+import argparse
+import importlib
+import json
+import os
+import runpy
+import socket
+import sys
+import traceback
+
+ACCEPT_TIMEOUT_SECONDS = 1.0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--socket", required=True)
+    _ = parser.add_argument("--main", required=True)
+    _ = parser.add_argument("--preload", nargs="*", default=[])
+    return parser.parse_args()
+
+
+def preload(module_names: list[str]) -> None:
+    for name in module_names:
+        try:
+            _ = importlib.import_module(name)
+        except Exception as e:
+            print(f"[zygote] Could not preload {name}: {e}", file=sys.stderr)
+
+
+def run_child(main_path: str, argv: list[str], env: dict[str, str]) -> None:
+    os.environ.update(env)
+    sys.argv = [main_path, *argv]
+    sys.path[0] = os.path.dirname(os.path.abspath(main_path))
+
+    exit_code = 0
+    try:
+        _ = runpy.run_path(main_path, run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+
+class ZygoteServer:
+    def __init__(self, socket_path: str, main_path: str):
+        self.socket_path: str = socket_path
+        self.main_path: str = main_path
+        self.children: set[int] = set()
+        self.exit_codes: dict[int, int] = {}
+        self.parent_pid: int = os.getppid()
+
+    def serve(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(8)
+        server.settimeout(ACCEPT_TIMEOUT_SECONDS)
+
+        # Exit with the watchdog; orphaned children keep running like
+        # processes started without the zygote would.
+        while os.getppid() == self.parent_pid:
+            self.reap()
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                continue
+
+            with connection:
+                connection.settimeout(None)
+                request = json.loads(connection.makefile("r").readline() or "{}")
+                if request.get("op") == "spawn":
+                    argv = [str(arg) for arg in request.get("argv", [])]
+                    env = {str(k): str(v) for k, v in request.get("env", {}).items()}
+                    pid = os.fork()
+                    if pid == 0:
+                        server.close()
+                        connection.close()
+                        run_child(self.main_path, argv, env)
+                    self.children.add(pid)
+                    response: dict[str, object] = {"pid": pid}
+                else:
+                    response = self.handle(request)
+                connection.sendall((json.dumps(response) + "\n").encode())
+
+        server.close()
+        os.unlink(self.socket_path)
+
+    def handle(self, request: dict[str, object]) -> dict[str, object]:
+        match request.get("op"):
+            case "ping":
+                return {"ok": True}
+            case "status":
+                self.reap()
+                pid = request.get("pid")
+                if pid in self.exit_codes:
+                    return {"alive": False, "returncode": self.exit_codes.pop(pid)}
+                if pid in self.children:
+                    return {"alive": True, "returncode": None}
+                return {"alive": False, "returncode": None}
+            case op:
+                return {"error": f"unknown op {op}"}
+
+    def reap(self) -> None:
+        for pid in list(self.children):
+            try:
+                reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                self.children.discard(pid)
+                continue
+            if reaped_pid == pid:
+                self.children.discard(pid)
+                self.exit_codes[pid] = os.waitstatus_to_exitcode(status)
+
+
+def main() -> None:
+    args = parse_args()
+    preload(args.preload)
+    ZygoteServer(args.socket, args.main).serve()
+
+
+if __name__ == "__main__":
+    main()